@@ -10,7 +10,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import classification_report
 import sys
 import os
@@ -19,6 +18,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from adsb_spoofing import ADSBSpoofingDetector
 from avionics_anomaly import AvionicsAnomalyDetector
+from ita_aero_sec.utils.density_plot import plot_density
 
 st.set_page_config(page_title="ITA Cybersecurity Dashboard", page_icon="✈️", layout="wide")
 
@@ -28,6 +28,7 @@ st.markdown("**Aviation Threat Detection using Machine Learning**")
 # Sidebar controls
 st.sidebar.header("Simulation Parameters")
 n_samples = st.sidebar.slider("Number of Samples", 500, 5000, 1000)
+max_markers = st.sidebar.slider("Anomaly Markers Drawn", 100, 5000, 2000)
 contamination = st.sidebar.slider("Anomaly Ratio (%)", 1, 20, 10) / 100.0
 
 if st.button("Run Simulation"):
@@ -60,7 +61,8 @@ if st.button("Run Simulation"):
         fig, ax = plt.subplots(figsize=(8, 6))
         adsb_df['prediction'] = preds_adsb
         adsb_df['pred_label'] = adsb_df['prediction'].map({1: 0, -1: 1})
-        sns.scatterplot(data=adsb_df, x='velocity_delta', y='altitude_delta', hue='pred_label', palette={0: 'blue', 1: 'red'}, ax=ax)
+        plot_density(ax, adsb_df['velocity_delta'], adsb_df['altitude_delta'], adsb_df['pred_label'], adsb_df['label'],
+                     max_anomaly_points=max_markers, palette={0: 'blue', 1: 'red'})
         ax.set_title('ADS-B Spoofing Detection')
         ax.axhline(500, color='gray', linestyle='--', alpha=0.5)
         ax.axhline(-500, color='gray', linestyle='--', alpha=0.5)
@@ -92,8 +94,9 @@ if st.button("Run Simulation"):
 
         # Plot for avionics
         fig2, ax2 = plt.subplots(figsize=(8, 6))
-        avionics_df['pred_label'] = mapped_preds_av
-        sns.scatterplot(data=avionics_df, x='airspeed', y='altitude', hue='pred_label', palette={0: 'green', 1: 'orange'}, ax=ax2)
+        avionics_df['pred_label'] = np.asarray(mapped_preds_av)
+        plot_density(ax2, avionics_df['airspeed'], avionics_df['altitude'], avionics_df['pred_label'], avionics_df['label'],
+                     max_anomaly_points=max_markers, palette={0: 'green', 1: 'orange'})
         ax2.set_title('Avionics Bus Anomaly Detection')
         st.pyplot(fig2)
 
@@ -0,0 +1,61 @@
+import sys
+import os
+import time
+import argparse
+import logging
+
+# Ensure src is in python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+from sklearn.metrics import precision_recall_fscore_support
+from avionics_anomaly import AvionicsAnomalyDetector
+
+
+def benchmark_engine(engine: str, train, test) -> dict:
+    detector = AvionicsAnomalyDetector(contamination=0.03, engine=engine)
+    start = time.perf_counter()
+    detector.train_detector(train)
+    fit_s = time.perf_counter() - start
+
+    X = test[detector.features].to_numpy()
+    start = time.perf_counter()
+    preds = detector.predict_model(X)   # Engine only, without the envelope rule cascade
+    predict_s = time.perf_counter() - start
+    precision, recall, f1, _ = precision_recall_fscore_support(test['label'], preds, average='binary', zero_division=0)
+    return {"fit_s": fit_s, "words_per_s": len(X) / predict_s, "precision": precision, "recall": recall, "f1": f1}
+
+
+def run_benchmark(sizes, svm_max: int, nystroem_max: int, test_size: int) -> None:
+    print("\n" + "=" * 78)
+    print("   ARINC 429 ONE-CLASS ENGINE BENCHMARK (svm vs nystroem vs sgd)   ")
+    print("=" * 78)
+    test = AvionicsAnomalyDetector(contamination=0.03, random_state=7).simulate_arinc_bus(test_size)
+    print(f"{'words':>10} | {'engine':>8} | {'fit (s)':>9} | {'predict (words/s)':>17} | {'prec':>5} | {'recall':>6} | {'F1':>5}")
+    print("-" * 78)
+    for n in sizes:
+        train = AvionicsAnomalyDetector(contamination=0.03).simulate_arinc_bus(n)
+        for engine in AvionicsAnomalyDetector.ENGINES:
+            if engine == "svm" and n > svm_max:
+                print(f"{n:>10,} | {engine:>8} | {'skipped (superlinear fit, raise --svm-max to force)':>52}")
+                continue
+            if engine == "nystroem" and n > nystroem_max:
+                # The batch fit materializes n x n_components features; the sgd engine streams them.
+                print(f"{n:>10,} | {engine:>8} | {'skipped (in-memory feature map, see sgd engine)':>52}")
+                continue
+            r = benchmark_engine(engine, train, test)
+            print(f"{n:>10,} | {engine:>8} | {r['fit_s']:9.2f} | {r['words_per_s']:17,.0f} | "
+                  f"{r['precision']:5.2f} | {r['recall']:6.2f} | {r['f1']:5.2f}")
+        del train
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fit time, predict throughput and detection quality per avionics engine')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6, 1e7],
+                        help='Training set sizes in ARINC words')
+    parser.add_argument('--svm-max', type=float, default=2e4, help='Largest training size for the exact RBF SVM')
+    parser.add_argument('--nystroem-max', type=float, default=2e6, help='Largest training size for the batch Nystroem fit')
+    parser.add_argument('--test-size', type=int, default=100000)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    run_benchmark([int(n) for n in args.sizes], int(args.svm_max), int(args.nystroem_max), args.test_size)
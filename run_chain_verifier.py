@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import argparse
+
+# Ensure src is in python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from ita_aero_sec.ai.chain_verifier import FORMATS, SEGMENT_BYTES, detect_format, verify_chain
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Verify SovereignIA_Auditor logs and exported GEAR ledgers '
+                                                 '(hash signatures, prev_hash links, sequence numbers)')
+    parser.add_argument('paths', nargs='+', help='JSONL chain files')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='Chain format (default: detect from first record)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Verifier processes')
+    parser.add_argument('--segment-mb', type=float, default=SEGMENT_BYTES / (1 << 20),
+                        help='Segment size re-hashed per task (also the checkpoint spacing)')
+    parser.add_argument('--checkpoints', type=str, default=None,
+                        help="Checkpoint file (default: '<log>.ckpt' when --resume or --save-checkpoints is set)")
+    parser.add_argument('--save-checkpoints', action='store_true', help='Append verified segment boundaries')
+    parser.add_argument('--resume', action='store_true', help='Only verify past the last stored checkpoint')
+    parser.add_argument('--json', type=str, default=None, help='Also write the reports to this JSON file')
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 78)
+    print("   FORENSIC HASH-CHAIN VERIFICATION (ISO 27001 / MPSP CHAIN OF CUSTODY)   ")
+    print("=" * 78)
+    reports, failures = [], 0
+    for path in args.paths:
+        checkpoints = args.checkpoints or (path + '.ckpt' if args.resume or args.save_checkpoints else None)
+        try:
+            fmt = FORMATS[args.format] if args.format else detect_format(path)
+            report = verify_chain(path, fmt, workers=args.workers, segment_bytes=int(args.segment_mb * (1 << 20)),
+                                  checkpoint_path=checkpoints if (args.save_checkpoints or args.resume) else None,
+                                  resume=args.resume)
+        except (OSError, ValueError) as e:
+            print(f"[FAIL] {path}: {e}")
+            reports.append({"path": path, "ok": False, "error": {"kind": "unreadable", "detail": str(e)}})
+            failures += 1
+            continue
+        reports.append(report)
+        resumed = f" (resumed at byte {report['resumed_from']:,})" if report['resumed_from'] else ""
+        status = " OK " if report['ok'] else "FAIL"
+        print(f"[{status}] {path} [{report['format'] or 'empty'}] {report['records']:,} records{resumed} | "
+              f"{report['segments']} segments | {report['seconds']:.2f} s ({report['mb_per_s']:.1f} MB/s)")
+        if not report['ok']:
+            e = report['error']
+            print(f"         first break: {e['kind']} at byte {e['offset']:,} "
+                  f"(record #{e['record']:,} after seq {e['seq']}) - {e['detail']}")
+            failures += 1
+    print("-" * 78)
+    print(f"{len(args.paths) - failures}/{len(args.paths)} chains intact")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import logging
+import resource
+import multiprocessing as mp
+
+# Ensure src is in python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'detector_baseline.json')
+
+PRESETS = {
+    "quick": {"sizes": [1000, 10000], "batches": [1, 64, 1024], "repeats": 50},
+    "full": {"sizes": [1000, 10000, 100000], "batches": [1, 16, 256, 4096], "repeats": 200},
+}
+DETECTORS = ("adsb", "adsb_compiled", "avionics_svm", "avionics_nystroem", "deep_numpy")
+MAX_SVM_TRAIN = 20000
+
+
+def _latency(fn, X: np.ndarray, batch: int, repeats: int) -> dict:
+    """Per-batch latency distribution and sustained throughput for one batch size."""
+    fn(X[:batch])
+    timings = np.empty(repeats)
+    for r in range(repeats):
+        start = (r * batch) % max(1, len(X) - batch)
+        chunk = X[start:start + batch]
+        t0 = time.perf_counter()
+        fn(chunk)
+        timings[r] = time.perf_counter() - t0
+    return {
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p99_ms": float(np.percentile(timings, 99) * 1000),
+        "msgs_per_s": float(batch * repeats / timings.sum()),
+    }
+
+
+def _build(detector: str, n_train: int):
+    """Returns (fit seconds, batch scoring function, evaluation matrix) for a detector case."""
+    if detector.startswith("adsb"):
+        from adsb_spoofing import ADSBSpoofingDetector, ADSBInferenceEngine
+        model = ADSBSpoofingDetector(contamination=0.05)
+        data = model.generate_flight_data(n_train)
+        start = time.perf_counter()
+        model.train_detector(data)
+        fit_s = time.perf_counter() - start
+        engine = ADSBInferenceEngine.from_detector(model, compiled=detector == "adsb_compiled")
+        return fit_s, engine.predict_batch, data[model.features].to_numpy(dtype=np.float32)
+
+    if detector.startswith("avionics"):
+        from avionics_anomaly import AvionicsAnomalyDetector
+        model = AvionicsAnomalyDetector(contamination=0.03, engine=detector.split("_")[1])
+        data = model.simulate_arinc_bus(n_train)
+        start = time.perf_counter()
+        model.train_detector(data)
+        fit_s = time.perf_counter() - start
+        return fit_s, model.predict_batch, data[model.features].to_numpy(dtype=np.float32)
+
+    if detector == "deep_numpy":
+        # Inference-only: the Keras fit needs TensorFlow, the edge path runs the exported weights.
+        from ita_aero_sec.ai.numpy_lstm import NumpyLSTMAutoencoder
+        rng = np.random.default_rng(0)
+        units, features, seq = 32, 3, 10
+        shapes = {"enc_kernel": (features, 4 * units), "enc_recurrent": (units, 4 * units), "enc_bias": (4 * units,),
+                  "dec_kernel": (units, 4 * units), "dec_recurrent": (units, 4 * units), "dec_bias": (4 * units,),
+                  "dense_kernel": (units, features), "dense_bias": (features,)}
+        model = NumpyLSTMAutoencoder({k: rng.normal(0, 0.3, s) for k, s in shapes.items()})
+        windows = rng.random((n_train, seq, features)).astype(np.float32)
+        return None, model.reconstruction_loss, windows
+
+    raise ValueError(f"Unknown detector '{detector}'")
+
+
+def _run_case(detector: str, n_train: int, batches, repeats: int) -> list:
+    """Runs in a fresh process so peak RSS is attributable to this case alone."""
+    logging.disable(logging.INFO)  # Detector modules configure INFO logging on import
+    fit_s, score, X = _build(detector, n_train)
+    rows = []
+    for batch in batches:
+        if batch > len(X):
+            continue
+        row = {"detector": detector, "n_train": n_train, "batch": batch, "fit_s": fit_s}
+        row.update(_latency(score, X, batch, max(5, repeats // max(1, batch // 256))))
+        rows.append(row)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for row in rows:
+        row["peak_rss_mb"] = peak_kb / 1024.0
+    return rows
+
+
+def run_suite(detectors, sizes, batches, repeats: int) -> dict:
+    import sklearn
+    ctx = mp.get_context("spawn")
+    results = []
+    for detector in detectors:
+        for n in sizes:
+            if detector == "avionics_svm" and n > MAX_SVM_TRAIN:
+                continue
+            with ctx.Pool(1) as pool:
+                rows = pool.apply(_run_case, (detector, n, batches, repeats))
+            for row in rows:
+                fit = f"{row['fit_s']:8.2f}" if row['fit_s'] is not None else "     n/a"
+                print(f"{detector:18s} | n={n:>7,} | batch={row['batch']:>5} | fit {fit} s | "
+                      f"{row['msgs_per_s']:>12,.0f} msg/s | p50 {row['p50_ms']:8.3f} ms | "
+                      f"p99 {row['p99_ms']:8.3f} ms | RSS {row['peak_rss_mb']:7.1f} MB")
+            results.extend(rows)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(), "numpy": np.__version__, "sklearn": sklearn.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float, p99_tolerance: float,
+            abs_ms: float = 1.0, abs_fit_s: float = 0.25, abs_rss_mb: float = 32.0) -> list:
+    """
+    Regressions vs the baseline: throughput, p50 latency, fit time or peak RSS worse than `tolerance`.
+    Tail latency is noisier on shared hosts and gets its own, wider `p99_tolerance`.
+    A metric must also be worse by an absolute floor (`abs_ms` per batch for latency and throughput,
+    `abs_fit_s`, `abs_rss_mb`), so relative noise on tiny values does not count as a regression.
+    """
+    key = lambda r: (r["detector"], r["n_train"], r["batch"])
+    reference = {key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for row in report["results"]:
+        base = reference.get(key(row))
+        if base is None:
+            continue
+        batch_ms = lambda r: r["batch"] * 1000.0 / r["msgs_per_s"]
+        checks = [("msgs_per_s", row["msgs_per_s"] < base["msgs_per_s"] * (1 - tolerance)
+                   and batch_ms(row) - batch_ms(base) > abs_ms),
+                  ("p50_ms", row["p50_ms"] > base["p50_ms"] * (1 + tolerance)
+                   and row["p50_ms"] - base["p50_ms"] > abs_ms),
+                  ("p99_ms", row["p99_ms"] > base["p99_ms"] * (1 + p99_tolerance)
+                   and row["p99_ms"] - base["p99_ms"] > abs_ms),
+                  ("peak_rss_mb", row["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)
+                   and row["peak_rss_mb"] - base["peak_rss_mb"] > abs_rss_mb)]
+        if row["fit_s"] is not None and base.get("fit_s") is not None:
+            checks.append(("fit_s", row["fit_s"] > base["fit_s"] * (1 + tolerance)
+                           and row["fit_s"] - base["fit_s"] > abs_fit_s))
+        for metric, worse in checks:
+            if worse:
+                regressions.append(f"{key(row)} {metric}: {base[metric]:.4g} -> {row[metric]:.4g}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fit time, throughput, p50/p99 latency and peak RSS per detector')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--detectors', nargs='+', choices=DETECTORS, default=list(DETECTORS))
+    parser.add_argument('--sizes', type=int, nargs='+', help='Training set sizes (overrides preset)')
+    parser.add_argument('--batches', type=int, nargs='+', help='Scoring batch sizes (overrides preset)')
+    parser.add_argument('--output', type=str, default='detector_benchmark.json', help='JSON report path')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative degradation vs baseline')
+    parser.add_argument('--p99-tolerance', type=float, default=2.0, help='Allowed relative p99 degradation vs baseline')
+    parser.add_argument('--abs-ms', type=float, default=1.0, help='Ignore latency/throughput changes below this many ms per batch')
+    parser.add_argument('--abs-fit-s', type=float, default=0.25, help='Ignore fit time changes below this many seconds')
+    parser.add_argument('--abs-rss-mb', type=float, default=32.0, help='Ignore peak RSS changes below this many MB')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    print("\n" + "=" * 110)
+    print("   DETECTOR BENCHMARK SUITE (ADS-B / ARINC 429 / LSTM AUTOENCODER)   ")
+    print("=" * 110)
+    report = run_suite(args.detectors, args.sizes or preset["sizes"], args.batches or preset["batches"], preset["repeats"])
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.p99_tolerance,
+                                  args.abs_ms, args.abs_fit_s, args.abs_rss_mb)
+        if regressions:
+            print(f"\n[REGRESSION] {len(regressions)} metric(s) worse than baseline by > {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"No regressions vs baseline ({args.baseline}, tolerance {args.tolerance:.0%}).")
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one.")
@@ -0,0 +1,109 @@
+import sys
+import os
+import re
+import json
+import argparse
+import subprocess
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(ROOT, 'src')
+
+# Core modules loaded at container / edge-node start: (cumulative import budget in ms,
+# heavy packages that must not be pulled in by importing the module).
+HEAVY = ('matplotlib', 'seaborn', 'tensorflow', 'google.genai', 'google.cloud')
+BUDGETS = {
+    'ita_aero_sec.utils.logger':           (50, HEAVY),
+    'ita_aero_sec.sensors.records':        (300, HEAVY),
+    'ita_aero_sec.sensors.adsb':           (300, HEAVY),
+    'ita_aero_sec.ai.numpy_lstm':          (300, HEAVY),
+    'ita_aero_sec.ai.deep_detection':      (300, HEAVY),
+    'ita_aero_sec.ai.kinematic_features':  (300, HEAVY),
+    'adsb_spoofing':                       (2500, HEAVY),
+    'avionics_anomaly':                    (2500, HEAVY),
+    'vertex_adk_agent':                    (50, HEAVY),
+    'agent_cloud_engine':                  (600, HEAVY),
+    'src.gear_gemini_agent':               (300, HEAVY),
+}
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+_PROBE = ("import json, sys; __import__(sys.argv[1]); "
+          "print(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in {h.split('.')[0] for h in sys.argv[2:]})))")
+
+
+def measure(module: str, forbidden) -> dict:
+    """Imports `module` in a fresh interpreter under -X importtime."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC, ROOT, os.environ.get('PYTHONPATH', '')]))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE, module, *forbidden],
+                          capture_output=True, text=True, cwd=ROOT, env=env)
+    if proc.returncode != 0:
+        missing = re.search(r"No module named '([^']+)'", proc.stderr)
+        return {'module': module, 'error': f"missing dependency {missing.group(1)}" if missing else
+                proc.stderr.strip().splitlines()[-1], 'skipped': bool(missing)}
+
+    # Children are listed before their parent, two columns deeper.
+    lines = [(int(cum_us), len(indent), name) for _, cum_us, indent, name in _LINE.findall(proc.stderr)]
+    cumulative, children = None, []
+    for i, (cum_us, depth, name) in enumerate(lines):
+        if name == module:
+            cumulative = cum_us
+            for child_us, child_depth, child in reversed(lines[:i]):
+                if child_depth <= depth:
+                    break
+                if child_depth == depth + 2:
+                    children.append((child_us, child))
+            break
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    violations = [m for m in loaded if any(m == h or m.startswith(h + '.') for h in forbidden)]
+    return {'module': module, 'ms': (cumulative or 0) / 1000.0, 'forbidden_loaded': violations,
+            'heaviest': [(name, us / 1000.0) for us, name in sorted(children, reverse=True)[:5]]}
+
+
+def run(modules, repeat: int, scale: float) -> Tuple[int, List[dict]]:
+    """Measures each module; returns (number of failures, per-module results)."""
+    print("\n" + "=" * 78)
+    print("   IMPORT-TIME BUDGET REPORT (python -X importtime, best of %d)   " % repeat)
+    print("=" * 78)
+    failures, skipped, results = 0, 0, []
+    for module in modules:
+        budget_ms, forbidden = BUDGETS[module]
+        runs = [measure(module, forbidden) for _ in range(repeat)]
+        if 'error' in runs[0]:
+            status = "SKIP" if runs[0]['skipped'] else "FAIL"
+            failures += status == "FAIL"
+            skipped += status == "SKIP"
+            print(f"[{status}] {module:36s} {runs[0]['error']}")
+            results.append(runs[0])
+            continue
+        best = min(runs, key=lambda r: r['ms'])
+        over = best['ms'] > budget_ms * scale
+        status = "FAIL" if over or best['forbidden_loaded'] else " OK "
+        failures += status == "FAIL"
+        print(f"[{status}] {module:36s} {best['ms']:8.1f} ms / budget {budget_ms * scale:7.0f} ms")
+        if best['forbidden_loaded']:
+            print(f"         eagerly loads: {', '.join(best['forbidden_loaded'][:6])}")
+        if over:
+            print("         heaviest: " + ", ".join(f"{n} {ms:.0f} ms" for n, ms in best['heaviest']))
+        results.append(dict(best, budget_ms=budget_ms * scale))
+    print("-" * 78)
+    print(f"{len(modules) - failures - skipped}/{len(modules) - skipped} measured modules within budget"
+          + (f" | {skipped} skipped (missing dependencies)" if skipped else ""))
+    return failures, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fail when core module import time exceeds its budget')
+    parser.add_argument('modules', nargs='*', help='Modules to check (default: all budgeted modules)')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh-interpreter runs per module (best is kept)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for all budgets (slow CI hosts)')
+    parser.add_argument('--json', type=str, default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    unknown = [m for m in args.modules if m not in BUDGETS]
+    if unknown:
+        parser.error(f"No budget defined for: {', '.join(unknown)}")
+    failures, results = run(args.modules or list(BUDGETS), args.repeat, args.scale)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failures else 0)
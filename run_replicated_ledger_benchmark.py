@@ -0,0 +1,86 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+from src.gear_replicated_ledger import LocalCluster, LedgerClient
+
+
+async def _drive(cluster, requests: int, batch: int, window: int, kill_leader_at: int):
+    """Keeps `window` batches in flight; optionally SIGKILLs the leader midway."""
+    async with LedgerClient(cluster.addresses, timeout=30.0) as client:
+        await client.wait_for_leader()
+        await client.append([{"forensic_hash": "warmup"}])
+        latencies, issued = [], 0
+        failover_s = None
+
+        async def worker():
+            nonlocal issued, failover_s
+            while issued < requests:
+                n = issued
+                issued += 1
+                if n == kill_leader_at and client.leader is not None:
+                    cluster.kill(client.leader)
+                    killed_at = time.perf_counter()
+                    result = await client.append([{"forensic_hash": f"{n:08x}{i:056x}"} for i in range(batch)])
+                    failover_s = time.perf_counter() - killed_at
+                else:
+                    result = await client.append([{"forensic_hash": f"{n:08x}{i:056x}"} for i in range(batch)])
+                latencies.append(result["latency_s"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(window)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "anchors_per_s": requests * batch / elapsed,
+        "commits_per_s": requests / elapsed,
+        "latency_p50_ms": 1000 * statistics.median(latencies),
+        "latency_p99_ms": 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "failover_s": failover_s,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Commit throughput/latency of the replicated GEAR ledger '
+                                                 'as the node count grows (local processes over localhost TCP)')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 3, 5], help='Cluster sizes to measure')
+    parser.add_argument('--requests', type=int, default=2000, help='Client batches per run')
+    parser.add_argument('--batch', type=int, default=16, help='Anchors per client batch (one block each)')
+    parser.add_argument('--window', type=int, default=32, help='Client batches in flight')
+    parser.add_argument('--fsync', action='store_true', help='fsync the replicated log on every append')
+    parser.add_argument('--kill-leader', action='store_true', help='SIGKILL the leader halfway through each run')
+    parser.add_argument('--json', type=str, default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 78)
+    print("   GEAR REPLICATED LEDGER - COMMIT THROUGHPUT / LATENCY VS NODE COUNT   ")
+    print("=" * 78)
+    print(f"{args.requests} batches x {args.batch} anchors | window {args.window} | "
+          f"fsync {'on' if args.fsync else 'off'} | {os.cpu_count()} CPU(s)")
+    results = []
+    for n in args.nodes:
+        with tempfile.TemporaryDirectory(prefix="gear_raft_") as base_dir:
+            with LocalCluster(n, base_dir, fsync=args.fsync) as cluster:
+                kill_at = args.requests // 2 if args.kill_leader and n > 2 else -1
+                r = asyncio.run(_drive(cluster, args.requests, args.batch, args.window, kill_at))
+        r["nodes"] = n
+        results.append(r)
+        failover = f" | failover {r['failover_s']:.2f} s" if r['failover_s'] is not None else ""
+        print(f"[{n} node{'s' if n > 1 else ' '}] {r['anchors_per_s']:>9,.0f} anchors/s | "
+              f"{r['commits_per_s']:>7,.0f} commits/s | p50 {r['latency_p50_ms']:6.1f} ms | "
+              f"p99 {r['latency_p99_ms']:6.1f} ms{failover}")
+    print("-" * 78)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,23 +16,37 @@ Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
 ======================================================================
 """
 
-import socket
+import os
+import sys
 import time
 import json
+import asyncio
 import hashlib
-import threading
+import numpy as np
 
 # Import the TRL-6 Cloud Bridge
 from integration_edge_vertex import ingest_to_bigquery, trigger_vertex_ai_analysis
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+from ita_aero_sec.sensors.sbs1 import SBS1StreamReader
+
+# Physical envelope used to flag impossible SBS-1 kinematics
+MAX_ALTITUDE_FT = 60000
+MAX_GROUND_SPEED_KT = 1000
+MAX_VERTICAL_RATE_FPM = 30000
+
 class SDR_ADS_B_Listener:
-    def __init__(self, host='127.0.0.1', port=30003):
+    def __init__(self, host='127.0.0.1', port=30003, receivers=None, max_batches=5, batch_size=300):
         """
         Connects to a local dump1090 instance feeding live SDR data
         via SBS-1 BaseStation format over TCP Port 30003.
+        Additional receivers can be given as a list of (host, port) tuples.
         """
         self.host = host
         self.port = port
+        self.receivers = receivers or [(host, port)]
+        self.max_batches = max_batches
+        self.batch_size = batch_size
         self.running = False
         self.anomaly_buffer = []
 
@@ -41,15 +55,65 @@ class SDR_ADS_B_Listener:
         print(f"\n[TRL-7 SDR NODE] Attempting to bind to SDR Hardware at {self.host}:{self.port}...")
         
         try:
-            # We would normally do:
-            # s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # s.connect((self.host, self.port))
-            print("[TRL-7 SDR NODE] Hardware integration pipeline established. Awaiting Live Telemetry.")
-            self._simulate_live_stream_processing()
-        except ConnectionRefusedError:
+            connected = asyncio.run(self._listen_live())
+        except KeyboardInterrupt:
+            self.running = False
+            return
+        if not connected:
             print("[ERROR] No SDR Hardware detected on port 30003. Engaging Fallback Simulation Stream.")
             self._simulate_live_stream_processing()
 
+    async def _listen_live(self):
+        """
+        Consumes real SBS-1 batches from every configured dump1090 receiver.
+        Returns False when the primary receiver refuses the initial probe (no dongle attached);
+        errors once the live pipeline is up propagate to the caller.
+        """
+        # Probe the primary receiver once so a missing dongle falls back to simulation
+        try:
+            _, probe = await asyncio.open_connection(*self.receivers[0])
+        except OSError:
+            return False
+        probe.close()
+        print("[TRL-7 SDR NODE] Hardware integration pipeline established. Awaiting Live Telemetry.")
+
+        reader = SBS1StreamReader(self.receivers, batch_size=self.batch_size, batch_timeout=2.0)
+        await reader.start()
+        cycle = 0
+        try:
+            async for batch in reader.iter_batches():
+                cycle += 1
+                self._process_live_batch(cycle, batch)
+                if cycle >= self.max_batches or not self.running:
+                    break
+        finally:
+            await reader.stop()
+
+        print("\n[HITL CLOSING] Batch complete. Requesting Vertex AI Tactical Sweep...")
+        if self.anomaly_buffer:
+             trigger_vertex_ai_analysis(self.anomaly_buffer)
+        return True
+
+    def _process_live_batch(self, cycle, batch):
+        """Flags physically impossible kinematics in one SBS-1 batch and hands it off to GCP."""
+        print(f"\n[HITL TCP INGEST] Processing Live Airwave Batch #{cycle} ({len(batch)} packets)")
+
+        impossible = ((batch['altitude'] > MAX_ALTITUDE_FT)
+                      | (batch['ground_speed'] > MAX_GROUND_SPEED_KT)
+                      | (np.abs(batch['vertical_rate']) > MAX_VERTICAL_RATE_FPM))
+        anomalous_adsb = int(np.count_nonzero(impossible))
+        bus_injections = 0 # No avionics bus data over 1090Mhz
+
+        # --- LGPD SECURE HASHING PROTOCOL --- (ICAO addresses never leave the node)
+        forensic_payload = json.dumps({"batch": cycle, "adsb_alerts": anomalous_adsb})
+        custody_hash = hashlib.sha256(forensic_payload.encode('utf-8')).hexdigest()[:24]
+
+        print(f"[ML THREAT ENGINE] Flagged {anomalous_adsb} kinematic/spoofing anomalies.")
+        ingest_to_bigquery(cycle, anomalous_adsb, bus_injections, custody_hash)
+
+        if anomalous_adsb > 0:
+            self.anomaly_buffer.append({"cycle": cycle, "adsb_alerts": anomalous_adsb})
+
     def _simulate_live_stream_processing(self):
         """
         Processes 'live' BaseStation format strings as if they just arrived 
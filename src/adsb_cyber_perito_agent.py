@@ -1,7 +1,8 @@
 import os
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.gear_adk_base import GEARBaseAgent
+from src.gear_message_bus import ANOMALY, MessageBus
 from src.gear_gemini_agent import GeminiReasoningAgent
 from src.gear_mitigation_agent import GEARMitigationAgent
 from src.gear_blockchain_agent import GEARBlockchainAgent
@@ -24,11 +25,8 @@ class ADSBCyberPeritoAgent(GEARBaseAgent):
         
         self.log(f"Full Swarm Ecosystem: [PERITO + ARINC_HIL + GEMINI + MITIGATOR + BLOCKCHAIN + C2]. TRL-9.", "INFO")
 
-    def process(self, telemetry_packet: Dict[str, Any], bus_data: Dict[str, float] = None):
-        """
-        Executes the autonomous HIL-detection-reasoning-mitigation workflow.
-        """
-        # STEP 01: MONITORING (HIL Cross-Consistency)
+    def _detect(self, telemetry_packet: Dict[str, Any], bus_data: Dict[str, float] = None) -> Optional[Dict[str, Any]]:
+        """STEP 01: monitoring. Returns the forensic context of an anomaly, None for clean traffic."""
         self.log(f"Monitoring ADS-B Sector: ICAO {telemetry_packet.get('icao', 'UNKNOWN')}", "INFO")
         
         is_hil_conflict = False
@@ -40,51 +38,69 @@ class ADSBCyberPeritoAgent(GEARBaseAgent):
         
         # Simulating anomaly trigger (ML + HIL Conflict)
         is_anomaly = telemetry_packet.get("alt", 0) > 60000 or is_hil_conflict
+        if not is_anomaly:
+            return None
+
+        label = "HIL_CONSISTENCY_FAILURE" if is_hil_conflict else "PHYSICAL_ANOMALY"
+        self.log(f"HIGH ALERT - {label} at ICAO {telemetry_packet.get('icao')}", "WARN")
+        # Combining telemetry + bus data for Gemini to analyze
+        return {
+            "telemetry": telemetry_packet,
+            "arinc_labels": bus_data,
+            "status": label
+        }
+
+    def process(self, telemetry_packet: Dict[str, Any], bus_data: Dict[str, float] = None):
+        """
+        Executes the autonomous HIL-detection-reasoning-mitigation workflow.
+        """
+        forensic_context = self._detect(telemetry_packet, bus_data)
+        if forensic_context is None:
+            return None
+
+        # STEP 02: REASONING (Gemini AI Layer)
+        reasoning = self.reasoner.process(forensic_context)
+        self.log(f"Gemini Forensic Reasoning: {reasoning}", "INFO")
+        
+        # STEP 03: MITIGATION (Active Defense Shield)
+        mitigation_id = None
+        if self.mitigator.requires_neutralization(reasoning):
+            mitigation_id = self.mitigator.execute_neutralization(
+                telemetry_packet.get('icao'), 
+                reasoning
+            )
+            self.log(f"Threat Neutralized via Swarm Logic (Action ID: {mitigation_id})", "SUCCESS")
+        
+        # STEP 04: EVIDENCE PRESERVATION (MPSP/BLOCKCHAIN Standard)
+        evidence = self.mitigator.build_evidence(forensic_context, reasoning, mitigation_id)
+        self.seal_forensic_evidence(evidence)
+        
+        # STEP 05: DECENTRALIZED ANCHORING (Blockchain)
+        blockchain_tx = self.ledger.process(evidence)
+        self.log(f"EVIDENCE ANCHORED IN BLOCKCHAIN (TX: {blockchain_tx[:16]}...)", "SUCCESS")
         
-        if is_anomaly:
-            label = "HIL_CONSISTENCY_FAILURE" if is_hil_conflict else "PHYSICAL_ANOMALY"
-            self.log(f"HIGH ALERT - {label} at ICAO {telemetry_packet.get('icao')}", "WARN")
-            
-            # STEP 02: REASONING (Gemini AI Layer)
-            # Combining telemetry + bus data for Gemini to analyze
-            forensic_context = {
-                "telemetry": telemetry_packet,
-                "arinc_labels": bus_data,
-                "status": label
-            }
-            reasoning = self.reasoner.process(forensic_context)
-            self.log(f"Gemini Forensic Reasoning: {reasoning}", "INFO")
-            
-            # STEP 03: MITIGATION (Active Defense Shield)
-            if "neutralize" in reasoning.lower() or "spoofing" in reasoning.lower() or "incongruity" in reasoning.lower():
-                mitigation_id = self.mitigator.execute_neutralization(
-                    telemetry_packet.get('icao'), 
-                    reasoning
-                )
-                self.log(f"Threat Neutralized via Swarm Logic (Action ID: {mitigation_id})", "SUCCESS")
-            
-            # STEP 04: EVIDENCE PRESERVATION (MPSP/BLOCKCHAIN Standard)
-            evidence = {
-                "telemetry": telemetry_packet,
-                "bus_data": bus_data,
-                "reasoning": reasoning,
-                "mitigation_id": mitigation_id if 'mitigation_id' in locals() else None,
-                "forensic_expert": "Ramon Mendes (MPSP 9830)",
-                "forensic_hash": hash(str(telemetry_packet))
-            }
-            self.seal_forensic_evidence(evidence)
-            
-            # STEP 05: DECENTRALIZED ANCHORING (Blockchain)
-            blockchain_tx = self.ledger.process(evidence)
-            self.log(f"EVIDENCE ANCHORED IN BLOCKCHAIN (TX: {blockchain_tx[:16]}...)", "SUCCESS")
-            
-            # STEP 06: STRATEGIC COMMAND & CONTROL (Escalation)
-            briefing = self.command_node.process(evidence)
-            self.log(f"STRATEGIC MISSION BRIEFING PREPARED (ID: {briefing['mission_id']})", "INFO")
-            
-            return evidence
+        # STEP 06: STRATEGIC COMMAND & CONTROL (Escalation)
+        briefing = self.command_node.process(evidence)
+        self.log(f"STRATEGIC MISSION BRIEFING PREPARED (ID: {briefing['mission_id']})", "INFO")
         
-        return None
+        return evidence
+
+    def attach(self, bus: MessageBus):
+        """Wires the swarm to a message bus: steps 02-06 run in the subscribers."""
+        self.bus = bus
+        for agent in (self.reasoner, self.mitigator, self.ledger, self.command_node):
+            agent.attach(bus)
+        return self
+
+    async def process_async(self, telemetry_packet: Dict[str, Any], bus_data: Dict[str, float] = None):
+        """
+        Detection only: an anomaly is published on ANOMALY and the call returns without
+        waiting for reasoning, mitigation or anchoring. Requires attach(bus).
+        """
+        forensic_context = self._detect(telemetry_packet, bus_data)
+        if forensic_context is None:
+            return None
+        return await self.bus.publish(ANOMALY, forensic_context, self.agent_id)
 
 if __name__ == "__main__":
     # Teste rápido do agente
@@ -22,12 +22,15 @@ Author: Eng. Ramon Mendes (CREA-SP)
 import numpy as np
 import pandas as pd
 import hashlib
+import joblib
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report
-import matplotlib.pyplot as plt
-import seaborn as sns
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -108,20 +111,22 @@ class ADSBSpoofingDetector:
             
         return mapped_preds
         
-    def plot_results(self, data: pd.DataFrame, preds: np.ndarray, filename: str = 'adsb_detection_result.png') -> None:
-        """Visualizes the kinematic boundaries separating real and phantom aircraft."""
-        plt.figure(figsize=(10, 6))
-        data['pred_label'] = preds
-        
-        sns.scatterplot(
-            data=data, 
-            x='velocity_delta', 
-            y='altitude_delta', 
-            hue='pred_label', 
-            palette={0: '#00e5ff', 1: '#ff1744'}, # High contrast colors for accessibility (WCAG)
-            style='label'
-        )
-        
+    def plot_results(self, data: pd.DataFrame, preds: np.ndarray, filename: str = 'adsb_detection_result.png',
+                     bins: int = 200, max_anomaly_points: int = 2000) -> None:
+        """
+        Visualizes the kinematic boundaries separating real and phantom aircraft.
+        Samples are binned into per-label density images with only a capped sample of
+        anomalies drawn as markers, so a full day of traffic renders in constant time and memory.
+        """
+        # Plotting stack is loaded on first use only: it dominates this module's import time.
+        import matplotlib.pyplot as plt
+        from ita_aero_sec.utils.density_plot import plot_density
+        fig, ax = plt.subplots(figsize=(10, 6))
+        plot_density(ax, data['velocity_delta'], data['altitude_delta'], np.asarray(preds),
+                     data['label'] if 'label' in data else None, bins=bins,
+                     max_anomaly_points=max_anomaly_points,
+                     palette={0: '#00e5ff', 1: '#ff1744'})  # High contrast colors for accessibility (WCAG)
+
         plt.title('ADS-B DO-260B Security Validation: Envelope Defense')
         plt.xlabel('Kinematic Velocity Transform (knots/s)')
         plt.ylabel('Kinematic Altitude Transform (ft/s)')
@@ -130,16 +135,141 @@ class ADSBSpoofingDetector:
         plt.text(50, 600, 'Impossible Flight Envelope Limits (TCAS Filter)', color='#ff1744')
         
         plt.savefig(filename)
+        plt.close(fig)
         logging.info(f"Detection visualization exported to {filename}")
 
+class ADSBInferenceEngine:
+    """
+    Hot-path scorer for ADS-B feature vectors. Loads the `--train` artifact once and works on raw
+    float32 arrays (columns ordered as `features`): no pandas, printing or reports per call.
+    With `compiled=True` the forest is exported to flat NumPy arrays (FlatIsolationForest), which
+    gives identical scores with far lower per-call overhead on 1-50 sample batches.
+    With `envelope=True` (default) predict_batch runs the envelope rule cascade first: physical
+    violations and clear nominals are decided by the rules and only the ambiguous rest is scored.
+    """
+
+    def __init__(self, model, scaler, features, compiled: bool = False, envelope: bool = True):
+        self.features = list(features)
+        self.compiled = compiled
+        self.swap(model, scaler)
+        self.cascade = None
+        if envelope:
+            from ita_aero_sec.ai.envelope_rules import adsb_cascade
+            self.cascade = adsb_cascade(self)
+
+    @classmethod
+    def load(cls, path: str, compiled: bool = False, envelope: bool = True) -> "ADSBInferenceEngine":
+        """Restores the model/scaler artifact written by `adsb_spoofing.py --train`."""
+        artifact = joblib.load(path)
+        logging.info(f"Inference artifact loaded from {path} (trained {artifact.get('timestamp', 'n/a')}).")
+        return cls(artifact['model'], artifact['scaler'], artifact['features'], compiled=compiled, envelope=envelope)
+
+    @classmethod
+    def from_detector(cls, detector: ADSBSpoofingDetector, compiled: bool = False,
+                      envelope: bool = True) -> "ADSBInferenceEngine":
+        return cls(detector.model, detector.scaler, detector.features, compiled=compiled, envelope=envelope)
+
+    def swap(self, model, scaler) -> None:
+        """
+        Replaces the live model. The fitted scaler is folded into a per-feature affine transform and
+        published together with the model as one tuple, so concurrent scorers never see a mixed pair.
+        """
+        probe = pd.DataFrame(np.vstack([np.zeros(len(self.features)), np.ones(len(self.features))]),
+                             columns=self.features)
+        zero, one = scaler.transform(probe)
+        if self.compiled:
+            from ita_aero_sec.ai.flat_forest import FlatIsolationForest
+            model = FlatIsolationForest.from_sklearn(model)
+        self._state = (model, (one - zero).astype(np.float32), zero.astype(np.float32))
+
+    def score_batch(self, X: np.ndarray) -> np.ndarray:
+        """Decision scores for an (n, n_features) array. Negative = anomalous (sklearn convention)."""
+        model, weight, offset = self._state
+        X = np.asarray(X, dtype=np.float32).reshape(-1, weight.shape[0])
+        return model.decision_function(X * weight + offset)
+
+    def predict_model(self, X: np.ndarray) -> np.ndarray:
+        """Model-only binary labels for an (n, n_features) array (1 = Spoofed, 0 = Nominal)."""
+        return (self.score_batch(X) < 0).astype(np.uint8)
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """Binary labels for an (n, n_features) array (1 = Spoofed, 0 = Nominal), envelope rules first."""
+        if self.cascade is None:
+            return self.predict_model(X)
+        return self.cascade.predict_batch(np.asarray(X, dtype=np.float32).reshape(-1, len(self.features)))
+
+
+class MicroBatcher:
+    """
+    Coalesces single-packet submissions into batches for an inference engine.
+    A batch is scored when `max_batch` packets are queued or `max_delay_ms` has passed
+    since the first queued packet; each caller receives a Future with its label.
+    """
+
+    def __init__(self, engine: ADSBInferenceEngine, max_batch: int = 256, max_delay_ms: float = 2.0):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.batches_scored = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="adsb-microbatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, features) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((np.asarray(features, dtype=np.float32), future))
+        return future
+
+    def predict(self, features) -> int:
+        """Blocking convenience wrapper around submit()."""
+        return int(self.submit(features).result())
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            pending = [item]
+            deadline = time.perf_counter() + self.max_delay
+            while len(pending) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                pending.append(item)
+            try:
+                labels = self.engine.predict_batch(np.stack([x for x, _ in pending]))
+                for (_, future), label in zip(pending, labels):
+                    future.set_result(label)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+            self.batches_scored += 1
+
 import argparse
 import os
-import joblib
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ADS-B 1090ES Spoofing Detector (TRL-9)')
     parser.add_argument('--train', action='store_true', help='Train the model and save it')
     parser.add_argument('--output', type=str, default='models/latest_model.joblib', help='Output path for the trained model')
+    parser.add_argument('--infer', action='store_true', help='Load the trained artifact from --output and batch-score simulated traffic')
+    parser.add_argument('--compiled', action='store_true', help='With --infer, score through the flat-array forest evaluator')
     args = parser.parse_args()
 
     print("✈️  AEROSPACE CYBERSECURITY DO-326A VALIDATION  ✈️")
@@ -164,6 +294,14 @@ if __name__ == "__main__":
         }
         joblib.dump(model_artifact, args.output)
         logging.info(f"Model artifact saved to {args.output}")
+
+    elif args.infer:
+        engine = ADSBInferenceEngine.load(args.output, compiled=args.compiled)
+        X = df[engine.features].to_numpy(dtype=np.float32)
+        start = time.perf_counter()
+        flagged = engine.predict_batch(X)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {len(X)} messages in {elapsed * 1000:.2f} ms | {int(flagged.sum())} flagged as spoofed.")
         
     else:
         detector.train_detector(df)
@@ -6,24 +6,32 @@ import json
 import hashlib
 import time
 import os
-try:
+import importlib.util
+from functools import lru_cache
+
+# Presence check only: the SDK itself is imported by the first request, not at container start.
+HAS_GENAI = importlib.util.find_spec("google") is not None and importlib.util.find_spec("google.genai") is not None
+
+class _MockGenai:
+    class Client:
+        def __init__(self, **kwargs): self.models = self
+        def generate_content(self, **kwargs):
+            class Response:
+                def __init__(self): 
+                    self.text = "[MOCK CLOUD] Normal"
+                    self.function_calls = []
+            return Response()
+
+class _MockTypes:
+    class GenerateContentConfig:
+        def __init__(self, **kwargs): pass
+
+def _sdk():
+    if not HAS_GENAI:
+        return _MockGenai, _MockTypes
     from google import genai
     from google.genai import types
-    HAS_GENAI = True
-except ImportError:
-    HAS_GENAI = False
-    class genai:
-        class Client:
-            def __init__(self, **kwargs): self.models = self
-            def generate_content(self, **kwargs):
-                class Response:
-                    def __init__(self): 
-                        self.text = "[MOCK CLOUD] Normal"
-                        self.function_calls = []
-                return Response()
-    class types:
-        class GenerateContentConfig:
-            def __init__(self, **kwargs): pass
+    return genai, types
 
 app = Flask(__name__)
 
@@ -33,12 +41,15 @@ def block_sdr_port(mac_address: str, threat_type: str) -> str:
     hash_record = hashlib.sha256(f"BLOCKED:{mac_address}:{time.time()}".encode()).hexdigest()
     return f"SUCESSO NO BLOQUEIO: MAC {mac_address} Neutralizado. Log Militar: {hash_record}"
 
-# Autenticação implícita do Cloud Run via Service Account Default
-try:
-    client = genai.Client(vertexai=True)
-except Exception:
-    # Use simple client for non-vertex environments or locals
-    client = genai.Client()
+@lru_cache(maxsize=1)
+def get_client():
+    # Autenticação implícita do Cloud Run via Service Account Default
+    genai, _ = _sdk()
+    try:
+        return genai.Client(vertexai=True)
+    except Exception:
+        # Use simple client for non-vertex environments or locals
+        return genai.Client()
 
 system_instruction = "You are an autonomous aerospace defense agent. Analyze kinematic JSON physics. If 'kinematic_anomaly_score' > 0.85, you MUST invoke the block_sdr_port tool to physically neutralize the MAC via proxy firewalls."
 
@@ -52,7 +63,8 @@ def process_data():
     print(f"\n[INGESTION CLOUD RUN] Payload Recebido: {json.dumps(data)}")
 
     try:
-        response = client.models.generate_content(
+        _, types = _sdk()
+        response = get_client().models.generate_content(
             model='gemini-2.5-flash',
             contents=f"Analyze payload and execute tools if anomaly >0.85: {json.dumps(data)}",
             config=types.GenerateContentConfig(
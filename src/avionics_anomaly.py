@@ -13,6 +13,9 @@ Operating Speed limit) while the aircraft is configured for Mach 0.78 cruise tra
 
 Defensive Architecture:
 - Employs a One-Class SVM to delineate the nominal continuous flight regime envelope.
+  Engines: "svm" (exact RBF One-Class SVM), "nystroem" (Nystroem RBF approximation + linear
+  SGD One-Class SVM, linear in the number of words) and "sgd" (same model trained online in
+  chunks with partial_fit, bounded memory for a full day of bus traffic).
 - Parses representations of ARINC labels (e.g., Label 325 Airspeed, Label 270 Discrete Status).
 - Computational bounds applied to preserve Avionics RTOS (Real-Time OS) stability and CPU limit (70%).
 
@@ -24,6 +27,9 @@ import pandas as pd
 import hashlib
 from datetime import datetime
 from sklearn.svm import OneClassSVM
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.kernel_approximation import Nystroem
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import classification_report
 import logging
@@ -36,13 +42,34 @@ class AvionicsAnomalyDetector:
     a One-Class SVM to detect catastrophic logic bombs in the telemetry sequence.
     """
     
-    def __init__(self, contamination: float = 0.05, random_state: int = 99):
+    ENGINES = ("svm", "nystroem", "sgd")
+
+    def __init__(self, contamination: float = 0.05, random_state: int = 99, engine: str = "svm",
+                 n_components: int = 100, chunk_size: int = 100000, envelope: bool = True):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Choose from {self.ENGINES}")
         self.contamination = contamination
         self.random_state = random_state
+        self.engine = engine
+        self.n_components = n_components
+        self.chunk_size = chunk_size
         # Nu constraints bounds outlier thresholds, gamma handles non-linear RBF fitting.
-        self.model = OneClassSVM(nu=self.contamination, kernel="rbf", gamma=0.1)
+        if engine == "svm":
+            self.model = OneClassSVM(nu=self.contamination, kernel="rbf", gamma=0.1)
+        else:
+            # Same RBF kernel, approximated by an explicit feature map so the one-class model is linear.
+            self.model = Pipeline([
+                ("kernel", Nystroem(kernel="rbf", gamma=0.1, n_components=n_components, random_state=random_state)),
+                ("ocsvm", SGDOneClassSVM(nu=self.contamination, random_state=random_state)),
+            ])
         self.scaler = MinMaxScaler()
         self.features = ['airspeed', 'altitude', 'gear_status']
+        self._live = (self.model, self.scaler)
+        # Envelope rules (gear DOWN above VLO, nominal cruise) decide before the SVM is consulted.
+        self.cascade = None
+        if envelope:
+            from ita_aero_sec.ai.envelope_rules import avionics_cascade
+            self.cascade = avionics_cascade(self)
 
     def simulate_arinc_bus(self, n_samples: int = 2000) -> pd.DataFrame:
         """Simulates 32-bit ARINC 429 data words modeling cruise constraints and malware injections."""
@@ -72,19 +99,62 @@ class AvionicsAnomalyDetector:
         logging.info(f"Simulated {len(data)} ARINC 429 words (Injected {n_anom} LRU payload anomalies).")
         return data
 
-    def train_detector(self, data: pd.DataFrame) -> None:
+    def train_detector(self, data: pd.DataFrame, epochs: int = 5) -> None:
         """Trains One-Class SVM leveraging hardware-safe single-thread processing."""
-        X_scaled = self.scaler.fit_transform(data[self.features])
-        self.model.fit(X_scaled)
-        logging.info("One-Class SVM context-envelope model trained successfully.")
+        if self.engine == "sgd":
+            self.scaler.fit(data[self.features])
+            for epoch in range(epochs):
+                self.partial_fit(data.sample(frac=1, random_state=self.random_state + epoch))
+        else:
+            X_scaled = self.scaler.fit_transform(data[self.features])
+            self.model.fit(X_scaled)
+        logging.info(f"One-Class SVM context-envelope model trained successfully (engine={self.engine}).")
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """
+        Online update for the "sgd" engine, processed in `chunk_size` slices.
+        The first call fixes the scaler and the Nystroem feature map; later calls only move
+        the linear one-class boundary, so the feature space stays stable between updates.
+        """
+        if self.engine != "sgd":
+            raise ValueError(f"partial_fit requires engine='sgd' (current: '{self.engine}')")
+        kernel, ocsvm = self.model.named_steps["kernel"], self.model.named_steps["ocsvm"]
+        if not hasattr(self.scaler, "n_samples_seen_"):
+            self.scaler.fit(data[self.features])
+        if not hasattr(kernel, "components_"):
+            kernel.fit(self.scaler.transform(data[self.features].iloc[:self.chunk_size]))
+        for start in range(0, len(data), self.chunk_size):
+            X = self.scaler.transform(data[self.features].iloc[start:start + self.chunk_size])
+            ocsvm.partial_fit(kernel.transform(X))
+
+    def _predict(self, model, scaler, X: pd.DataFrame) -> np.ndarray:
+        """Model predictions (-1 / 1), in chunks so approximate engines keep bounded memory."""
+        if self.engine == "svm":
+            return model.predict(scaler.transform(X))
+        return np.concatenate([model.predict(scaler.transform(X.iloc[i:i + self.chunk_size]))
+                               for i in range(0, len(X), self.chunk_size)] or [np.empty(0, dtype=int)])
+
+    def swap(self, model, scaler) -> None:
+        """Publishes a refitted (model, scaler) pair for predict_batch() in a single assignment."""
+        self._live = (model, scaler)
+        self.model, self.scaler = model, scaler
+
+    def predict_model(self, X: np.ndarray) -> np.ndarray:
+        """Model-only threat flags (1 = injection) for an (n, 3) array ordered as `features`."""
+        model, scaler = self._live
+        X = pd.DataFrame(np.asarray(X, dtype=np.float64).reshape(-1, len(self.features)), columns=self.features)
+        return np.where(self._predict(model, scaler, X) == -1, 1, 0)
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """Threat flags (1 = injection) for an (n, 3) array ordered as `features`, envelope rules first."""
+        if self.cascade is None:
+            return self.predict_model(X)
+        return self.cascade.predict_batch(np.asarray(X, dtype=np.float64).reshape(-1, len(self.features)))
 
     def evaluate(self, data: pd.DataFrame) -> None:
         """Executes telemetry sequence scanning, comparing payloads to flight profiles."""
-        X_test = self.scaler.transform(data[self.features])
-        preds = self.model.predict(X_test)
-        
         # SVM Output: -1 = Anomaly, 1 = Nominal. Re-mapped to Threat Flagging.
-        mapped_preds = np.where(preds == -1, 1, 0)
+        mapped_preds = self.predict_batch(data[self.features].to_numpy())
         
         print("\n--- ARINC 429 Intrusion Detection Report ---")
         print(classification_report(data['label'], mapped_preds, target_names=['Nominal Telemetry', 'Logic Bomb Injection']))
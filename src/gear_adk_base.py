@@ -3,6 +3,7 @@ import abc
 from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from src.gear_log_sink import LOG_HISTORY_SIZE, LogRing, LogSink, get_sink
 
 class AgentMessage(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
@@ -15,21 +16,29 @@ class GEARBaseAgent(abc.ABC):
     """
     Base class for GEAR Agent Development Kit (ADK).
     Supports autonomous monitoring, logging, and collaboration.
+
+    log_history keeps the last `history_size` entries; output goes through
+    `sink` (the shared background LogSink by default) instead of print.
     """
-    def __init__(self, agent_id: str):
+    def __init__(self, agent_id: str, history_size: int = LOG_HISTORY_SIZE, sink: Optional[LogSink] = None):
         self.agent_id = agent_id
-        self.log_history = []
-        print(f"[*] GEAR Agent {self.agent_id} initialized.")
+        self.log_history = LogRing(history_size)
+        self.sink = sink
+        # Startup line goes through the sink too (not kept in log_history).
+        (self.sink or get_sink()).submit(self._entry(f"GEAR Agent {self.agent_id} initialized.", "INFO"))
 
-    def log(self, message: str, level: str = "INFO"):
-        entry = {
+    def _entry(self, message: str, level: str) -> Dict[str, Any]:
+        return {
             "timestamp": datetime.now().isoformat(),
             "agent": self.agent_id,
             "level": level,
             "message": message
         }
+
+    def log(self, message: str, level: str = "INFO"):
+        entry = self._entry(message, level)
         self.log_history.append(entry)
-        print(f"[{level}] {message}")
+        (self.sink or get_sink()).submit(entry)
 
     @abc.abstractmethod
     def process(self, data: Any):
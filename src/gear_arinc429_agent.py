@@ -10,7 +10,8 @@ MPSP ID: 9830 | CREA-SP 5071785098
 """
 
 from src.gear_adk_base import GEARBaseAgent
-import random
+from src.ita_aero_sec.sensors import arinc429_codec as codec
+import numpy as np
 import time
 
 class GEARArinc429Agent(GEARBaseAgent):
@@ -24,22 +25,52 @@ class GEARArinc429Agent(GEARBaseAgent):
 
     def decode_word(self, label: str, raw_value: float):
         """
-        Simulates decoding an ARINC 429 32-bit word.
+        Decodes one ARINC 429 value through the bit-accurate codec.
         Label 203: Pressure Altitude
         Label 210: True Airspeed
+        Engineering values are packed into a 32-bit word first, so the returned value carries
+        the label's BNR/BCD quantization and the state reflects parity and SSM.
+        Labels without a scaling spec come back raw with state UNKNOWN_LABEL instead of raising.
         """
-        # In a real scenario, this would involve bitwise shifts and PARITY checks.
+        try:
+            spec = codec.LABEL_SPECS.get(int(str(label), 8))
+        except ValueError:
+            spec = None     # Not an octal label (e.g. "999")
+        if spec is None:
+            self.log(f"ARINC 429 label {label} has no scaling spec; passing raw value {raw_value}.", "WARN")
+            return {
+                "label": label,
+                "value": float(raw_value),
+                "unit": "raw",
+                "state": codec.STATE_NAMES[codec.STATE_UNKNOWN_LABEL]
+            }
+        word = codec.encode_words([int(label)], [raw_value])
+        decoded = codec.decode_words(word)
         return {
             "label": label,
-            "value": raw_value,
-            "unit": "ft" if label == "203" else "knots",
-            "state": "VALID" if random.random() > 0.01 else "FAILURE"
+            "value": float(decoded["value"][0]),
+            "unit": spec.unit,
+            "state": codec.STATE_NAMES[decoded["state"][0]]
         }
 
-    def process(self, bus_data: dict):
+    def decode_capture(self, words: np.ndarray) -> dict:
         """
-        Processes a block of ARINC 429 bus data.
+        Bulk-decodes a raw bus capture (uint32 words) without per-word dictionaries.
+        Returns column arrays: label, sdi, ssm, value and state.
         """
+        decoded = codec.decode_words(words)
+        failed = int(np.count_nonzero(decoded["state"] != codec.STATE_VALID))
+        if failed:
+            self.log(f"{failed}/{len(decoded['state'])} ARINC 429 words failed parity/SSM validation.", "WARN")
+        return decoded
+
+    def process(self, bus_data):
+        """
+        Processes a block of ARINC 429 bus data: a {label: value} dict, or a uint32 array of raw words.
+        """
+        if isinstance(bus_data, np.ndarray):
+            return self.decode_capture(bus_data)
+
         results = []
         for label, val in bus_data.items():
             decoded = self.decode_word(label, val)
@@ -4,48 +4,138 @@ WE CAN FLY - GEAR PHASE 08: DECENTRALIZED LEDGER (BLOCKCHAIN)
 Ensures absolute immutability of MPSP evidence through a mock
 decentralized ledger (Hyperledger Fabric Pattern).
 
+Blocks are hash-chained: block_hash = SHA3-256 over the canonical JSON
+of the block (including prev_hash), so exported ledgers can be checked
+with run_chain_verifier.py.
+
+Evidence payloads are Merkle-batched: a block seals the root of up to
+`batch_size` payloads (or all payloads within `batch_ms`), and each
+payload has an O(log n) inclusion proof against its block's merkle_root.
+
+Blocks persist in a LedgerStore (append-only segments + SQLite index +
+Bloom filter) under `store_dir`, so the ledger survives restarts and
+memory stays constant; without `store_dir` a temporary store is used
+and removed when the agent goes away.
+
 Author: Eng. Ramon Mendes (Specialist & Forensic Expert)
 MPSP ID: 9830 | CREA-SP 5071785098
 """
 
 from src.gear_adk_base import GEARBaseAgent
+from src.gear_ledger_store import LedgerStore, LedgerView
+from src.gear_message_bus import EVIDENCE, deliver_each
+from src.ita_aero_sec.ai.merkle import MerkleAccumulator, MerkleTree, leaf_hash, verify_proof
+from typing import Optional
+import shutil
+import tempfile
+import threading
+import weakref
 import hashlib
 import time
 import json
 
+GENESIS_HASH = "0" * 64
+LEAF_ALGORITHM = "sha3_256"
+
 class GEARBlockchainAgent(GEARBaseAgent):
     """
     Simulates a blockchain validator that anchors forensic
     hashes into a decentralized ledger.
     """
-    def __init__(self, agent_id: str = "BLOCKCHAIN_LEDGER_NODE"):
+    def __init__(self, agent_id: str = "BLOCKCHAIN_LEDGER_NODE", batch_size: int = 1, batch_ms: Optional[float] = None,
+                 store_dir: Optional[str] = None):
         super().__init__(agent_id)
-        self.ledger = [] # Mock of the world state
-        self.log("Hyperledger Mock Node Active. Awaiting Forensic Anchors.")
+        if store_dir is None:
+            store_dir = tempfile.mkdtemp(prefix="gear_ledger_")
+            weakref.finalize(self, shutil.rmtree, store_dir, ignore_errors=True)
+        self.store = LedgerStore(store_dir)
+        self.ledger = LedgerView(self.store) # World state, read from disk
+        last = self.store.last()
+        self.last_hash = last["block_hash"] if last else GENESIS_HASH
+        self._pending = []  # forensic hashes of the open Merkle batch, in leaf order
+        self._lock = threading.RLock()
+        self.accumulator = MerkleAccumulator(on_seal=self._commit_block, max_records=batch_size, max_delay_ms=batch_ms,
+                                             algorithm=LEAF_ALGORITHM, retain=0, lock=self._lock)
+        resumed = f" Resumed at block {len(self.ledger)}." if last else ""
+        self.log(f"Hyperledger Mock Node Active. Awaiting Forensic Anchors.{resumed}")
 
     def process(self, forensic_payload: dict):
         """
         Anchors a forensic hash into the ledger.
+        Returns the block hash once the payload's batch is sealed (immediately with
+        batch_size=1), otherwise the payload's Merkle leaf digest as its pending receipt.
         """
-        payload_str = json.dumps(forensic_payload, sort_keys=True)
-        block_hash = hashlib.sha3_256(f"{len(self.ledger)}:{payload_str}:{time.time()}".encode()).hexdigest()
-        
+        payload_str = json.dumps(forensic_payload, sort_keys=True, default=str)
+        with self._lock:
+            self._pending.append(str(forensic_payload.get("forensic_hash", "UNKNOWN")))
+            self.accumulator.add(payload_str)
+            if not self._pending:   # This payload completed the batch: its block is committed
+                return self.last_hash
+        return leaf_hash(payload_str, LEAF_ALGORITHM)
+
+    def _commit_block(self, batch):
+        """Seals one Merkle batch as a block; runs under the agent lock."""
         block = {
-            "block_index": len(self.ledger),
-            "forensic_hash": forensic_payload.get("forensic_hash", "UNKNOWN"),
-            "merkle_root": block_hash,
+            "block_index": self.store.count,
+            "merkle_root": batch.root,
+            "leaf_count": batch.size,
+            "prev_hash": self.last_hash,
             "timestamp": time.time(),
             "status": "COMMITTED"
         }
-        
-        self.ledger.append(block)
-        self.log(f"BLOCK COMMITTED: Index {block['block_index']} | Hash: {block['merkle_root'][:16]}...", "SUCCESS")
-        
-        return block["merkle_root"]
+        block["block_hash"] = hashlib.sha3_256(json.dumps(block, sort_keys=True).encode()).hexdigest()
+        self.last_hash = block["block_hash"]
+
+        leaves = [batch.tree.leaf(i) for i in range(batch.size)]
+        self.store.append(block, zip(self._pending, leaves))
+        self._pending = []
+        self.log(f"BLOCK COMMITTED: Index {block['block_index']} | {batch.size} anchors | "
+                 f"Hash: {block['block_hash'][:16]}...", "SUCCESS")
+
+    def attach(self, bus):
+        """Subscribes to EVIDENCE; each delivered batch is anchored in one pass."""
+        return bus.subscribe(EVIDENCE, self._on_evidence, name=self.agent_id)
+
+    def _on_evidence(self, messages):
+        deliver_each(self, messages, lambda message: self.process(message.content))
+
+    def flush(self):
+        """Seals pending payloads into a block now."""
+        self.accumulator.flush()
+
+    def close(self):
+        self.accumulator.close()
+        self.store.close()
 
     def verify_evidence(self, forensic_hash: str) -> bool:
-        """Verifies if a specific hash exists in the immutable ledger."""
-        for block in self.ledger:
-            if block["forensic_hash"] == forensic_hash:
-                return True
-        return False
+        """Verifies if a specific hash exists in the immutable ledger (Bloom probe + index lookup)."""
+        with self._lock:
+            return self.store.locate(forensic_hash) is not None
+
+    def inclusion_proof(self, forensic_hash: str) -> dict:
+        """O(log n) proof that the evidence is under its block's merkle_root."""
+        with self._lock:
+            location = self.store.locate(forensic_hash)
+            if location is None:
+                raise KeyError(f"Evidence {str(forensic_hash)[:16]}... is not anchored in a committed block")
+            block_index, leaf_index = location
+            tree = MerkleTree(self.store.leaves(block_index), LEAF_ALGORITHM)
+            block = self.store.get(block_index)
+        return dict(tree.proof(leaf_index), leaf=tree.leaf(leaf_index), root=block["merkle_root"],
+                    block_index=block_index, block_hash=block["block_hash"])
+
+    def verify_inclusion(self, payload: dict, proof: dict) -> bool:
+        """Checks a payload against a proof and the merkle_root recorded in the ledger."""
+        leaf = leaf_hash(json.dumps(payload, sort_keys=True, default=str), LEAF_ALGORITHM)
+        with self._lock:
+            if not 0 <= proof.get("block_index", -1) < len(self.ledger):
+                return False
+            root = self.ledger[proof["block_index"]]["merkle_root"]
+        return verify_proof(leaf, proof, root, LEAF_ALGORITHM)
+
+    def export_ledger(self, path: str) -> str:
+        """Writes the ledger as JSON lines, one block per line, for offline verification."""
+        with self._lock, open(path, "w") as f:
+            for block in self.ledger:
+                f.write(json.dumps(block) + "\n")
+        return path
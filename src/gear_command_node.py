@@ -10,6 +10,7 @@ MPSP ID: 9830 | CREA-SP 5071785098
 """
 
 from src.gear_adk_base import GEARBaseAgent
+from src.gear_message_bus import EVIDENCE, deliver_each
 import time
 import json
 
@@ -43,6 +44,14 @@ class GEARCommandNode(GEARBaseAgent):
         self.log(f"STRATEGIC ESCALATION: Briefing sent to National Defense (Alert #{self.alerts_sent}).", "WARN")
         return briefing
 
+    def attach(self, bus):
+        """Subscribes to EVIDENCE; briefings are kept in `briefings` for the dashboard."""
+        self.briefings = []
+        return bus.subscribe(EVIDENCE, self._on_evidence, name=self.agent_id)
+
+    def _on_evidence(self, messages):
+        deliver_each(self, messages, lambda message: self.briefings.append(self.process(message.content)))
+
     def get_mission_report(self):
         """Generates a summary for the TRL-9 dashboard."""
         return {
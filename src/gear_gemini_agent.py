@@ -10,21 +10,19 @@ MPSP ID: 9830 | CREA-SP 5071785098
 """
 
 import os
+import importlib.util
 import time
 import json
 import hashlib
 from datetime import datetime, timezone
 from typing import Dict, Any, List
 from .gear_adk_base import GEARBaseAgent
+from .gear_message_bus import ANOMALY, VERDICT, deliver_each
+from .ita_aero_sec.ai.merkle import MerkleTree
 from dotenv import load_dotenv
 
-HAS_REAL_SDK = False
-try:
-    from google import genai
-    from google.genai import types
-    HAS_REAL_SDK = True
-except ImportError:
-    pass
+# Presence check only: google.genai is imported when a real client is created.
+HAS_REAL_SDK = importlib.util.find_spec("google") is not None and importlib.util.find_spec("google.genai") is not None
 
 class MockGenAIClient:
     """Fallback mock to guarantee TRL-9 readiness without API keys."""
@@ -54,6 +52,7 @@ class GeminiReasoningAgent(GEARBaseAgent):
 
         if HAS_REAL_SDK and api_key:
             try:
+                from google import genai
                 self.client = genai.Client(api_key=api_key)
                 self.is_mock = False
                 self.log("Ready with Real Vertex AI / Google GenAI SDK (Ultra Mode).", "INFO")
@@ -105,9 +104,35 @@ class GeminiReasoningAgent(GEARBaseAgent):
             self.log(f"Reasoning Error during AI Audit: {e}", "CRITICAL")
             return f"FORENSIC_FAILURE_SEAL: {seal_hash} | MSG: {str(e)}"
 
-    def audit_batch(self, telemetry_block: List[Dict[str, Any]]):
-        """Mass audit for Big Data streaming ingestion (Swarm Detection)."""
-        block_hash = self.generate_forensic_hash(json.dumps(telemetry_block, sort_keys=True))
-        self.log(f"Initiating mass swarm audit of {len(telemetry_block)} records. Block Hash: {block_hash}", "STATUS")
+    def attach(self, bus, batch_max: int = 16):
+        """
+        Subscribes to ANOMALY and publishes each verdict on VERDICT. Model calls run in
+        the bus worker thread, so a slow LLM only backs up its own queue.
+        """
+        self.bus = bus
+        return bus.subscribe(ANOMALY, self._on_anomalies, name=self.agent_id, batch_max=batch_max)
+
+    def _on_anomalies(self, messages):
+        deliver_each(self, messages, self._reason_one)
+
+    def _reason_one(self, message):
+        reasoning = self.process(message.content)
+        self.bus.publish_threadsafe(VERDICT, {"context": message.content, "reasoning": reasoning}, self.agent_id)
+
+    def audit_batch(self, telemetry_block: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mass audit for Big Data streaming ingestion (Swarm Detection).
+        The block is sealed once as a Merkle root; each record keeps an O(log n)
+        inclusion proof instead of being hashed and sealed individually.
+        """
+        if not telemetry_block:
+            return {"merkle_root": None, "records": 0, "leaves": [], "proofs": []}
+        tree = MerkleTree.from_records(telemetry_block)
+        self.log(f"Initiating mass swarm audit of {len(telemetry_block)} records. Merkle Root: {tree.root}", "STATUS")
         # In future updates, this will chunk and send to Dataflow/PubSub
-        pass
+        return {
+            "merkle_root": tree.root,
+            "records": tree.size,
+            "leaves": [tree.leaf(i) for i in range(tree.size)],
+            "proofs": tree.proofs(),
+        }
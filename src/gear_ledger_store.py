@@ -0,0 +1,308 @@
+"""
+WE CAN FLY - GEAR PHASE 08: PERSISTENT LEDGER STORE
+---------------------------------------------------------------
+Append-only on-disk storage for the GEAR decentralized ledger.
+
+    segment-NNNNNN.jsonl : blocks, one JSON line each (append-only,
+                           rotated at `segment_bytes`)
+    index.sqlite         : block_index -> (segment, offset, length),
+                           forensic_hash -> (block_index, leaf_index),
+                           Merkle leaves per block (for proofs)
+    bloom.bin            : memory-mapped Bloom filter over forensic
+                           hashes (fast negative lookups); rebuilt from
+                           the index if the store was not closed cleanly,
+                           and regrown (doubled) as the key count passes
+                           its capacity
+
+The SQLite transaction is the commit point: segment bytes beyond the
+last indexed block (crash between the two writes) are truncated on
+open. Without fsync the index can also outlive segment bytes lost in
+a power failure; index rows whose block is past the segment end or
+does not read back are dropped on open. Memory stays constant as the
+ledger grows; lookups are one Bloom probe plus, for probable hits,
+one primary-key query.
+
+Author: Eng. Ramon Mendes (Specialist & Forensic Expert)
+MPSP ID: 9830 | CREA-SP 5071785098
+"""
+
+import os
+import math
+import json
+import sqlite3
+import hashlib
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+SEGMENT_BYTES = 64 << 20
+BLOOM_CAPACITY = 1_000_000
+BLOOM_FP_RATE = 0.001
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    block_index INTEGER PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL,
+    length INTEGER NOT NULL, block_hash TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS evidence (
+    forensic_hash TEXT PRIMARY KEY, block_index INTEGER NOT NULL, leaf_index INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leaves (
+    block_index INTEGER NOT NULL, leaf_index INTEGER NOT NULL, leaf TEXT NOT NULL,
+    PRIMARY KEY (block_index, leaf_index)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter in a memory-mapped bit file. Sized for `capacity` keys at
+    `fp_rate`; beyond that the false-positive rate rises but lookups stay correct
+    (a positive is always confirmed against the index). LedgerStore regrows it.
+    """
+    def __init__(self, path: str, capacity: int = BLOOM_CAPACITY, fp_rate: float = BLOOM_FP_RATE):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.bits = max(64, int(math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.path = path
+        nbytes = (self.bits + 7) // 8
+        self.fresh = not os.path.exists(path) or os.path.getsize(path) != nbytes
+        self._array = np.memmap(path, dtype=np.uint8, mode="w+" if self.fresh else "r+", shape=(nbytes,))
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self._array[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def clear(self) -> None:
+        self._array[:] = 0
+
+    def flush(self) -> None:
+        self._array.flush()
+
+
+class LedgerStore:
+    """
+    Append-only block store with a SQLite index and a Bloom filter over evidence hashes.
+
+    Args:
+        directory: Store location (created if missing); reopening resumes the ledger.
+        segment_bytes: Segment rotation size.
+        bloom_capacity: Initial Bloom filter capacity; doubled whenever the evidence count exceeds it.
+        fsync: fsync the segment after every block (otherwise on segment rotation and close).
+    """
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES, bloom_capacity: int = BLOOM_CAPACITY,
+                 bloom_fp_rate: float = BLOOM_FP_RATE, fsync: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.stats = {"lookups": 0, "bloom_negatives": 0, "bloom_false_positives": 0, "truncated_bytes": 0,
+                      "dropped_blocks": 0, "bloom_grows": 0}
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+        self._drop_lost_blocks()
+        row = self._db.execute("SELECT block_index, segment, offset, length FROM blocks "
+                               "ORDER BY block_index DESC LIMIT 1").fetchone()
+        self.count = 0 if row is None else row[0] + 1
+        self.segment, end = (0, 0) if row is None else (row[1], row[2] + row[3])
+        self._recover(end)
+        self._file = open(self._segment_path(self.segment), "ab")
+
+        self._keys = self._db.execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+        stored = self._db.execute("SELECT value FROM meta WHERE key = 'bloom_capacity'").fetchone()
+        capacity = max(bloom_capacity, int(stored[0]) if stored else 0)
+        while capacity < self._keys:
+            capacity *= 2
+        self.bloom = BloomFilter(os.path.join(directory, "bloom.bin"), capacity, bloom_fp_rate)
+        clean = self._db.execute("SELECT value FROM meta WHERE key = 'bloom_clean'").fetchone()
+        if self.bloom.fresh or clean != ("1",) or self.stats["dropped_blocks"]:
+            # A stale filter could yield false negatives, so it is rebuilt from the index.
+            self._fill_bloom(self.bloom)
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_clean', '0')")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_capacity', ?)", (str(capacity),))
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.jsonl")
+
+    def _readable(self, segment: int, offset: int, length: int, block_hash: str) -> bool:
+        path = self._segment_path(segment)
+        if not os.path.exists(path) or os.path.getsize(path) < offset + length:
+            return False
+        with open(path, "rb") as f:
+            f.seek(offset)
+            try:
+                return json.loads(f.read(length)).get("block_hash") == block_hash
+            except ValueError:
+                return False
+
+    def _drop_lost_blocks(self) -> None:
+        """
+        Drops index rows for blocks whose segment bytes did not survive (index committed,
+        segment page cache lost). Scans back from the last block until one reads back intact.
+        """
+        rows = self._db.execute("SELECT block_index, segment, offset, length, block_hash FROM blocks "
+                                "ORDER BY block_index DESC")
+        first_lost = None
+        for block_index, segment, offset, length, block_hash in rows:
+            if self._readable(segment, offset, length, block_hash):
+                break
+            first_lost = block_index
+        rows.close()
+        if first_lost is None:
+            return
+        with self._db:
+            self.stats["dropped_blocks"] += self._db.execute(
+                "DELETE FROM blocks WHERE block_index >= ?", (first_lost,)).rowcount
+            self._db.execute("DELETE FROM evidence WHERE block_index >= ?", (first_lost,))
+            self._db.execute("DELETE FROM leaves WHERE block_index >= ?", (first_lost,))
+
+    def _fill_bloom(self, bloom: BloomFilter) -> None:
+        bloom.clear()
+        for (forensic_hash,) in self._db.execute("SELECT forensic_hash FROM evidence"):
+            bloom.add(forensic_hash)
+        bloom.flush()
+
+    def _grow_bloom(self) -> None:
+        """Rebuilds the filter at twice the capacity beside the old one, then swaps the files."""
+        path = self.bloom.path
+        capacity = self.bloom.capacity
+        while capacity < self._keys:
+            capacity *= 2
+        bloom = BloomFilter(path + ".grow", capacity, self.bloom.fp_rate)
+        self._fill_bloom(bloom)
+        os.replace(bloom.path, path)
+        bloom.path = path
+        self.bloom = bloom
+        self.stats["bloom_grows"] += 1
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_capacity', ?)", (str(capacity),))
+
+    def _recover(self, end: int) -> None:
+        """Drops segment bytes (and later segments) written after the last indexed block."""
+        path = self._segment_path(self.segment)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            self.stats["truncated_bytes"] += os.path.getsize(path) - end
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        later = self.segment + 1
+        while os.path.exists(self._segment_path(later)):
+            self.stats["truncated_bytes"] += os.path.getsize(self._segment_path(later))
+            os.remove(self._segment_path(later))
+            later += 1
+
+    def append(self, block: dict, evidence: Iterable[Tuple[str, str]] = ()) -> int:
+        """
+        Appends one block with its (forensic_hash, leaf digest) pairs in leaf order.
+        Returns the block index.
+        """
+        if block.get("block_index", self.count) != self.count:
+            raise ValueError(f"block_index {block['block_index']} != next index {self.count}")
+        if self._file.tell() >= self.segment_bytes:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self.segment += 1
+            self._file = open(self._segment_path(self.segment), "ab")
+        line = (json.dumps(block) + "\n").encode()
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        evidence = [(str(fh), leaf) for fh, leaf in evidence]
+        with self._db:
+            self._db.execute("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)",
+                             (self.count, self.segment, offset, len(line), block["block_hash"]))
+            self._db.executemany("INSERT OR REPLACE INTO evidence VALUES (?, ?, ?)",
+                                 [(fh, self.count, i) for i, (fh, _) in enumerate(evidence)])
+            self._db.executemany("INSERT INTO leaves VALUES (?, ?, ?)",
+                                 [(self.count, i, leaf) for i, (_, leaf) in enumerate(evidence)])
+        for fh, _ in evidence:
+            self.bloom.add(fh)
+        self._keys += len(evidence)
+        if self._keys > self.bloom.capacity:
+            self._grow_bloom()
+        self.count += 1
+        return self.count - 1
+
+    def get(self, block_index: int) -> dict:
+        if block_index < 0:
+            block_index += self.count
+        row = self._db.execute("SELECT segment, offset, length FROM blocks WHERE block_index = ?",
+                               (block_index,)).fetchone()
+        if row is None:
+            raise IndexError(f"block {block_index} not in ledger of {self.count} blocks")
+        with open(self._segment_path(row[0]), "rb") as f:
+            f.seek(row[1])
+            return json.loads(f.read(row[2]))
+
+    def last(self) -> Optional[dict]:
+        return self.get(self.count - 1) if self.count else None
+
+    def __iter__(self) -> Iterator[dict]:
+        """Streams blocks in order, one segment line at a time."""
+        for segment in range(self.segment + 1):
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def locate(self, forensic_hash: str) -> Optional[Tuple[int, int]]:
+        """(block_index, leaf_index) of a forensic hash, None if it was never anchored."""
+        forensic_hash = str(forensic_hash)
+        self.stats["lookups"] += 1
+        if forensic_hash not in self.bloom:
+            self.stats["bloom_negatives"] += 1
+            return None
+        row = self._db.execute("SELECT block_index, leaf_index FROM evidence WHERE forensic_hash = ?",
+                               (forensic_hash,)).fetchone()
+        if row is None:
+            self.stats["bloom_false_positives"] += 1
+        return row
+
+    def leaves(self, block_index: int) -> List[str]:
+        return [leaf for (leaf,) in self._db.execute(
+            "SELECT leaf FROM leaves WHERE block_index = ? ORDER BY leaf_index", (block_index,))]
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self.bloom.flush()
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('bloom_clean', '1')")
+        self._db.close()
+
+
+class LedgerView:
+    """Read-only sequence view over a LedgerStore (len, indexing, iteration)."""
+    def __init__(self, store: LedgerStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.count
+
+    def __getitem__(self, index: int) -> dict:
+        return self._store.get(index)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._store)
+
+    def __bool__(self) -> bool:
+        return self._store.count > 0
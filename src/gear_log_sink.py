@@ -0,0 +1,285 @@
+"""
+WE CAN FLY - GEAR PHASE 08: BOUNDED AGENT LOGGING
+---------------------------------------------------------------
+Keeps swarm logging off the hot path under sustained attack traffic.
+
+    LogRing : fixed-capacity per-agent history (oldest entries are
+              overwritten); O(1) append and indexing, snapshots copy
+              at most `capacity` entries however much was logged
+    LogSink : one background writer shared by all agents; entries are
+              queued and written in batches to stdout, a text file
+              and/or a JSONL file
+
+Repetitive messages (same agent, level and text once digits are
+masked) are sampled per time window: the first `sample_after` pass,
+then one in `sample_every`; the next entry that passes carries the
+number suppressed. Counts still pending when a window is forgotten
+(or the sink closes) are written as a summary entry carrying the last
+suppressed message, so no suppression goes unreported. NEVER_SAMPLED levels always pass and are never
+dropped when the queue is full (the caller waits instead).
+
+Author: Eng. Ramon Mendes (Specialist & Forensic Expert)
+MPSP ID: 9830 | CREA-SP 5071785098
+"""
+
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG_HISTORY_SIZE = 1024
+SINK_QUEUE_SIZE = 65536
+SINK_BATCH_MAX = 512
+SINK_FLUSH_INTERVAL_S = 0.05
+NEVER_SAMPLED = frozenset({"CRITICAL", "FORENSIC", "ERROR"})
+
+_DIGITS = re.compile(r"\d+")
+_STOP = object()
+
+
+class LogRing:
+    """Fixed-capacity ring buffer of log entries, oldest first."""
+    __slots__ = ("capacity", "total", "_buf")
+
+    def __init__(self, capacity: int = LOG_HISTORY_SIZE):
+        if capacity < 1:
+            raise ValueError("LogRing capacity must be >= 1")
+        self.capacity = capacity
+        self.total = 0          # Entries ever appended
+        self._buf: List[Any] = [None] * capacity
+
+    def append(self, entry) -> None:
+        self._buf[self.total % self.capacity] = entry
+        self.total += 1
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def dropped(self) -> int:
+        """Entries overwritten since the ring filled up."""
+        return self.total - len(self)
+
+    def __getitem__(self, index: int):
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("LogRing index out of range")
+        return self._buf[(self.total - n + index) % self.capacity]
+
+    def snapshot(self) -> List[Any]:
+        """Copy of the retained entries, oldest first."""
+        if self.total <= self.capacity:
+            return self._buf[:self.total]
+        head = self.total % self.capacity
+        return self._buf[head:] + self._buf[:head]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.snapshot())
+
+    def clear(self) -> None:
+        self._buf = [None] * self.capacity
+        self.total = 0
+
+
+class LogSink:
+    """
+    Shared background log writer.
+
+    Args:
+        stdout: Write "[LEVEL] message" lines to sys.stdout.
+        path: Also append the same text lines to this file.
+        jsonl_path: Also append each entry as one JSON line.
+        sample_after: Repeats of one message passed per window before sampling starts.
+        sample_every: Past that, one repeat in this many is written (1 disables sampling).
+        window_s: Sampling window.
+        queue_size: Pending entries; when full, sampled-level entries are dropped.
+    """
+    def __init__(self, stdout: bool = True, path: Optional[str] = None, jsonl_path: Optional[str] = None,
+                 sample_after: int = 20, sample_every: int = 100, window_s: float = 1.0,
+                 queue_size: int = SINK_QUEUE_SIZE, batch_max: int = SINK_BATCH_MAX,
+                 flush_interval_s: float = SINK_FLUSH_INTERVAL_S):
+        self.stdout = stdout
+        self.sample_after = max(0, sample_after)
+        self.sample_every = max(1, sample_every)
+        self.window_s = window_s
+        self.batch_max = batch_max
+        self.flush_interval_s = flush_interval_s
+        self.stats = {"submitted": 0, "written": 0, "sampled_out": 0, "dropped": 0, "batches": 0}
+        self._text = open(path, "a", encoding="utf-8") if path else None
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._windows: Dict[tuple, list] = {}   # key -> [window start, count, suppressed, last suppressed message]
+        self._last_purge = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="gear-log-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _sample(self, entry: dict) -> Optional[dict]:
+        """Returns the entry to write (annotated with suppressed repeats) or None to skip it."""
+        if entry.get("level") in NEVER_SAMPLED or self.sample_every == 1:
+            return entry
+        key = (entry.get("agent"), entry.get("level"), _DIGITS.sub("#", str(entry.get("message"))))
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge > self.window_s:
+                # Forget keys whose window expired so distinct messages cannot grow the table forever.
+                self._enqueue_summaries(self._purge(now))
+                self._last_purge = now
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_s:
+                carried = window[2:] if window is not None else [0, None]
+                window = self._windows[key] = [now, 0] + carried
+            window[1] += 1
+            excess = window[1] - self.sample_after
+            if excess > 0 and excess % self.sample_every:
+                window[2] += 1
+                window[3] = entry.get("message")
+                self.stats["sampled_out"] += 1
+                return None
+            suppressed, window[2] = window[2], 0
+        return dict(entry, suppressed=suppressed) if suppressed else entry
+
+    def _purge(self, now: Optional[float] = None) -> List[dict]:
+        """Drops expired windows (all of them when `now` is None); returns summaries of their pending counts."""
+        summaries, kept = [], {}
+        for key, window in self._windows.items():
+            if now is not None and now - window[0] < self.window_s:
+                kept[key] = window
+            elif window[2]:
+                agent, level, _ = key
+                summaries.append({"timestamp": datetime.now().isoformat(), "agent": agent,
+                                  "level": level, "message": window[3], "suppressed": window[2], "summary": True})
+        self._windows = kept
+        return summaries
+
+    def _enqueue_summaries(self, summaries: List[dict]) -> None:
+        for summary in summaries:
+            try:
+                self._queue.put_nowait(summary)
+            except queue.Full:
+                self.stats["dropped"] += 1
+
+    def submit(self, entry: dict) -> bool:
+        """Queues one entry without blocking (except for NEVER_SAMPLED levels on a full queue)."""
+        self.stats["submitted"] += 1
+        if self._closed:
+            return False
+        entry = self._sample(entry)
+        if entry is None:
+            return False
+        try:
+            if entry.get("level") in NEVER_SAMPLED:
+                self._queue.put(entry)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    @staticmethod
+    def format(entry: dict) -> str:
+        suppressed = entry.get("suppressed")
+        tail = f" (+{suppressed} similar suppressed)" if suppressed else ""
+        return f"[{entry.get('level')}] {entry.get('message')}{tail}\n"
+
+    def _write(self, batch: List[dict]) -> None:
+        if self.stdout or self._text:
+            text = "".join(self.format(e) for e in batch)
+            if self.stdout:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            if self._text:
+                self._text.write(text)
+                self._text.flush()
+        if self._jsonl:
+            self._jsonl.write("".join(json.dumps(e, default=str) + "\n" for e in batch))
+            self._jsonl.flush()
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            batch, markers, stop = [], [], False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_max:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except (OSError, ValueError):
+                    pass   # A closed/broken stdout must not kill the writer
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Blocks until everything queued before the call is written."""
+        if self._closed:
+            return True
+        marker = threading.Event()
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            summaries = self._purge()
+        for summary in summaries:
+            self._queue.put(summary)
+        self._queue.put(_STOP)
+        self._thread.join()
+        for f in (self._text, self._jsonl):
+            if f is not None:
+                f.close()
+        atexit.unregister(self.close)
+
+
+_default_sink: Optional[LogSink] = None
+_default_lock = threading.Lock()
+
+
+def get_sink() -> LogSink:
+    """The process-wide sink shared by every agent (created on first use: stdout only)."""
+    global _default_sink
+    if _default_sink is None:
+        with _default_lock:
+            if _default_sink is None:
+                _default_sink = LogSink()
+    return _default_sink
+
+
+def configure_sink(**kwargs) -> LogSink:
+    """Replaces the shared sink (flushing the old one); takes LogSink arguments."""
+    global _default_sink
+    with _default_lock:
+        old, _default_sink = _default_sink, LogSink(**kwargs)
+    if old is not None:
+        old.close()
+    return _default_sink
@@ -0,0 +1,219 @@
+"""
+WE CAN FLY - GEAR PHASE 08: SWARM MESSAGE BUS
+---------------------------------------------------------------
+In-process asyncio pub/sub for the GEAR swarm. Agents exchange
+AgentMessage envelopes over typed topics instead of calling each
+other synchronously, so a slow subscriber (the LLM reasoner) only
+delays its own queue, not detection.
+
+    - each subscription owns a bounded queue; when it is full the
+      publisher waits ("block", backpressure) or the queue sheds
+      ("drop_oldest" / "drop_new", counted in stats)
+    - subscribers receive batches of up to `batch_max` messages
+    - coroutine handlers run on the loop; plain functions run in a
+      worker thread (asyncio.to_thread) and may publish back through
+      publish_threadsafe
+    - agent handlers go through deliver_each: one failing message is
+      logged at ERROR and counted as failed, the rest of the batch is
+      still handled
+
+Swarm flow:
+    ANOMALY  (perito)     -> GeminiReasoningAgent
+    VERDICT  (reasoner)   -> GEARMitigationAgent
+    EVIDENCE (mitigation) -> GEARBlockchainAgent, GEARCommandNode
+
+Author: Eng. Ramon Mendes (Specialist & Forensic Expert)
+MPSP ID: 9830 | CREA-SP 5071785098
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.gear_adk_base import AgentMessage
+
+QUEUE_SIZE = 1024
+BATCH_MAX = 64
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_new")
+
+
+@dataclass(frozen=True)
+class Topic:
+    name: str
+    content_type: type = dict
+
+
+ANOMALY = Topic("gear.anomaly")      # forensic context: telemetry, arinc_labels, status
+VERDICT = Topic("gear.verdict")      # {"context": ..., "reasoning": str}
+EVIDENCE = Topic("gear.evidence")    # evidence record to anchor and escalate
+
+
+class BatchError(Exception):
+    """Raised by a handler after its batch: the messages that failed, with their errors."""
+    def __init__(self, failed):
+        self.failed = failed
+        super().__init__(f"{len(failed)} message(s) failed: {failed[0][1]!r}")
+
+
+def deliver_each(agent, messages: List[AgentMessage], handle: Callable[[AgentMessage], Any]) -> None:
+    """
+    Runs handle(message) for every message of a batch. Failures are logged through the agent
+    at ERROR and do not stop the batch; they are raised together as BatchError at the end.
+    """
+    failed = []
+    for message in messages:
+        try:
+            handle(message)
+        except Exception as e:
+            agent.log(f"Lost {message.message_type} message from {message.sender} "
+                      f"({message.timestamp}): {e!r}", "ERROR")
+            failed.append((message, e))
+    if failed:
+        raise BatchError(failed)
+
+
+@dataclass
+class Subscription:
+    name: str
+    topic: Topic
+    handler: Callable[[List[AgentMessage]], Any]
+    queue: asyncio.Queue
+    batch_max: int
+    overflow: str
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "delivered": 0, "batches": 0, "dropped": 0, "failed": 0, "errors": 0, "max_depth": 0})
+    task: Optional[asyncio.Task] = None
+    last_error: Optional[BaseException] = None
+
+
+class MessageBus:
+    """
+    Asyncio pub/sub bus. Create and use it inside a running event loop
+    (`async with MessageBus() as bus:`); `drain()` waits until every queue,
+    including messages published by handlers, is processed.
+    """
+    def __init__(self, queue_size: int = QUEUE_SIZE, batch_max: int = BATCH_MAX, overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.queue_size = queue_size
+        self.batch_max = batch_max
+        self.overflow = overflow
+        self.subscriptions: Dict[str, List[Subscription]] = {}
+        self.published = 0
+        self._pending = 0               # queued or being handled, across all subscriptions
+        self._idle: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, topic: Topic, handler: Callable, name: Optional[str] = None,
+                  queue_size: Optional[int] = None, batch_max: Optional[int] = None,
+                  overflow: Optional[str] = None) -> Subscription:
+        """Registers `handler(messages)` for a topic and starts its consumer task."""
+        overflow = overflow or self.overflow
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self._bind()
+        sub = Subscription(name or getattr(handler, "__qualname__", repr(handler)), topic, handler,
+                           asyncio.Queue(maxsize=queue_size or self.queue_size),
+                           batch_max or self.batch_max, overflow)
+        sub.task = self._loop.create_task(self._consume(sub), name=f"bus:{topic.name}:{sub.name}")
+        self.subscriptions.setdefault(topic.name, []).append(sub)
+        return sub
+
+    async def publish(self, topic: Topic, content: Any, sender: str) -> AgentMessage:
+        if not isinstance(content, topic.content_type):
+            raise TypeError(f"{topic.name} carries {topic.content_type.__name__}, got {type(content).__name__}")
+        self._bind()
+        message = AgentMessage(sender=sender, recipient=topic.name, content=content, message_type=topic.name)
+        self.published += 1
+        subs = self.subscriptions.get(topic.name, ())
+        # Shedding queues first, so a blocked subscriber does not delay delivery to them.
+        for sub in sorted(subs, key=lambda sub: sub.overflow == "block"):
+            if sub.overflow == "block":
+                self._track(1)
+                try:
+                    await sub.queue.put(message)
+                except asyncio.CancelledError:
+                    self._track(-1)
+                    raise
+            else:
+                if sub.queue.full():
+                    sub.stats["dropped"] += 1
+                    if sub.overflow == "drop_new":
+                        continue
+                    sub.queue.get_nowait()
+                    self._track(-1)
+                self._track(1)
+                sub.queue.put_nowait(message)
+            sub.stats["max_depth"] = max(sub.stats["max_depth"], sub.queue.qsize())
+        return message
+
+    def publish_threadsafe(self, topic: Topic, content: Any, sender: str) -> AgentMessage:
+        """Publishes from a worker-thread handler; blocks that thread while the bus applies backpressure."""
+        return asyncio.run_coroutine_threadsafe(self.publish(topic, content, sender), self._loop).result()
+
+    async def _consume(self, sub: Subscription) -> None:
+        is_coroutine = asyncio.iscoroutinefunction(sub.handler)
+        while True:
+            batch = [await sub.queue.get()]
+            while len(batch) < sub.batch_max and not sub.queue.empty():
+                batch.append(sub.queue.get_nowait())
+            try:
+                if is_coroutine:
+                    await sub.handler(batch)
+                else:
+                    await asyncio.to_thread(sub.handler, batch)
+                sub.stats["delivered"] += len(batch)
+            except BatchError as e:
+                sub.stats["errors"] += 1
+                sub.stats["failed"] += len(e.failed)
+                sub.stats["delivered"] += len(batch) - len(e.failed)
+                sub.last_error = e
+            except Exception as e:
+                # One failing batch must not take the subscriber down. The handler did not say
+                # which messages it finished, so the whole batch counts as failed.
+                sub.stats["errors"] += 1
+                sub.stats["failed"] += len(batch)
+                sub.last_error = e
+            finally:
+                sub.stats["batches"] += 1
+                self._track(-len(batch))
+
+    def _bind(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._idle = asyncio.Event()
+            self._idle.set()
+
+    def _track(self, delta: int) -> None:
+        self._pending += delta
+        if self._pending:
+            self._idle.clear()
+        else:
+            self._idle.set()
+
+    async def drain(self) -> None:
+        """
+        Waits until every queued message is handled. Handlers publish before their batch
+        is counted as done, so cascades between topics are followed.
+        """
+        while self._pending:
+            await self._idle.wait()
+
+    def stats(self) -> Dict[str, dict]:
+        return {f"{topic}:{s.name}": dict(s.stats, depth=s.queue.qsize())
+                for topic, subs in self.subscriptions.items() for s in subs}
+
+    async def close(self) -> None:
+        await self.drain()
+        tasks = [s.task for subs in self.subscriptions.values() for s in subs]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.subscriptions.clear()
+
+    async def __aenter__(self):
+        self._bind()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -10,9 +10,12 @@ MPSP ID: 9830 | CREA-SP 5071785098
 """
 
 from src.gear_adk_base import GEARBaseAgent
+from src.gear_message_bus import VERDICT, EVIDENCE, deliver_each
 import hashlib
 import time
 
+NEUTRALIZE_MARKERS = ("neutralize", "spoofing", "incongruity")
+
 class GEARMitigationAgent(GEARBaseAgent):
     """
     Autonomous agent responsible for executing defensive actions
@@ -55,6 +58,42 @@ class GEARMitigationAgent(GEARBaseAgent):
         
         return action_id
 
+    @staticmethod
+    def requires_neutralization(reasoning: str) -> bool:
+        """True when the forensic reasoning calls for active defense."""
+        reasoning = reasoning.lower()
+        return any(marker in reasoning for marker in NEUTRALIZE_MARKERS)
+
+    @staticmethod
+    def build_evidence(forensic_context: dict, reasoning: str, mitigation_id=None) -> dict:
+        """Evidence record for anchoring and escalation (MPSP/Blockchain standard)."""
+        telemetry = forensic_context.get("telemetry")
+        return {
+            "telemetry": telemetry,
+            "bus_data": forensic_context.get("arinc_labels"),
+            "reasoning": reasoning,
+            "mitigation_id": mitigation_id,
+            "forensic_expert": "Ramon Mendes (MPSP 9830)",
+            "forensic_hash": hash(str(telemetry))
+        }
+
+    def attach(self, bus):
+        """Subscribes to VERDICT; mitigates when required and publishes the evidence on EVIDENCE."""
+        self.bus = bus
+        return bus.subscribe(VERDICT, self._on_verdicts, name=self.agent_id)
+
+    def _on_verdicts(self, messages):
+        deliver_each(self, messages, self._mitigate_one)
+
+    def _mitigate_one(self, message):
+        context, reasoning = message.content["context"], message.content["reasoning"]
+        mitigation_id = None
+        if self.requires_neutralization(reasoning):
+            mitigation_id = self.execute_neutralization(context.get("telemetry", {}).get("icao"), reasoning)
+        evidence = self.build_evidence(context, reasoning, mitigation_id)
+        self.seal_forensic_evidence(evidence)
+        self.bus.publish_threadsafe(EVIDENCE, evidence, self.agent_id)
+
     def get_summary(self):
         """Returns the current state of mitigated threats."""
         return self.action_history
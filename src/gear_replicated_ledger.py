@@ -0,0 +1,572 @@
+"""
+WE CAN FLY - GEAR PHASE 08: REPLICATED LEDGER (LOCAL CONSENSUS)
+---------------------------------------------------------------
+N-node replicated evidence ledger: each node is a local process that
+talks to its peers over localhost TCP (newline-delimited JSON).
+
+Leader-based log replication (Raft):
+    - randomized election timeouts, term/vote persisted per node
+    - the leader appends each client request (a batch of anchor
+      payloads) as one log entry; AppendEntries carries up to
+      MAX_BATCH_ENTRIES entries and up to MAX_INFLIGHT requests are
+      pipelined per follower without waiting for acknowledgements
+    - an entry commits once a majority stores it; committed entries
+      are applied on every node as hash-chained Merkle blocks in that
+      node's LedgerStore, so all replicas hold identical ledgers
+
+Entries are written to a per-node JSONL log before they are
+acknowledged (fsync optional: without it the log survives process
+kills, not power loss). There is no log compaction/snapshotting.
+
+Author: Eng. Ramon Mendes (Specialist & Forensic Expert)
+MPSP ID: 9830 | CREA-SP 5071785098
+"""
+
+import os
+import json
+import time
+import random
+import socket
+import asyncio
+import hashlib
+import multiprocessing as mp
+from typing import Dict, List, Optional, Tuple
+
+from src.gear_ledger_store import LedgerStore
+from src.ita_aero_sec.ai.merkle import MerkleTree
+
+GENESIS_HASH = "0" * 64
+LEAF_ALGORITHM = "sha3_256"
+ELECTION_TIMEOUT_S = (0.3, 0.6)
+HEARTBEAT_S = 0.05
+MAX_BATCH_ENTRIES = 256
+MAX_INFLIGHT = 8
+INFLIGHT_TIMEOUT_S = 0.5
+STREAM_LIMIT = 64 << 20
+
+FOLLOWER, CANDIDATE, LEADER = "follower", "candidate", "leader"
+
+
+def _encode(msg: dict) -> bytes:
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode()
+
+
+class RaftLog:
+    """Persistent Raft log (1-based) plus term/vote metadata."""
+    def __init__(self, directory: str, fsync: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.fsync = fsync
+        self.meta_path = os.path.join(directory, "raft-meta.json")
+        self.log_path = os.path.join(directory, "raft-log.jsonl")
+        self.term, self.voted_for = 0, None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.term, self.voted_for = meta["term"], meta["voted_for"]
+        self.entries: List[Tuple[int, dict]] = []
+        self.offsets: List[int] = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # Torn write from a kill: never acknowledged
+                    record = json.loads(line)
+                    self.entries.append((record["t"], record["e"]))
+                    self.offsets.append(offset)
+                    offset += len(line)
+            with open(self.log_path, "r+b") as f:
+                f.truncate(offset)
+        self._file = open(self.log_path, "ab")
+
+    @property
+    def last_index(self) -> int:
+        return len(self.entries)
+
+    def term_at(self, index: int) -> int:
+        return self.entries[index - 1][0] if index > 0 else 0
+
+    def save_meta(self, term: int, voted_for) -> None:
+        self.term, self.voted_for = term, voted_for
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"term": term, "voted_for": voted_for}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.meta_path)
+
+    def append(self, entries: List[Tuple[int, dict]]) -> None:
+        offset = self._file.tell()
+        lines = []
+        for term, entry in entries:
+            line = _encode({"t": term, "e": entry})
+            self.offsets.append(offset)
+            offset += len(line)
+            lines.append(line)
+            self.entries.append((term, entry))
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def truncate(self, index: int) -> None:
+        """Drops entries from `index` on (conflict with the leader's log)."""
+        if index > self.last_index:
+            return
+        self._file.truncate(self.offsets[index - 1])
+        self._file.seek(0, os.SEEK_END)
+        del self.entries[index - 1:]
+        del self.offsets[index - 1:]
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ReplicaNode:
+    """One ledger replica. Runs an asyncio server; all state is touched from its event loop only."""
+    def __init__(self, node_id: int, addresses: Dict[int, Tuple[str, int]], data_dir: str, fsync: bool = False):
+        self.node_id = node_id
+        self.addresses = {int(k): tuple(v) for k, v in addresses.items()}
+        self.peers = [p for p in self.addresses if p != node_id]
+        self.majority = len(self.addresses) // 2 + 1
+        self.log = RaftLog(os.path.join(data_dir, "raft"), fsync=fsync)
+        self.store = LedgerStore(os.path.join(data_dir, "ledger"))
+        last = self.store.last()
+        self.last_hash = last["block_hash"] if last else GENESIS_HASH
+        self.last_applied = last["log_index"] if last else 0
+        self.commit_index = self.last_applied
+        self.role, self.leader_id = FOLLOWER, None
+        self.votes = set()
+        self.next_index: Dict[int, int] = {}
+        self.match_index: Dict[int, int] = {}
+        self.inflight: Dict[int, int] = {}
+        self.last_send: Dict[int, float] = {}
+        self.waiting: Dict[int, list] = {}   # log index -> [(client writer, request id)]
+        self._out: Dict[int, asyncio.StreamWriter] = {}
+        self._connecting = set()
+        self._reset_election()
+
+    # --- transport -----------------------------------------------------------------
+    def _send(self, peer: int, msg: dict) -> None:
+        writer = self._out.get(peer)
+        if writer is None or writer.is_closing():
+            self._out.pop(peer, None)
+            if peer not in self._connecting:
+                self._connecting.add(peer)
+                asyncio.get_running_loop().create_task(self._connect(peer))
+            return   # Raft tolerates lost messages; heartbeats retry
+        writer.write(_encode(msg))
+
+    async def _connect(self, peer: int) -> None:
+        try:
+            reader, writer = await asyncio.open_connection(*self.addresses[peer], limit=STREAM_LIMIT)
+            self._out[peer] = writer
+            asyncio.get_running_loop().create_task(self._watch(peer, reader, writer))
+        except OSError:
+            await asyncio.sleep(HEARTBEAT_S)
+        finally:
+            self._connecting.discard(peer)
+
+    async def _watch(self, peer: int, reader, writer) -> None:
+        """Outgoing connections are write-only; EOF means the peer went away."""
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+        finally:
+            if self._out.get(peer) is writer:
+                self._out.pop(peer, None)
+            writer.close()
+
+    async def _on_connection(self, reader, writer) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._dispatch(json.loads(line), writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, msg: dict, writer) -> None:
+        kind = msg["type"]
+        if "term" in msg and msg["term"] > self.log.term:
+            self._step_down(msg["term"])
+        handler = getattr(self, f"_on_{kind}")
+        handler(msg, writer)
+
+    # --- roles -----------------------------------------------------------------------
+    def _reset_election(self) -> None:
+        self.election_deadline = time.monotonic() + random.uniform(*ELECTION_TIMEOUT_S)
+
+    def _step_down(self, term: int) -> None:
+        was_leader = self.role == LEADER
+        self.log.save_meta(term, None)
+        self.role = FOLLOWER
+        if was_leader:
+            self._fail_waiting()
+
+    def _fail_waiting(self) -> None:
+        for waiters in self.waiting.values():
+            for writer, request_id in waiters:
+                self._reply(writer, {"id": request_id, "ok": False, "leader": self.leader_id})
+        self.waiting.clear()
+
+    def _start_election(self) -> None:
+        self.role = CANDIDATE
+        self.log.save_meta(self.log.term + 1, self.node_id)
+        self.votes = {self.node_id}
+        self._reset_election()
+        if len(self.votes) >= self.majority:
+            return self._become_leader()
+        for peer in self.peers:
+            self._send(peer, {"type": "vote", "term": self.log.term, "from": self.node_id,
+                              "last_index": self.log.last_index, "last_term": self.log.term_at(self.log.last_index)})
+
+    def _become_leader(self) -> None:
+        self.role, self.leader_id = LEADER, self.node_id
+        for peer in self.peers:
+            self.next_index[peer] = self.log.last_index + 1
+            self.match_index[peer] = 0
+            self.inflight[peer] = 0
+            self.last_send[peer] = 0.0
+        # A no-op of the new term lets entries from earlier terms commit.
+        self._leader_append({"noop": True, "ts": time.time()})
+
+    # --- RPC handlers ------------------------------------------------------------------
+    def _on_vote(self, msg, writer) -> None:
+        up_to_date = (msg["last_term"], msg["last_index"]) >= (self.log.term_at(self.log.last_index), self.log.last_index)
+        granted = (msg["term"] == self.log.term and self.log.voted_for in (None, msg["from"]) and up_to_date)
+        if granted:
+            self.log.save_meta(self.log.term, msg["from"])
+            self._reset_election()
+        self._send(msg["from"], {"type": "vote_resp", "term": self.log.term, "from": self.node_id, "granted": granted})
+
+    def _on_vote_resp(self, msg, writer) -> None:
+        if self.role == CANDIDATE and msg["term"] == self.log.term and msg["granted"]:
+            self.votes.add(msg["from"])
+            if len(self.votes) >= self.majority:
+                self._become_leader()
+
+    def _on_append(self, msg, writer) -> None:
+        reply = {"type": "append_resp", "term": self.log.term, "from": self.node_id, "success": False}
+        if msg["term"] < self.log.term:
+            return self._send(msg["from"], reply)
+        self.role, self.leader_id = FOLLOWER, msg["from"]
+        self._reset_election()
+        prev = msg["prev_index"]
+        if prev > self.log.last_index:
+            reply["hint"] = self.log.last_index + 1
+            return self._send(msg["from"], reply)
+        if self.log.term_at(prev) != msg["prev_term"]:
+            # Skip the whole conflicting term in one round trip.
+            conflict = self.log.term_at(prev)
+            hint = prev
+            while hint > 1 and self.log.term_at(hint - 1) == conflict:
+                hint -= 1
+            reply["hint"] = max(hint, self.commit_index + 1)
+            return self._send(msg["from"], reply)
+        index, new = prev, []
+        for term, entry in msg["entries"]:
+            index += 1
+            if new or index > self.log.last_index:
+                new.append((term, entry))
+            elif self.log.term_at(index) != term:
+                self.log.truncate(index)
+                new.append((term, entry))
+        if new:
+            self.log.append(new)
+        match = prev + len(msg["entries"])
+        if msg["leader_commit"] > self.commit_index:
+            self.commit_index = min(msg["leader_commit"], match)
+            self._apply()
+        reply.update(success=True, match=match)
+        self._send(msg["from"], reply)
+
+    def _on_append_resp(self, msg, writer) -> None:
+        if self.role != LEADER or msg["term"] != self.log.term:
+            return
+        peer = msg["from"]
+        self.inflight[peer] = max(0, self.inflight[peer] - 1)
+        if msg["success"]:
+            self.match_index[peer] = max(self.match_index[peer], msg["match"])
+            self.next_index[peer] = max(self.next_index[peer], msg["match"] + 1)
+            self._advance_commit()
+        else:
+            # Rewind and restart the pipeline from the follower's hint.
+            self.next_index[peer] = max(1, min(self.next_index[peer], msg["hint"]))
+            self.inflight[peer] = 0
+        self._replicate(peer)
+
+    def _on_client_append(self, msg, writer) -> None:
+        if self.role != LEADER:
+            return self._reply(writer, {"id": msg["id"], "ok": False, "leader": self.leader_id})
+        index = self._leader_append({"ts": time.time(), "payloads": msg["payloads"]})
+        self.waiting.setdefault(index, []).append((writer, msg["id"]))
+        if self.majority == 1:
+            self._advance_commit()
+
+    def _on_status(self, msg, writer) -> None:
+        self._reply(writer, {"id": msg["id"], "ok": True, "node": self.node_id, "role": self.role,
+                             "term": self.log.term, "leader": self.leader_id, "last_index": self.log.last_index,
+                             "commit_index": self.commit_index, "blocks": self.store.count,
+                             "last_block_hash": self.last_hash})
+
+    def _reply(self, writer, msg: dict) -> None:
+        if not writer.is_closing():
+            writer.write(_encode(msg))
+
+    # --- replication ---------------------------------------------------------------------
+    def _leader_append(self, entry: dict) -> int:
+        self.log.append([(self.log.term, entry)])
+        for peer in self.peers:
+            self._replicate(peer)
+        return self.log.last_index
+
+    def _replicate(self, peer: int, heartbeat: bool = False) -> None:
+        """Sends pipelined batches while the follower lags and the in-flight window has room."""
+        sent = False
+        while self.inflight[peer] < MAX_INFLIGHT and self.next_index[peer] <= self.log.last_index:
+            start = self.next_index[peer]
+            entries = self.log.entries[start - 1:start - 1 + MAX_BATCH_ENTRIES]
+            self._send_append(peer, start - 1, entries)
+            self.next_index[peer] = start + len(entries)
+            self.inflight[peer] += 1
+            sent = True
+        if heartbeat and not sent:
+            self._send_append(peer, self.next_index[peer] - 1, [])
+
+    def _send_append(self, peer: int, prev: int, entries) -> None:
+        self.last_send[peer] = time.monotonic()
+        self._send(peer, {"type": "append", "term": self.log.term, "from": self.node_id, "prev_index": prev,
+                          "prev_term": self.log.term_at(prev), "entries": entries,
+                          "leader_commit": self.commit_index})
+
+    def _advance_commit(self) -> None:
+        matches = sorted([self.log.last_index] + [self.match_index[p] for p in self.peers], reverse=True)
+        candidate = matches[self.majority - 1]
+        # Only entries of the current term commit by counting replicas (Raft section 5.4.2).
+        if candidate > self.commit_index and self.log.term_at(candidate) == self.log.term:
+            self.commit_index = candidate
+            self._apply()
+
+    def _apply(self) -> None:
+        while self.last_applied < self.commit_index:
+            self.last_applied += 1
+            term, entry = self.log.entries[self.last_applied - 1]
+            block = None
+            if "payloads" in entry and entry["payloads"]:
+                block = self._append_block(self.last_applied, term, entry)
+            for writer, request_id in self.waiting.pop(self.last_applied, []):
+                self._reply(writer, {"id": request_id, "ok": True, "index": self.last_applied,
+                                     "block_index": block["block_index"] if block else None,
+                                     "block_hash": block["block_hash"] if block else None})
+
+    def _append_block(self, log_index: int, term: int, entry: dict) -> dict:
+        payloads = entry["payloads"]
+        tree = MerkleTree.from_records([json.dumps(p, sort_keys=True, default=str) for p in payloads],
+                                       LEAF_ALGORITHM)
+        # Built only from replicated data (leader timestamp included) so every replica derives the same block.
+        block = {"block_index": self.store.count, "log_index": log_index, "term": term,
+                 "merkle_root": tree.root, "leaf_count": tree.size, "prev_hash": self.last_hash,
+                 "timestamp": entry["ts"], "status": "COMMITTED"}
+        block["block_hash"] = hashlib.sha3_256(json.dumps(block, sort_keys=True).encode()).hexdigest()
+        evidence = [(str(p.get("forensic_hash", "UNKNOWN")) if isinstance(p, dict) else "UNKNOWN", tree.leaf(i))
+                    for i, p in enumerate(payloads)]
+        self.store.append(block, evidence)
+        self.last_hash = block["block_hash"]
+        return block
+
+    # --- main loop ------------------------------------------------------------------------
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_S / 5)
+            now = time.monotonic()
+            if self.role == LEADER:
+                for peer in self.peers:
+                    if self.inflight[peer] and now - self.last_send[peer] > INFLIGHT_TIMEOUT_S:
+                        # Responses lost (peer down or reconnecting): resend from the last match.
+                        self.inflight[peer] = 0
+                        self.next_index[peer] = self.match_index[peer] + 1
+                    if now - self.last_send[peer] >= HEARTBEAT_S:
+                        self._replicate(peer, heartbeat=True)
+            elif now >= self.election_deadline:
+                self._start_election()
+
+    async def serve_forever(self) -> None:
+        host, port = self.addresses[self.node_id]
+        server = await asyncio.start_server(self._on_connection, host, port, limit=STREAM_LIMIT)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self._tick())
+
+
+def run_node(node_id: int, addresses: dict, data_dir: str, fsync: bool = False) -> None:
+    """Process entry point."""
+    node = ReplicaNode(node_id, addresses, data_dir, fsync=fsync)
+    try:
+        asyncio.run(node.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def free_ports(n: int) -> List[int]:
+    sockets = []
+    try:
+        for _ in range(n):
+            s = socket.socket()
+            s.bind(("127.0.0.1", 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+class LocalCluster:
+    """N replica processes on localhost, each with its own data directory."""
+    def __init__(self, n: int, base_dir: str, fsync: bool = False):
+        self.base_dir = base_dir
+        self.fsync = fsync
+        self.addresses = {i: ("127.0.0.1", port) for i, port in enumerate(free_ports(n))}
+        self.processes: Dict[int, mp.Process] = {}
+        self._ctx = mp.get_context("spawn")
+
+    def start_node(self, node_id: int) -> None:
+        proc = self._ctx.Process(target=run_node, daemon=True, name=f"ledger-node-{node_id}",
+                                 args=(node_id, self.addresses, os.path.join(self.base_dir, f"node{node_id}"),
+                                       self.fsync))
+        proc.start()
+        self.processes[node_id] = proc
+
+    def start(self) -> "LocalCluster":
+        for node_id in self.addresses:
+            self.start_node(node_id)
+        return self
+
+    def kill(self, node_id: int) -> None:
+        """SIGKILL: no shutdown path runs, like a crash."""
+        proc = self.processes.pop(node_id)
+        proc.kill()
+        proc.join()
+
+    def restart(self, node_id: int) -> None:
+        self.start_node(node_id)
+
+    def stop(self) -> None:
+        for node_id in list(self.processes):
+            self.kill(node_id)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class LedgerClient:
+    """
+    Asyncio client: appends anchor batches through the current leader (following redirects)
+    and queries node status. Many appends may be outstanding at once.
+    """
+    def __init__(self, addresses: Dict[int, Tuple[str, int]], timeout: float = 10.0):
+        self.addresses = dict(addresses)
+        self.timeout = timeout
+        self.leader: Optional[int] = None
+        self._conns: Dict[int, asyncio.StreamWriter] = {}
+        self._futures: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._next_id = 0
+
+    async def _conn(self, node_id: int) -> asyncio.StreamWriter:
+        writer = self._conns.get(node_id)
+        if writer is None or writer.is_closing():
+            reader, writer = await asyncio.open_connection(*self.addresses[node_id], limit=STREAM_LIMIT)
+            self._conns[node_id] = writer
+            asyncio.get_running_loop().create_task(self._read(node_id, reader, writer))
+        return writer
+
+    async def _read(self, node_id, reader, writer) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                _, future = self._futures.pop(msg["id"], (None, None))
+                if future is not None and not future.done():
+                    future.set_result(msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if self._conns.get(node_id) is writer:
+                self._conns.pop(node_id, None)
+            # The node is gone: fail its outstanding calls now instead of at their timeout.
+            for target, future in list(self._futures.values()):
+                if target == node_id and not future.done():
+                    future.set_exception(ConnectionResetError(f"node {node_id} closed the connection"))
+
+    async def _call(self, node_id: int, msg: dict, timeout: float) -> dict:
+        self._next_id += 1
+        msg["id"] = self._next_id
+        writer = await self._conn(node_id)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[msg["id"]] = (node_id, future)
+        try:
+            writer.write(_encode(msg))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._futures.pop(msg["id"], None)
+
+    async def append(self, payloads: List[dict]) -> dict:
+        """
+        Commits one batch of anchors; returns {index, block_index, block_hash, latency_s}.
+        A batch retried after a lost reply may commit twice (at-least-once).
+        """
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        candidates = list(self.addresses)
+        while time.perf_counter() < deadline:
+            target = self.leader if self.leader is not None else random.choice(candidates)
+            try:
+                reply = await self._call(target, {"type": "client_append", "payloads": payloads},
+                                         max(0.05, min(2.0, deadline - time.perf_counter())))
+            except (OSError, asyncio.TimeoutError):
+                self.leader = None
+                await asyncio.sleep(HEARTBEAT_S)
+                continue
+            if reply["ok"]:
+                self.leader = target
+                return dict(reply, latency_s=time.perf_counter() - start)
+            self.leader = reply.get("leader")
+            if self.leader is None:
+                await asyncio.sleep(HEARTBEAT_S)   # Election in progress
+        raise TimeoutError(f"No leader committed the batch within {self.timeout} s")
+
+    async def status(self, node_id: int, timeout: float = 1.0) -> Optional[dict]:
+        try:
+            return await self._call(node_id, {"type": "status"}, timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+
+    async def wait_for_leader(self, timeout: float = 10.0) -> int:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for node_id in self.addresses:
+                s = await self.status(node_id, 0.5)
+                if s and s["role"] == LEADER:
+                    self.leader = node_id
+                    return node_id
+            await asyncio.sleep(HEARTBEAT_S)
+        raise TimeoutError("No leader elected")
+
+    async def close(self) -> None:
+        for writer in self._conns.values():
+            writer.close()
+        self._conns.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
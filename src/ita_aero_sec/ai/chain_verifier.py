@@ -0,0 +1,265 @@
+"""
+======================================================================
+WE CAN FLY - PARALLEL FORENSIC HASH-CHAIN VERIFIER (TRL-9)
+======================================================================
+Mission: Re-verify months of forensic chains (SovereignIA_Auditor
+logs, exported GEARBlockchainAgent ledgers) in minutes, in bounded
+memory.
+
+    1. Split the JSONL file into byte segments aligned to record starts
+    2. Re-hash each segment on a process pool, streaming line by line:
+       every record's own signature and every link inside the segment
+    3. Stitch: segment i must start from the hash segment i-1 ended on
+
+Segment boundaries are stored as checkpoints (offset, seq, hash), so a
+later run resumes from the last verified checkpoint and only re-hashes
+the appended tail. The first broken link is reported with its byte
+offset. An empty file is an intact chain of 0 records.
+
+Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
+======================================================================
+"""
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+GENESIS_HASH = "0" * 64
+SEGMENT_BYTES = 64 << 20
+
+
+@dataclass(frozen=True)
+class ChainFormat:
+    """How a JSONL chain signs and links its records."""
+    name: str
+    signature: str                  # Field holding the record's own hash
+    algorithm: str                  # hashlib constructor name
+    seq: str                        # Monotonic sequence field ('' if none)
+    link: str = "prev_hash"
+    unsigned: Tuple[str, ...] = ()  # Fields excluded from the signed payload besides `signature`
+
+    def digest(self, record: dict) -> str:
+        body = {k: v for k, v in record.items() if k != self.signature and k not in self.unsigned}
+        return hashlib.new(self.algorithm, json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+FORMATS = {
+    "auditor": ChainFormat("auditor", "forensic_signature", "sha256", "seq"),
+    "ledger": ChainFormat("ledger", "block_hash", "sha3_256", "block_index"),
+}
+
+
+def detect_format(path: str) -> Optional[ChainFormat]:
+    """Format of the first record; None for an empty file (nothing to inspect yet)."""
+    with open(path, "rb") as f:
+        line = f.readline()
+    if not line:
+        return None
+    first = json.loads(line)
+    for fmt in FORMATS.values():
+        if fmt.signature in first:
+            return fmt
+    raise ValueError(f"{path}: first record matches no known chain format ({', '.join(FORMATS)})")
+
+
+def _align(f, offset: int) -> int:
+    """First record start at or after `offset`."""
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()  # Finishes the line that crosses the boundary
+    return f.tell()
+
+
+def plan_segments(path: str, start: int = 0, segment_bytes: int = SEGMENT_BYTES):
+    """[(start, end)] byte ranges covering [start, EOF), each beginning on a record."""
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        offset = start + segment_bytes
+        while offset < size:
+            aligned = _align(f, offset)
+            if aligned >= size:
+                break
+            if aligned > bounds[-1]:
+                bounds.append(aligned)
+            offset = aligned + segment_bytes
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def verify_segment(path: str, start: int, end: int, fmt_name: str) -> dict:
+    """
+    Streams [start, end): checks each record's signature and the links within the segment.
+    Returns the first/last link hashes for stitching and the first error, if any.
+    """
+    fmt = FORMATS[fmt_name]
+    result = {"start": start, "end": end, "records": 0, "first_prev": None, "first_seq": None,
+              "last_hash": None, "last_seq": None, "error": None}
+    prev_hash, prev_seq = None, None
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            here, offset = offset, offset + len(line)
+
+            def fail(kind, detail):
+                result["error"] = {"offset": here, "kind": kind, "detail": detail,
+                                   "record": result["records"], "seq": prev_seq}
+
+            if not line.endswith(b"\n"):
+                fail("torn_tail", f"{len(line)} bytes without a terminating newline")
+                break
+            try:
+                record = json.loads(line)
+                signature, link = record[fmt.signature], record[fmt.link]
+            except (ValueError, KeyError) as e:
+                fail("bad_record", str(e))
+                break
+            seq = record.get(fmt.seq) if fmt.seq else None
+            if fmt.digest(record) != signature:
+                fail("bad_signature", f"content does not hash to {signature[:16]}...")
+                break
+            if prev_hash is None:
+                result["first_prev"], result["first_seq"] = link, seq
+            elif link != prev_hash:
+                fail("broken_link", f"prev_hash {str(link)[:16]}... != {prev_hash[:16]}...")
+                break
+            elif seq is not None and prev_seq is not None and seq != prev_seq + 1:
+                fail("seq_gap", f"seq {seq} follows {prev_seq}")
+                break
+            prev_hash, prev_seq = signature, seq
+            result["records"] += 1
+    result["last_hash"], result["last_seq"] = prev_hash, prev_seq
+    return result
+
+
+def _verify_segment_args(args):
+    return verify_segment(*args)
+
+
+def _record_before(path: str, offset: int, block: int = 1 << 16) -> Optional[dict]:
+    """The record whose line ends exactly at `offset` (None if there is none)."""
+    if offset <= 0 or offset > os.path.getsize(path):
+        return None
+    with open(path, "rb") as f:
+        pos, buf = offset - 1, b""
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            if b"\n" in buf:
+                break
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            return None
+        try:
+            return json.loads(buf[buf.rfind(b"\n") + 1:])
+        except ValueError:
+            return None
+
+
+def load_checkpoints(path: str) -> list:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def verify_chain(path: str, fmt: Optional[ChainFormat] = None, workers: Optional[int] = None,
+                 segment_bytes: int = SEGMENT_BYTES, checkpoint_path: Optional[str] = None,
+                 resume: bool = False) -> dict:
+    """
+    Verifies a whole chain file. With `checkpoint_path`, segment boundaries verified
+    in this run are appended as checkpoints; `resume=True` starts after the last one.
+
+    Returns a report dict: ok, records, bytes, segments, seconds, mb_per_s, resumed_from,
+    and error (first broken link with byte offset) when ok is False. The format is None
+    for an empty file, which verifies as 0 records.
+    """
+    fmt = fmt or detect_format(path)
+    checkpoints = load_checkpoints(checkpoint_path) if resume else []
+    start, expected, expected_seq = 0, GENESIS_HASH, None
+    if checkpoints:
+        last = checkpoints[-1]
+        anchor = _record_before(path, last["offset"])
+        if anchor is None or anchor.get(fmt.signature) != last["hash"]:
+            raise ValueError(f"Checkpoint at byte {last['offset']} no longer matches {path}; verify from genesis")
+        start, expected, expected_seq = last["offset"], last["hash"], last["seq"]
+
+    began = time.perf_counter()
+    segments = plan_segments(path, start, segment_bytes)
+    tasks = [(path, a, b, fmt.name) for a, b in segments] if fmt else []
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with mp.get_context("spawn").Pool(min(workers, len(tasks))) as pool:
+            results = pool.map(_verify_segment_args, tasks, chunksize=1)
+    else:
+        results = [verify_segment(*t) for t in tasks]
+
+    report = {"path": path, "format": fmt.name if fmt else None, "ok": True, "error": None, "records": 0,
+              "bytes": os.path.getsize(path) - start, "segments": len(results), "resumed_from": start,
+              "checkpoints": []}
+    for seg in results:
+        # A boundary link sits before anything inside the segment, so it is checked first.
+        if seg["records"] and seg["first_prev"] != expected:
+            report["error"] = {"offset": seg["start"], "kind": "broken_link", "record": 0, "seq": expected_seq,
+                               "detail": f"prev_hash {str(seg['first_prev'])[:16]}... != {expected[:16]}..."}
+        elif seg["records"] and expected_seq is not None and seg["first_seq"] is not None \
+                and seg["first_seq"] != expected_seq + 1:
+            report["error"] = {"offset": seg["start"], "kind": "seq_gap", "record": 0, "seq": expected_seq,
+                               "detail": f"seq {seg['first_seq']} follows {expected_seq}"}
+        else:
+            report["error"] = seg["error"]
+        if report["error"]:
+            report["error"]["record"] += report["records"]
+            report["records"] = report["error"]["record"]  # Intact records before the break
+            report["ok"] = False
+            break
+        report["records"] += seg["records"]
+        if seg["records"]:
+            expected, expected_seq = seg["last_hash"], seg["last_seq"]
+            report["checkpoints"].append({"offset": seg["end"], "seq": expected_seq, "hash": expected})
+
+    report["seconds"] = time.perf_counter() - began
+    report["mb_per_s"] = report["bytes"] / (1 << 20) / report["seconds"] if report["seconds"] > 0 else 0.0
+    if checkpoint_path and report["checkpoints"]:
+        with open(checkpoint_path, "a") as f:
+            for cp in report["checkpoints"]:
+                f.write(json.dumps(dict(cp, verified_at=time.time())) + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    sys.path.append(os.path.dirname(__file__))
+    from sovereign_auditor import SovereignIA_Auditor
+
+    path = os.path.join(tempfile.mkdtemp(), "forensic_audit.log")
+    auditor = SovereignIA_Auditor(log_path=path)
+    for i in range(200000):
+        auditor.audit_decision("AVIONICS_SVM", "VALID_TELEMETRY", {"ALT": 35000 + i % 500, "VEL": 450, "CYCLE": i})
+    auditor.close()
+
+    for workers in (1, os.cpu_count() or 1):
+        r = verify_chain(path, workers=workers, segment_bytes=4 << 20)
+        print(f"[AI] workers={workers:2d} | {r['records']:,} records | {r['segments']} segments | "
+              f"{r['seconds']:.2f} s ({r['mb_per_s']:.1f} MB/s) | ok={r['ok']}")
+
+    with open(path, "r+b") as f:
+        f.seek(os.path.getsize(path) // 2)
+        f.readline()
+        at = f.tell()
+        line = f.readline()
+        f.seek(at)
+        f.write(line.replace(b"VALID_TELEMETRY", b"NEGATED_COMMAND"))
+    r = verify_chain(path, segment_bytes=4 << 20)
+    print(f"[AI] Tampered record detected: {r['error']['kind']} at byte {r['error']['offset']} (expected {at})")
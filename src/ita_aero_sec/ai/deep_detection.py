@@ -9,25 +9,52 @@ Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
 ======================================================================
 """
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 try:
-    import tensorflow as tf
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense, RepeatVector, TimeDistributed
+    from .numpy_lstm import NumpyLSTMAutoencoder, export_autoencoder_weights
 except ImportError:
-    tf = None
-    # print("[WARN] TensorFlow NOT installed. Using mock implementation for validation.")
+    from numpy_lstm import NumpyLSTMAutoencoder, export_autoencoder_weights
+
+# TensorFlow is imported on first model build (seconds of import time and hundreds of MB),
+# so modules that only use the NumPy engine or the stream helpers never pay for it.
+tf = None
+_TF_CHECKED = False
+
+
+def _load_tensorflow():
+    global tf, _TF_CHECKED
+    if not _TF_CHECKED:
+        _TF_CHECKED = True
+        try:
+            import tensorflow
+            tf = tensorflow
+        except ImportError:
+            tf = None
+            # print("[WARN] TensorFlow NOT installed. Using mock implementation for validation.")
+    return tf
+
+
+class NoModelError(RuntimeError):
+    """Stream scoring was requested but no autoencoder is available."""
+
 
 class DeepAnomalyDetector:
-    def __init__(self, sequence_length=10, features=3):
+    def __init__(self, sequence_length=10, features=3, weights_path=None):
         self.sequence_length = sequence_length
         self.features = features
-        self.model = self._build_autoencoder()
+        # Exported .npz weights run on the NumPy engine: no TensorFlow needed at the edge.
+        if weights_path:
+            self.model = NumpyLSTMAutoencoder.load(weights_path)
+        else:
+            self.model = self._build_autoencoder()
 
     def _build_autoencoder(self):
         """Builds an LSTM Autoencoder with MAE loss."""
-        if tf is None: return None
-        
+        if _load_tensorflow() is None: return None
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, RepeatVector, TimeDistributed
+
         model = Sequential([
             LSTM(32, activation='relu', input_shape=(self.sequence_length, self.features), return_sequences=False),
             RepeatVector(self.sequence_length),
@@ -41,23 +68,77 @@ class DeepAnomalyDetector:
         if self.model:
             print(f"[AI] Local Training Complete. Weights Ready for Vertex AI Sync.")
 
+    def export_weights(self, path):
+        """Exports the trained Keras autoencoder to .npz for NumpyLSTMAutoencoder."""
+        if self.model is None or isinstance(self.model, NumpyLSTMAutoencoder):
+            raise RuntimeError("No trained Keras model to export")
+        return export_autoencoder_weights(self.model, path)
+
     def detect(self, sequence):
-        """Calculates reconstruction loss. Higher loss = Anomaly."""
-        if not self.model or tf is None:
-            # Fallback for validation without TF
-            mean_val = np.mean(sequence)
-            score = 1.0 if mean_val > 0.8 else 0.0
-            return score
-            
-        try:
-            prediction = self.model.predict(sequence, verbose=0)
-            loss = np.mean(np.abs(prediction - sequence))
-            return loss
-        except Exception:
-            return 0.5
+        """
+        Calculates reconstruction loss (mean absolute error). Higher loss = Anomaly.
+        Raises NoModelError without a model; model errors propagate.
+        """
+        batch = np.asarray(sequence, dtype=np.float32).reshape(-1, self.sequence_length, self.features)
+        return float(np.mean(np.abs(self._reconstruct(batch) - batch)))
+
+    def windows(self, telemetry, stride=1):
+        """
+        Overlapping (n_windows, sequence_length, features) windows over a (n_timesteps, features)
+        track. The result is a strided view of `telemetry`: no data is copied.
+        """
+        telemetry = np.asarray(telemetry, dtype=np.float32).reshape(-1, self.features)
+        if len(telemetry) < self.sequence_length:
+            return np.empty((0, self.sequence_length, self.features), dtype=np.float32)
+        view = sliding_window_view(telemetry, self.sequence_length, axis=0)  # (n_w, features, seq)
+        return view.transpose(0, 2, 1)[::stride]
+
+    @property
+    def has_model(self) -> bool:
+        return self.model is not None
+
+    def _reconstruct(self, batch):
+        if self.model is None:
+            # Scores must come from a trained autoencoder, never from a stand-in.
+            raise NoModelError("No autoencoder loaded: install TensorFlow and train one, or pass "
+                               "weights_path=<exported .npz> to score with the NumPy LSTM engine")
+        return np.asarray(self.model.predict_on_batch(batch))
+
+    def detect_stream(self, telemetry, stride=1, batch_size=2048):
+        """
+        Scores a whole flight in one call. Raises NoModelError without a model.
+        Windows are scored batch_size at a time; each timestep's error is the mean absolute
+        reconstruction error over features, averaged across every window covering it
+        (NaN where no window covers the timestep, e.g. tracks shorter than sequence_length).
+        """
+        telemetry = np.asarray(telemetry, dtype=np.float32).reshape(-1, self.features)
+        windows = self.windows(telemetry, stride)
+        total = np.zeros(len(telemetry))
+        covered = np.zeros(len(telemetry))
+        starts = np.arange(len(windows)) * stride
+        for i in range(0, len(windows), batch_size):
+            batch = windows[i:i + batch_size]
+            error = np.abs(self._reconstruct(batch) - batch).mean(axis=2)  # (b, seq)
+            first = starts[i:i + batch_size]
+            for offset in range(self.sequence_length):
+                total[first + offset] += error[:, offset]
+                covered[first + offset] += 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return total / covered
+
+    def detect_tracks(self, tracks, stride=1, batch_size=2048):
+        """detect_stream over {track_id: (n_timesteps, features) array}. Returns {track_id: errors}."""
+        return {track: self.detect_stream(data, stride, batch_size) for track, data in tracks.items()}
 
 if __name__ == "__main__":
     detector = DeepAnomalyDetector()
-    mock_sequence = np.random.rand(1, 10, 3) 
-    score = detector.detect(mock_sequence)
-    print(f"[AI] [SUCCESS] Anomaly Score: {score:.4f}")
+    mock_sequence = np.random.rand(1, 10, 3)
+    flight = np.random.rand(20000, 3).astype(np.float32)
+    flight[12000:12010] += 5.0
+    try:
+        score = detector.detect(mock_sequence)
+        print(f"[AI] [SUCCESS] Anomaly Score: {score:.4f}")
+        errors = detector.detect_stream(flight)
+        print(f"[AI] [SUCCESS] Flight scored in one call: {len(errors)} timesteps, peak at t={int(np.nanargmax(errors))}")
+    except NoModelError as e:
+        print(f"[AI] [WARN] Scoring skipped: {e}")
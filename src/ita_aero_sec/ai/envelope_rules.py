@@ -0,0 +1,256 @@
+"""
+======================================================================
+WE CAN FLY - ENVELOPE RULE PREFILTER CASCADE (TRL-9)
+======================================================================
+Mission: Resolve hard physical-limit cases with vectorized NumPy
+masks before any ML model runs.
+
+    Stage 1 - VIOLATION: any violation rule fires      -> threat (1)
+    Stage 2 - NOMINAL:   every nominal clause holds    -> nominal (0)
+    Stage 3 - MODEL:     the ambiguous remainder       -> IsolationForest / SVM
+
+A sample with a NaN/inf feature never reaches the model: it is a
+violation attributed to NON_FINITE_RULE. Without a scorer, the
+ambiguous remainder is counted as "unscored" (labelled nominal).
+
+Rules are declarative: (feature, operator, value) clauses ANDed
+together, evaluated over whole batches (structured arrays,
+RecordBatch, DataFrames or plain 2-D arrays with named columns).
+
+Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
+======================================================================
+"""
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+STAGE_VIOLATION = 1
+STAGE_NOMINAL = 2
+STAGE_MODEL = 3
+STAGE_UNSCORED = 4
+STAGE_NAMES = {STAGE_VIOLATION: "violation", STAGE_NOMINAL: "nominal", STAGE_MODEL: "model",
+               STAGE_UNSCORED: "unscored"}
+NON_FINITE_RULE = -2   # CascadeResult.rule value for samples with a missing or non-finite feature
+
+_OPERATORS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "!=": np.not_equal,
+    "abs>": lambda x, v: np.abs(x) > v, "abs<=": lambda x, v: np.abs(x) <= v,
+}
+
+
+@dataclass(frozen=True)
+class EnvelopeRule:
+    """A named conjunction of (feature, operator, value) clauses."""
+    name: str
+    clauses: Tuple[Tuple[str, str, float], ...]
+    reason: str = ""
+
+    def evaluate(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        mask = None
+        for feature, op, value in self.clauses:
+            hit = _OPERATORS[op](columns[feature], value)
+            mask = hit if mask is None else mask & hit
+        return mask
+
+    @property
+    def features(self) -> Tuple[str, ...]:
+        return tuple(feature for feature, _, _ in self.clauses)
+
+
+# --- ADS-B (ADSBSpoofingDetector features) ---
+ADSB_VIOLATION_RULES = (
+    EnvelopeRule("altitude_delta_envelope", (("altitude_delta", "abs>", 500.0),),
+                 "Altitude change beyond the +/-500 ft/s TCAS filter envelope"),
+    EnvelopeRule("velocity_delta_envelope", (("velocity_delta", "abs>", 150.0),),
+                 "Velocity change beyond airframe acceleration limits"),
+    EnvelopeRule("mlat_latency", (("latency_ms", ">", 150.0),),
+                 "Propagation delay consistent with rebroadcast (MLAT/TDOA)"),
+)
+ADSB_NOMINAL_RULES = (
+    EnvelopeRule("adsb_nominal_core", (
+        ("altitude_delta", "abs<=", 150.0), ("velocity_delta", "abs<=", 30.0),
+        ("rssi", ">=", -65.0), ("rssi", "<=", -35.0),
+        ("latency_ms", ">=", 5.0), ("latency_ms", "<=", 40.0),
+    )),
+)
+# For raw track records (RecordBatch / SBS-1 arrays carrying absolute altitude)
+ALTITUDE_CEILING_RULE = EnvelopeRule("altitude_ceiling", (("altitude", ">", 60000.0),),
+                                     "Reported altitude above 60000 ft")
+
+# --- ARINC 429 (AvionicsAnomalyDetector features) ---
+VLO_KTAS = 270.0
+AVIONICS_VIOLATION_RULES = (
+    EnvelopeRule("gear_down_above_vlo", (("gear_status", ">=", 0.5), ("airspeed", ">", VLO_KTAS)),
+                 "VLO Structural Limit Exceeded (Airspeed > 270 KTAS with gear DOWN)"),
+)
+AVIONICS_NOMINAL_RULES = (
+    EnvelopeRule("avionics_nominal_cruise", (
+        ("gear_status", "<", 0.5), ("airspeed", ">=", 150.0), ("airspeed", "<=", 520.0),
+        ("altitude", ">=", 0.0), ("altitude", "<=", 45000.0),
+    )),
+)
+
+
+@dataclass
+class CascadeResult:
+    labels: np.ndarray    # 1 = threat, 0 = nominal
+    stage: np.ndarray     # STAGE_* that decided each sample
+    rule: np.ndarray      # Index of the first violation rule that fired, NON_FINITE_RULE, or -1
+
+
+@dataclass
+class CascadeStats:
+    counts: Dict[str, int] = field(default_factory=lambda: {name: 0 for name in STAGE_NAMES.values()})
+    seconds: Dict[str, float] = field(default_factory=lambda: {"rules": 0.0, "model": 0.0})
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+    non_finite: int = 0
+    batches: int = 0
+
+    def report(self) -> Dict[str, object]:
+        total = sum(self.counts.values())
+        return {
+            "samples": total,
+            "batches": self.batches,
+            "counts": dict(self.counts),
+            "fractions": {k: (v / total if total else 0.0) for k, v in self.counts.items()},
+            "seconds": dict(self.seconds),
+            "rule_hits": dict(self.rule_hits),
+            "non_finite": self.non_finite,
+        }
+
+
+class RuleCascade:
+    """
+    Violation rules -> nominal envelope -> model on the ambiguous middle.
+
+    Args:
+        violations, nominal: EnvelopeRule sequences.
+        scorer: Callable mapping an (m, n_features) float array (columns ordered as `features`)
+                to 0/1 labels, e.g. ADSBInferenceEngine.predict_model. None leaves
+                ambiguous samples nominal (stage "unscored").
+        features: Model column order; also the column names of plain 2-D inputs.
+    """
+    def __init__(self, violations: Sequence[EnvelopeRule], nominal: Sequence[EnvelopeRule],
+                 scorer: Optional[Callable[[np.ndarray], np.ndarray]], features: Sequence[str]):
+        self.violations = tuple(violations)
+        self.nominal = tuple(nominal)
+        self.scorer = scorer
+        self.features = list(features)
+        self.stats = CascadeStats(rule_hits={rule.name: 0 for rule in self.violations})
+        self._checked = list(dict.fromkeys(self.features + [f for r in self.violations + self.nominal
+                                                             for f in r.features]))
+
+    def _columns(self, X) -> Dict[str, np.ndarray]:
+        if hasattr(X, "records"):                      # RecordBatch
+            X = X.records
+        if hasattr(X, "columns"):                      # pandas DataFrame
+            return {name: X[name].to_numpy() for name in X.columns}
+        X = np.asarray(X)
+        if X.dtype.names:
+            return {name: X[name] for name in X.dtype.names}
+        X = X.reshape(-1, len(self.features))
+        return {name: X[:, i] for i, name in enumerate(self.features)}
+
+    def run(self, X) -> CascadeResult:
+        start = time.perf_counter()
+        columns = self._columns(X)
+        n = len(next(iter(columns.values())))
+        rule = np.full(n, -1, dtype=np.int16)
+        # Reverse order so the first matching rule wins the attribution.
+        for i in range(len(self.violations) - 1, -1, -1):
+            hit = self.violations[i].evaluate(columns)
+            rule[hit] = i
+            self.stats.rule_hits[self.violations[i].name] += int(np.count_nonzero(hit))
+        # NaN compares False against every clause, so it would fall through to the model.
+        invalid = np.zeros(n, dtype=bool)
+        for name in self._checked:
+            if name in columns:
+                invalid |= ~np.isfinite(columns[name])
+        if invalid.any():
+            self.stats.non_finite += int(np.count_nonzero(invalid))
+            rule[invalid & (rule < 0)] = NON_FINITE_RULE
+        violation = rule != -1
+
+        clean = ~violation
+        for r in self.nominal:
+            clean &= r.evaluate(columns)
+        ambiguous = ~(violation | clean)
+
+        stage = np.full(n, STAGE_NOMINAL, dtype=np.uint8)
+        stage[violation] = STAGE_VIOLATION
+        stage[ambiguous] = STAGE_MODEL if self.scorer is not None else STAGE_UNSCORED
+        labels = violation.astype(np.uint8)
+        self.stats.seconds["rules"] += time.perf_counter() - start
+
+        idx = np.nonzero(ambiguous)[0]
+        if len(idx) and self.scorer is not None:
+            start = time.perf_counter()
+            subset = np.column_stack([np.asarray(columns[name], dtype=np.float32)[idx] for name in self.features])
+            labels[idx] = np.asarray(self.scorer(subset), dtype=np.uint8)
+            self.stats.seconds["model"] += time.perf_counter() - start
+
+        self.stats.counts["violation"] += int(np.count_nonzero(violation))
+        self.stats.counts["nominal"] += n - int(np.count_nonzero(violation)) - len(idx)
+        self.stats.counts["model" if self.scorer is not None else "unscored"] += len(idx)
+        self.stats.batches += 1
+        return CascadeResult(labels, stage, rule)
+
+    def predict_batch(self, X) -> np.ndarray:
+        return self.run(X).labels
+
+    def explain(self, result: CascadeResult, i: int) -> str:
+        """XAI reason string for sample i of a CascadeResult."""
+        if result.stage[i] == STAGE_VIOLATION:
+            if result.rule[i] == NON_FINITE_RULE:
+                return "RULE:non_finite_feature | Missing or non-finite feature value (NaN/inf)"
+            r = self.violations[int(result.rule[i])]
+            return f"RULE:{r.name} | {r.reason}"
+        if result.stage[i] == STAGE_NOMINAL:
+            return "RULE:nominal_envelope"
+        if result.stage[i] == STAGE_UNSCORED:
+            return "UNSCORED:no_model"
+        return "MODEL:anomaly_score" if result.labels[i] else "MODEL:nominal"
+
+
+def adsb_cascade(engine, with_altitude: bool = False) -> RuleCascade:
+    """Cascade in front of an ADSBInferenceEngine (or anything with predict_model and features)."""
+    violations = ADSB_VIOLATION_RULES + ((ALTITUDE_CEILING_RULE,) if with_altitude else ())
+    return RuleCascade(violations, ADSB_NOMINAL_RULES, engine.predict_model, engine.features)
+
+
+def avionics_cascade(detector) -> RuleCascade:
+    """Cascade in front of an AvionicsAnomalyDetector."""
+    return RuleCascade(AVIONICS_VIOLATION_RULES, AVIONICS_NOMINAL_RULES, detector.predict_model, detector.features)
+
+
+if __name__ == "__main__":
+    import sys, os
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+    from adsb_spoofing import ADSBSpoofingDetector, ADSBInferenceEngine
+
+    detector = ADSBSpoofingDetector(contamination=0.05)
+    train = detector.generate_flight_data(2000)
+    detector.train_detector(train)
+    engine = ADSBInferenceEngine.from_detector(detector, envelope=False)
+
+    detector.random_state = 7
+    traffic = detector.generate_flight_data(200000)
+    X = traffic[engine.features].to_numpy(dtype=np.float32)
+
+    start = time.perf_counter()
+    baseline = engine.predict_batch(X)
+    model_only = time.perf_counter() - start
+
+    cascade = adsb_cascade(engine)
+    start = time.perf_counter()
+    labels = cascade.predict_batch(X)
+    cascaded = time.perf_counter() - start
+
+    report = cascade.stats.report()
+    print(f"[AI] Model only : {model_only * 1000:8.1f} ms | recall {baseline[traffic['label'] == 1].mean():.3f}")
+    print(f"[AI] Cascade    : {cascaded * 1000:8.1f} ms | recall {labels[traffic['label'] == 1].mean():.3f}")
+    for stage, count in report["counts"].items():
+        print(f"[AI]   {stage:9s} {count:7d} ({report['fractions'][stage]:6.1%})")
+    print(f"[AI]   rules {report['seconds']['rules'] * 1000:.1f} ms | model {report['seconds']['model'] * 1000:.1f} ms")
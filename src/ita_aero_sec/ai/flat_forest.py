@@ -0,0 +1,145 @@
+"""
+======================================================================
+WE CAN FLY - FLAT-ARRAY ISOLATION FOREST EVALUATOR (TRL-9)
+======================================================================
+Mission: Score 1-50 ADS-B feature vectors with microsecond-range
+latency. The trained sklearn IsolationForest is exported once into
+flat NumPy node arrays (feature, threshold, children, leaf path
+length) and evaluated level by level for all trees at once, without
+sklearn's per-call validation and joblib dispatch.
+
+Scores are identical to IsolationForest.score_samples /
+decision_function (same float32 input cast, same <= split rule,
+same per-tree summation order).
+
+Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
+======================================================================
+"""
+import numpy as np
+
+
+def average_path_length(n_samples) -> np.ndarray:
+    """c(n): average path length of an unsuccessful BST search over n samples (Liu et al., 2008)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    out = np.zeros(n.shape)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+class FlatIsolationForest:
+    """
+    IsolationForest exported to flat node arrays: tree t owns nodes [t * width, (t + 1) * width).
+
+    Leaves point to themselves, so every sample can take exactly `max_depth` vectorized steps
+    without masking. `children[2 * node + go_right]` is the next node and `leaf_value` holds
+    depth(leaf) + c(n_node_samples) - 1, the per-tree path length sklearn accumulates.
+    """
+    def __init__(self, feature, threshold, children, leaf_value, n_trees, max_depth, denominator, offset, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_value = leaf_value
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.offset_ = offset
+        self.n_features_in_ = n_features
+        self._roots = (np.arange(n_trees, dtype=np.intp) * (feature.shape[0] // n_trees))[:, None]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatIsolationForest":
+        """Exports a fitted sklearn IsolationForest."""
+        trees = [est.tree_ for est in model.estimators_]
+        n_trees = len(trees)
+        width = max(t.node_count for t in trees)
+
+        feature = np.zeros((n_trees, width), dtype=np.intp)
+        threshold = np.zeros((n_trees, width), dtype=np.float64)
+        children = np.repeat(np.arange(n_trees * width, dtype=np.intp).reshape(n_trees, width, 1), 2, axis=2)
+        leaf_value = np.zeros((n_trees, width), dtype=np.float64)
+        max_depth = 0
+
+        for i, (tree, features) in enumerate(zip(trees, model.estimators_features_)):
+            n = tree.node_count
+            internal = tree.children_left[:n] != -1
+            # Tree features index the bootstrap feature subset; map them back to input columns.
+            feature[i, :n][internal] = np.asarray(features)[tree.feature[:n][internal]]
+            threshold[i, :n] = tree.threshold[:n]
+            children[i, :n, 0][internal] = tree.children_left[:n][internal] + i * width
+            children[i, :n, 1][internal] = tree.children_right[:n][internal] + i * width
+
+            # Node depth with the root at 1 (children are always stored after their parent).
+            depth = np.ones(n, dtype=np.float64)
+            for node in np.nonzero(internal)[0]:
+                depth[tree.children_left[node]] = depth[tree.children_right[node]] = depth[node] + 1.0
+            leaf_value[i, :n] = depth + average_path_length(tree.n_node_samples[:n]) - 1.0
+            max_depth = max(max_depth, int(depth.max()) - 1)
+
+        denominator = n_trees * average_path_length([model.max_samples_])[0]
+        return cls(feature.ravel(), threshold.ravel(), children.ravel(), leaf_value.ravel(), n_trees,
+                   max_depth, denominator, float(model.offset_), model.n_features_in_)
+
+    def path_lengths(self, X) -> np.ndarray:
+        """Summed path length over all trees for each sample (finite inputs)."""
+        X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1, self.n_features_in_)
+        values = X.ravel()
+        row_offset = np.arange(X.shape[0], dtype=np.intp) * self.n_features_in_
+        node = np.repeat(self._roots, X.shape[0], axis=1)          # (n_trees, n_samples)
+        for _ in range(self.max_depth):
+            go_right = values[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        # Reducing over the tree axis adds trees one after another, as sklearn does.
+        return self.leaf_value[node].sum(axis=0)
+
+    def score_samples(self, X) -> np.ndarray:
+        """Same as IsolationForest.score_samples: the lower, the more abnormal."""
+        depths = self.path_lengths(X)
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-depths / self.denominator))
+
+    def decision_function(self, X) -> np.ndarray:
+        """Same as IsolationForest.decision_function: negative = outlier."""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """Same as IsolationForest.predict: -1 = outlier, 1 = inlier."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def benchmark(model, X: np.ndarray, batch_sizes=(1, 10, 50, 1000), repeats: int = 200) -> list:
+    """Median per-batch latency (ms) of sklearn vs the flat evaluator for each batch size."""
+    import time
+    flat = FlatIsolationForest.from_sklearn(model)
+    rows = []
+    for size in batch_sizes:
+        batch = X[:size]
+        timings = {}
+        for name, fn in (("sklearn", model.decision_function), ("flat", flat.decision_function)):
+            fn(batch)
+            samples = []
+            for _ in range(max(5, repeats // max(1, size // 50))):
+                start = time.perf_counter()
+                fn(batch)
+                samples.append(time.perf_counter() - start)
+            timings[name] = float(np.median(samples)) * 1000.0
+        rows.append((size, timings["sklearn"], timings["flat"]))
+    return rows
+
+
+if __name__ == "__main__":
+    from sklearn.ensemble import IsolationForest
+
+    print("[AI] Flat IsolationForest evaluator benchmark")
+    rng = np.random.default_rng(42)
+    X_train = rng.normal(size=(2000, 4))
+    X_test = rng.normal(size=(1000, 4)).astype(np.float32)
+    forest = IsolationForest(contamination=0.05, random_state=42).fit(X_train)
+
+    flat = FlatIsolationForest.from_sklearn(forest)
+    identical = np.array_equal(flat.decision_function(X_test), forest.decision_function(X_test))
+    print(f"[AI] Scores identical to sklearn: {identical} | {flat.n_trees} trees, depth <= {flat.max_depth}")
+    for size, t_sklearn, t_flat in benchmark(forest, X_test):
+        print(f"[AI] batch={size:5d} | sklearn {t_sklearn:8.3f} ms | flat {t_flat:8.3f} ms | x{t_sklearn / t_flat:5.1f}")
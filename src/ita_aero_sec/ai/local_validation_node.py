@@ -20,14 +20,17 @@ from deep_detection import DeepAnomalyDetector
 from sovereign_auditor import SovereignIA_Auditor
 from cloud_analytics import CloudAnalyticsSink
 
-def run_local_validation():
+def run_local_validation(weights_path=None):
     print("="*80)
     print("  WE CAN FLY // TRL-9 SYSTEM RE-VALIDATION (MAIN BRANCH)")
     print("="*80)
 
     # 1. Initialize Components
-    detector = DeepAnomalyDetector(sequence_length=10, features=3)
-    auditor = SovereignIA_Auditor(log_path="main_branch_forensic_audit.log")
+    detector = DeepAnomalyDetector(sequence_length=10, features=3, weights_path=weights_path)
+    if not detector.has_model:
+        print("[AI-ENGINE] [WARN] No autoencoder (TensorFlow missing, no --weights): "
+              "decisions use the physical envelope only.")
+    auditor = SovereignIA_Auditor(log_path="main_branch_forensic_audit.log", verbose=True)
     sink = CloudAnalyticsSink()
     
     # Connection attempt (will use local fallback if no credentials)
@@ -54,13 +57,14 @@ def run_local_validation():
         
         # 3. Detection Phase
         mock_seq = np.random.rand(1, 10, 3) 
-        anomaly_score = detector.detect(mock_seq)
+        anomaly_score = detector.detect(mock_seq) if detector.has_model else None
         
         decision = "VALID_TELEMETRY"
-        if anomaly_score > 0.5 or raw_telemetry["ALT"] > 55000:
+        if (anomaly_score is not None and anomaly_score > 0.5) or raw_telemetry["ALT"] > 55000:
             decision = "ANOMALOUS_SIGNAL_MITIGATED"
         
-        print(f"[AI-ENGINE] Result: {decision} (Score: {anomaly_score:.4f})")
+        score = f"{anomaly_score:.4f}" if anomaly_score is not None else "n/a, no model"
+        print(f"[AI-ENGINE] Result: {decision} (Score: {score})")
 
         # 4. Forensic Auditing Phase (ISO-27001)
         auditor.audit_decision("AVIONICS_LSTM_V1", decision, raw_telemetry)
@@ -76,9 +80,14 @@ def run_local_validation():
         
         time.sleep(1)
 
+    auditor.close()
     print("\n" + "="*80)
     print("  TRL-9 VALIDATION SUCCESSFUL - ALL MODULES SIGNED")
     print("="*80)
 
 if __name__ == "__main__":
-    run_local_validation()
+    import argparse
+    parser = argparse.ArgumentParser(description='TRL-9 local validation (detection, auditing, ingestion)')
+    parser.add_argument('--weights', type=str, default=None,
+                        help='Exported autoencoder .npz for the NumPy LSTM engine (no TensorFlow needed)')
+    run_local_validation(parser.parse_args().weights)
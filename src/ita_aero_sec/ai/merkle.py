@@ -0,0 +1,305 @@
+"""
+======================================================================
+WE CAN FLY - MERKLE BATCH SEALING & INCLUSION PROOFS (TRL-9)
+======================================================================
+Mission: Seal forensic evidence per batch instead of per event.
+Records are grouped (every N records or every T ms) into a Merkle
+tree; only the root is sealed/anchored, and each record gets an
+O(log n) inclusion proof against that root.
+
+Tree layout (RFC 6962 domain separation):
+    leaf = H(0x00 || record)      node = H(0x01 || left || right)
+    An unpaired last node is promoted to the next level unchanged,
+    so no duplicate-leaf ambiguity exists.
+
+Proof: {"leaf_index", "tree_size", "path": [sibling hex, ...]}.
+Sides are implied by leaf_index and tree_size.
+
+Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
+======================================================================
+"""
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def _bytes(record) -> bytes:
+    if isinstance(record, bytes):
+        return record
+    if isinstance(record, str):
+        return record.encode()
+    return json.dumps(record, sort_keys=True, default=str).encode()
+
+
+def leaf_hash(record, algorithm: str = "sha256") -> str:
+    """Leaf digest (hex) of a record: bytes, str, or a JSON-serializable object (sort_keys)."""
+    return hashlib.new(algorithm, LEAF_PREFIX + _bytes(record)).hexdigest()
+
+
+def _node(left: bytes, right: bytes, algorithm: str) -> bytes:
+    return hashlib.new(algorithm, NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """All levels of a Merkle tree over leaf digests (hex), leaves first."""
+    def __init__(self, leaves: Sequence[str], algorithm: str = "sha256"):
+        if not leaves:
+            raise ValueError("MerkleTree needs at least one leaf")
+        self.algorithm = algorithm
+        level = [bytes.fromhex(h) for h in leaves]
+        self.levels = [level]
+        while len(level) > 1:
+            nxt = [_node(level[i], level[i + 1], algorithm) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                nxt.append(level[-1])
+            self.levels.append(nxt)
+            level = nxt
+
+    @classmethod
+    def from_records(cls, records, algorithm: str = "sha256") -> "MerkleTree":
+        return cls([leaf_hash(r, algorithm) for r in records], algorithm)
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0].hex()
+
+    @property
+    def size(self) -> int:
+        return len(self.levels[0])
+
+    def leaf(self, index: int) -> str:
+        return self.levels[0][index].hex()
+
+    def proof(self, index: int) -> dict:
+        if not 0 <= index < self.size:
+            raise IndexError(f"leaf {index} out of range for tree of {self.size}")
+        path, i = [], index
+        for level in self.levels[:-1]:
+            sibling = i ^ 1
+            if sibling < len(level):
+                path.append(level[sibling].hex())
+            i //= 2
+        return {"leaf_index": index, "tree_size": self.size, "path": path}
+
+    def proofs(self) -> List[dict]:
+        return [self.proof(i) for i in range(self.size)]
+
+
+def verify_proof(leaf: str, proof: dict, root: str, algorithm: str = "sha256") -> bool:
+    """True if `leaf` (hex digest) is at proof['leaf_index'] of the tree with this `root`."""
+    try:
+        i, width = proof["leaf_index"], proof["tree_size"]
+        if not 0 <= i < width:
+            return False
+        h = bytes.fromhex(leaf)
+        path = [bytes.fromhex(p) for p in proof["path"]]
+    except (KeyError, TypeError, ValueError):
+        return False
+    k = 0
+    while width > 1:
+        if not (i % 2 == 0 and i == width - 1):
+            if k >= len(path):
+                return False
+            h = _node(path[k], h, algorithm) if i % 2 else _node(h, path[k], algorithm)
+            k += 1
+        i, width = i // 2, (width + 1) // 2
+    return k == len(path) and h.hex() == root
+
+
+def verify_batch(leaves: Sequence[str], proofs: Sequence[dict], root: str, algorithm: str = "sha256") -> List[bool]:
+    """
+    Verifies many proofs against one root. Nodes (and their siblings) proven by an earlier
+    proof are cached; a later proof stops hashing where it joins a verified path and only
+    compares its remaining siblings, so the cost is the union of the paths instead of k * log n.
+    Gives the same answer as verify_proof for every proof.
+    """
+    verified: Dict[tuple, bytes] = {}
+    size = None
+    results = []
+    for leaf, proof in zip(leaves, proofs):
+        try:
+            i, width = proof["leaf_index"], proof["tree_size"]
+            h = bytes.fromhex(leaf)
+            path = [bytes.fromhex(p) for p in proof["path"]]
+        except (KeyError, TypeError, ValueError):
+            results.append(False)
+            continue
+        tree_size = width     # The walk below halves `width`; the cache is keyed on the original size
+        if size is not None and tree_size != size:
+            # The cache describes the tree of the first verified proof; judge other sizes alone.
+            results.append(verify_proof(leaf, proof, root, algorithm))
+            continue
+        if not 0 <= i < width:
+            results.append(False)
+            continue
+        trail, k, level, joined, ok = [], 0, 0, False, True
+        while width > 1:
+            if not joined:
+                known = verified.get((level, i))
+                if known is not None:
+                    if known != h:
+                        ok = False
+                        break
+                    joined = True
+                else:
+                    trail.append(((level, i), h))
+            if not (i % 2 == 0 and i == width - 1):
+                if k >= len(path):
+                    ok = False
+                    break
+                sibling = path[k]
+                k += 1
+                if joined:
+                    if verified.get((level, i ^ 1)) != sibling:
+                        ok = False
+                        break
+                else:
+                    trail.append(((level, i ^ 1), sibling))
+                    h = _node(sibling, h, algorithm) if i % 2 else _node(h, sibling, algorithm)
+            i, width, level = i // 2, (width + 1) // 2, level + 1
+        ok = ok and k == len(path) and (joined or h.hex() == root)
+        if ok:
+            verified.update(trail)
+            size = tree_size
+        results.append(ok)
+    return results
+
+
+@dataclass
+class SealedBatch:
+    batch_id: int
+    root: str
+    size: int
+    tree: MerkleTree
+    sealed_at: float = field(default_factory=time.time)
+    build_s: float = 0.0
+
+
+class MerkleAccumulator:
+    """
+    Groups records into Merkle batches and seals each batch once.
+
+    Args:
+        on_seal: Callback receiving each SealedBatch (anchor the root here).
+        max_records: Seal when this many records are pending.
+        max_delay_ms: Seal when the oldest pending record is this old (background timer;
+                      None disables time-based sealing).
+        retain: Sealed batches kept in memory for proof lookups (None keeps all).
+        lock: Lock shared with the owner when on_seal writes into state the owner also
+              guards (one lock, one acquisition order); a private RLock otherwise.
+    """
+    def __init__(self, on_seal: Optional[Callable[[SealedBatch], None]] = None, max_records: int = 1024,
+                 max_delay_ms: Optional[float] = None, algorithm: str = "sha256", retain: Optional[int] = 64,
+                 lock=None):
+        self.on_seal = on_seal
+        self.max_records = max(1, int(max_records))
+        self.max_delay_s = None if max_delay_ms is None else max_delay_ms / 1000.0
+        self.algorithm = algorithm
+        self.retain = retain
+        self.batches: Dict[int, SealedBatch] = {}
+        self.stats = {"records": 0, "batches": 0, "seal_s_total": 0.0}
+        self._pending: List[str] = []
+        self._oldest = None
+        self._next_batch = 0
+        self._lock = lock or threading.RLock()
+        self._stop = threading.Event()
+        self._timer = None
+        if self.max_delay_s is not None:
+            self._timer = threading.Thread(target=self._timer_loop, name="merkle-seal", daemon=True)
+            self._timer.start()
+
+    def add(self, record) -> tuple:
+        """Queues one record; returns (batch_id, leaf_index) for the proof lookup after sealing."""
+        digest = leaf_hash(record, self.algorithm)
+        with self._lock:
+            ticket = (self._next_batch, len(self._pending))
+            self._pending.append(digest)
+            if self._oldest is None:
+                self._oldest = time.perf_counter()
+            if len(self._pending) >= self.max_records:
+                self._seal_locked()
+        return ticket
+
+    def _seal_locked(self) -> Optional[SealedBatch]:
+        if not self._pending:
+            return None
+        start = time.perf_counter()
+        tree = MerkleTree(self._pending, self.algorithm)
+        batch = SealedBatch(self._next_batch, tree.root, tree.size, tree, build_s=time.perf_counter() - start)
+        self._pending, self._oldest = [], None
+        self._next_batch += 1
+        self.batches[batch.batch_id] = batch
+        while self.retain is not None and len(self.batches) > self.retain:
+            self.batches.pop(min(self.batches))
+        self.stats["records"] += batch.size
+        self.stats["batches"] += 1
+        self.stats["seal_s_total"] += batch.build_s
+        if self.on_seal is not None:
+            self.on_seal(batch)
+        return batch
+
+    def _timer_loop(self) -> None:
+        while not self._stop.wait(self.max_delay_s / 2):
+            with self._lock:
+                if self._oldest is not None and time.perf_counter() - self._oldest >= self.max_delay_s:
+                    self._seal_locked()
+
+    def flush(self) -> Optional[SealedBatch]:
+        """Seals whatever is pending now."""
+        with self._lock:
+            return self._seal_locked()
+
+    def proof(self, batch_id: int, leaf_index: int) -> dict:
+        """Inclusion proof of a sealed record, with its leaf digest and batch root."""
+        with self._lock:
+            batch = self.batches.get(batch_id)
+        if batch is None:
+            raise KeyError(f"batch {batch_id} is pending or no longer retained")
+        return dict(batch.tree.proof(leaf_index), leaf=batch.tree.leaf(leaf_index), root=batch.root,
+                    batch_id=batch_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def close(self) -> Optional[SealedBatch]:
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        return self.flush()
+
+
+if __name__ == "__main__":
+    import random
+
+    sealed = []
+    acc = MerkleAccumulator(on_seal=sealed.append, max_records=4096)
+    records = [{"icao": f"0x{i:06X}", "alt": 35000 + i % 900, "seq": i} for i in range(100000)]
+    start = time.perf_counter()
+    tickets = [acc.add(r) for r in records]
+    acc.close()
+    elapsed = time.perf_counter() - start
+    print(f"[AI] {len(records):,} records -> {len(sealed)} sealed roots in {elapsed * 1000:.0f} ms "
+          f"(tree build {acc.stats['seal_s_total'] * 1000:.0f} ms)")
+
+    batch = sealed[0]
+    proof = acc.proof(*tickets[1234])
+    print(f"[AI] Proof for record 1234: {len(proof['path'])} siblings | valid "
+          f"{verify_proof(proof['leaf'], proof, batch.root)}")
+
+    picks = random.Random(0).sample(range(batch.size), 1000)
+    proofs = [batch.tree.proof(i) for i in picks]
+    leaves = [batch.tree.leaf(i) for i in picks]
+    start = time.perf_counter()
+    single = all(verify_proof(l, p, batch.root) for l, p in zip(leaves, proofs))
+    t_single = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = all(verify_batch(leaves, proofs, batch.root))
+    t_batch = time.perf_counter() - start
+    print(f"[AI] 1000 proofs: one-by-one {t_single * 1000:.1f} ms ({single}) | batch {t_batch * 1000:.1f} ms ({batched})")
@@ -0,0 +1,200 @@
+"""
+======================================================================
+WE CAN FLY - ONLINE RETRAINER (SLIDING WINDOW / RESERVOIR)
+======================================================================
+Mission: Follow traffic drift without stopping the scoring path.
+Recent nominal feature vectors are kept in a fixed-size window;
+a background thread periodically refits clones of the scaler and
+model and publishes them with the target's atomic swap(model, scaler)
+(ADSBInferenceEngine, AvionicsAnomalyDetector).
+
+- Scoring threads only append to the window and never wait on it:
+  if the window is being snapshotted, the samples are dropped.
+- Refits run on one thread with BLAS/OpenMP pools capped through
+  threadpoolctl and at most once per `min_interval_s`.
+
+Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
+======================================================================
+"""
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
+
+
+class SampleWindow:
+    """
+    Fixed-capacity feature buffer.
+    policy='sliding' keeps the most recent `capacity` rows (ring buffer);
+    policy='reservoir' keeps a uniform sample of everything seen (Algorithm R).
+    """
+    def __init__(self, capacity: int, n_features: int, policy: str = 'sliding', seed: Optional[int] = None):
+        if policy not in ('sliding', 'reservoir'):
+            raise ValueError(f"Unknown window policy '{policy}'")
+        self.capacity = capacity
+        self.policy = policy
+        self.seen = 0
+        self._data = np.zeros((capacity, n_features), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.seen, self.capacity)
+
+    def add(self, X: np.ndarray, blocking: bool = True) -> bool:
+        """Appends rows. With blocking=False returns False instead of waiting for a snapshot."""
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self._data.shape[1])
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            n = X.shape[0]
+            position = self.seen + np.arange(n)
+            if self.policy == 'sliding':
+                if n > self.capacity:
+                    X, position = X[-self.capacity:], position[-self.capacity:]
+                self._data[position % self.capacity] = X
+            else:
+                # Row k of the stream lands in slot k while filling, then replaces a random slot
+                # with probability capacity / (k + 1). Duplicate targets resolve last-wins, as in order.
+                slot = np.where(position < self.capacity, position,
+                                (self._rng.random(n) * (position + 1)).astype(np.int64))
+                keep = slot < self.capacity
+                self._data[slot[keep]] = X[keep]
+            self.seen += n
+            return True
+        finally:
+            self._lock.release()
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the retained rows."""
+        with self._lock:
+            return self._data[:len(self)].copy()
+
+
+class OnlineRetrainer:
+    """
+    Background refit of a (scaler, model) pair on a window of recent nominal samples.
+
+    Args:
+        target: Object exposing swap(model, scaler), e.g. ADSBInferenceEngine.
+        model, scaler: Fitted or unfitted estimators used as templates (sklearn.clone).
+        features: Column names the scaler is fitted with (keeps feature-name checks consistent).
+        min_samples: Window rows required before the first refit.
+        retrain_every: New nominal rows required between refits.
+        min_interval_s: Lower bound between refits (bounds retrain CPU duty cycle).
+        threads: BLAS/OpenMP threads allowed during a refit.
+    """
+    def __init__(self, target, model, scaler, features: Sequence[str], capacity: int = 5000,
+                 policy: str = 'sliding', min_samples: int = 500, retrain_every: int = 1000,
+                 min_interval_s: float = 30.0, threads: int = 1, seed: Optional[int] = None):
+        self.target = target
+        self.model_template = clone(model)
+        self.scaler_template = clone(scaler)
+        self.features = list(features)
+        self.window = SampleWindow(capacity, len(self.features), policy, seed)
+        self.min_samples = min_samples
+        self.retrain_every = retrain_every
+        self.min_interval_s = min_interval_s
+        self.threads = threads
+        self.stats = {"retrains": 0, "dropped": 0, "errors": 0, "last_fit_s": 0.0, "last_fit_rows": 0}
+        self._seen_at_fit = 0
+        self._last_fit = -np.inf
+        self._wakeup = threading.Event()
+        self._running = False
+        self._worker: Optional[threading.Thread] = None
+
+    def observe(self, X: np.ndarray, labels: Optional[np.ndarray] = None) -> None:
+        """
+        Feeds scored traffic. Rows flagged anomalous (labels == 1) are excluded so attacks
+        do not teach the model. Never blocks the caller.
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, len(self.features))
+        if labels is not None:
+            X = X[np.asarray(labels).reshape(-1) == 0]
+        if not len(X):
+            return
+        if not self.window.add(X, blocking=False):
+            self.stats["dropped"] += len(X)
+            return
+        if self.due():
+            self._wakeup.set()
+
+    def due(self) -> bool:
+        return (len(self.window) >= self.min_samples
+                and self.window.seen - self._seen_at_fit >= self.retrain_every
+                and time.monotonic() - self._last_fit >= self.min_interval_s)
+
+    def retrain_now(self) -> bool:
+        """Refits synchronously on the current window and swaps the result into the target."""
+        seen = self.window.seen
+        X = self.window.snapshot()
+        if len(X) < self.min_samples:
+            return False
+        start = time.perf_counter()
+        with threadpool_limits(limits=self.threads):
+            scaler = clone(self.scaler_template)
+            model = clone(self.model_template)
+            model.fit(scaler.fit_transform(pd.DataFrame(X, columns=self.features)))
+        self.target.swap(model, scaler)
+        self._seen_at_fit = seen
+        self._last_fit = time.monotonic()
+        self.stats["retrains"] += 1
+        self.stats["last_fit_s"] = time.perf_counter() - start
+        self.stats["last_fit_rows"] = len(X)
+        return True
+
+    def start(self) -> "OnlineRetrainer":
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="online-retrainer", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self) -> None:
+        while self._running:
+            # Periodic re-check covers the min-interval case where no new observe() arrives.
+            self._wakeup.wait(timeout=max(0.05, min(self.min_interval_s, 1.0)))
+            self._wakeup.clear()
+            if not self._running or not self.due():
+                continue
+            try:
+                self.retrain_now()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[AI] [RETRAIN] Refit failed, live model kept: {e}")
+
+
+if __name__ == "__main__":
+    import sys, os
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+    from adsb_spoofing import ADSBSpoofingDetector, ADSBInferenceEngine
+
+    detector = ADSBSpoofingDetector(contamination=0.05)
+    detector.train_detector(detector.generate_flight_data(2000))
+    engine = ADSBInferenceEngine.from_detector(detector)
+    retrainer = OnlineRetrainer(engine, detector.model, detector.scaler, detector.features,
+                                min_samples=1000, retrain_every=1000, min_interval_s=0.2).start()
+
+    rng = np.random.default_rng(0)
+    print("[AI] Streaming traffic whose RSSI drifts from -50 to -60 dBm...")
+    for step in range(40):
+        rssi = -50.0 - step * 0.25
+        X = np.column_stack([rng.normal(0, 50, 500), rng.normal(0, 10, 500),
+                             rng.normal(rssi, 5, 500), rng.normal(20, 5, 500)]).astype(np.float32)
+        labels = engine.predict_batch(X)
+        retrainer.observe(X, labels)
+        if step % 10 == 9:
+            print(f"[AI] step {step + 1:2d} | RSSI {rssi:6.1f} dBm | flagged {labels.mean():6.1%} | "
+                  f"retrains {retrainer.stats['retrains']}")
+        time.sleep(0.05)
+    retrainer.stop()
+    print(f"[AI] [SUCCESS] {retrainer.stats}")
@@ -5,31 +5,336 @@ WE CAN FLY - ISO 27001 AUDITOR & FORENSIC CHAIN-OF-CUSTODY (TRL-9)
 Mission: Forensic Audit of AI Decisions / Sovereign Local Training.
 Each decision to negate a command has an immutable chain of hashes.
 
+Records are appended through a GroupCommitWriter: one long-lived file
+handle, records batched into group commits with an fsync policy:
+    "always"   - write + fsync per record (strictest, slowest)
+    "count"    - commit every `batch_records` records, or once the oldest
+                 pending record is `max_delay_ms` old
+    "interval" - commit when the oldest pending record is `interval_ms` old
+
+On start-up the chain tail (last hash + sequence number) is recovered by
+reading backward from the end of the log, so restarts never fork the
+chain. A torn final line from a crash is reported, moved to
+`<log>.torn` and truncated away. A file that is not a chain log (e.g.
+plain-text logger output) is reported and the auditor refuses to start
+on it; it is never renamed or written. The chain log has its own
+default path (DEFAULT_LOG_PATH), apart from the text loggers'.
+
+With merkle_batch > 0 the record signatures are also accumulated into
+Merkle batches; each sealed root is written into the chain as a
+MERKLE_SEAL record (the only record that needs external anchoring) and
+every covered record has an O(log n) inclusion proof.
+
 Compliance: ISO 27001, DECEA 2030, EU AI Act
 Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
 ======================================================================
 """
+import atexit
 import hashlib
 import json
+import os
+import threading
 import time
 from datetime import datetime
 
+try:
+    from .merkle import MerkleAccumulator
+except ImportError:
+    from merkle import MerkleAccumulator
+
+FSYNC_POLICIES = ("always", "count", "interval")
+GENESIS_HASH = "0" * 64
+TAIL_BLOCK = 4096
+
+
+def _last_line(f, end: int, block: int = TAIL_BLOCK):
+    """(start offset, bytes) of the newline-terminated line ending at `end`, read backward in blocks."""
+    pos, buf = end - 1, b""   # end - 1 is that line's own newline
+    while pos > 0:
+        step = min(block, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+        cut = buf.rfind(b"\n")
+        if cut >= 0:
+            return pos + cut + 1, buf[cut + 1:]
+    return 0, buf
+
+
+def _is_signed_record(line: bytes) -> bool:
+    try:
+        return "forensic_signature" in json.loads(line)
+    except (ValueError, TypeError):
+        return False
+
+
+def recover_chain_tail(path, repair=True, block=TAIL_BLOCK) -> dict:
+    """
+    Recovers the chain tail of an audit log in O(1): only the final record is read,
+    backward from the end of the file, independent of the log size.
+
+    Returns a dict with last_hash, seq (of the last record, -1 for an empty log),
+    torn_bytes (length of an unterminated final fragment, 0 if none) and status
+    ("empty", "ok", "repaired", "torn" or "legacy"). With repair=True a torn fragment
+    is copied to `<path>.torn` and truncated from the log.
+    A file whose first line is not a signed record (a plain-text log) gets status
+    "legacy" and is left untouched.
+    Raises ValueError when a chain log ends in a complete line that is not a signed record.
+    """
+    tail = {"last_hash": GENESIS_HASH, "seq": -1, "torn_bytes": 0, "status": "empty"}
+    if not os.path.exists(path):
+        return tail
+    with open(path, "rb") as f:
+        first = f.readline()
+    if first.endswith(b"\n") and not _is_signed_record(first):
+        # Not a forensic chain (e.g. plain-text logger output): nothing to resume, nothing to repair.
+        tail["status"] = "legacy"
+        return tail
+    with open(path, "r+b" if repair else "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return tail
+        end = size
+        f.seek(size - 1)
+        if f.read(1) != b"\n":
+            # Crash mid-write: the bytes after the last newline never formed a record.
+            end, _ = _last_line(f, size + 1, block)
+            tail["torn_bytes"] = size - end
+            tail["status"] = "torn"
+            if repair:
+                f.seek(end)
+                fragment = f.read()
+                with open(path + ".torn", "ab") as torn:
+                    torn.write(fragment + b"\n")
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+                tail["status"] = "repaired"
+            if end == 0:
+                return tail
+        start, line = _last_line(f, end, block)
+        try:
+            record = json.loads(line)
+            tail["last_hash"] = record["forensic_signature"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Corrupt audit record at byte {start} of {path}: {e} "
+                             f"(is another writer appending to the chain log?)") from e
+        if tail["status"] == "empty":
+            tail["status"] = "ok"
+        if "seq" in record:
+            tail["seq"] = int(record["seq"])
+        else:
+            # Logs written before sequence numbers existed: count once, new records carry seq.
+            f.seek(0)
+            tail["seq"] = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1
+    return tail
+
+
+class GroupCommitWriter:
+    """
+    Append-only line writer with group commit. Records are buffered in arrival order and
+    written + fsynced together, so one write/fsync pair is amortized over the whole group.
+    A background flusher commits idle tails within `interval_ms` ("interval") or
+    `max_delay_ms` ("count"), so a lone record is never held indefinitely.
+
+    A failed commit (OSError) is cut back to the group's start offset and its records stay
+    queued in order; the error is raised and the next commit retries them.
+    """
+    def __init__(self, path, fsync="count", batch_records=64, interval_ms=10.0, max_delay_ms=100.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got '{fsync}'")
+        self.path = path
+        self.fsync = fsync
+        self.batch_records = 1 if fsync == "always" else max(1, int(batch_records))
+        self.interval_s = interval_ms / 1000.0
+        self.max_delay_s = {"interval": self.interval_s, "count": max_delay_ms / 1000.0}.get(fsync)
+        self._file = open(path, "ab", buffering=0)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._closed = False
+        self.last_error = None
+        self.stats = {"records": 0, "bytes": 0, "commits": 0, "fsyncs": 0, "errors": 0,
+                      "commit_s_total": 0.0, "commit_s_max": 0.0}
+        self._opened_at = time.perf_counter()
+        self._stop = threading.Event()
+        self._flusher = None
+        if self.max_delay_s is not None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="audit-group-commit", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, line: str) -> None:
+        """Queues one record (newline added); commits when the policy says so."""
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"GroupCommitWriter for {self.path} is closed")
+            self._pending.append(line.encode() + b"\n")
+            if self._oldest is None:
+                self._oldest = time.perf_counter()
+            if len(self._pending) >= self.batch_records or (
+                    self.max_delay_s is not None and time.perf_counter() - self._oldest >= self.max_delay_s):
+                self._commit_locked()
+
+    def _commit_locked(self) -> None:
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        data = b"".join(self._pending)
+        n = len(self._pending)
+        offset = self._file.seek(0, os.SEEK_END)
+        try:
+            view, done = memoryview(data), 0
+            while done < len(view):
+                done += self._file.write(view[done:])
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.stats["errors"] += 1
+            self.last_error = e
+            try:
+                # Drop the partial group so the retry does not duplicate or split records.
+                self._file.truncate(offset)
+            except OSError:
+                pass
+            raise
+        # Only a durable group leaves the queue.
+        self._pending.clear()
+        self._oldest = None
+        elapsed = time.perf_counter() - start
+        self.stats["records"] += n
+        self.stats["bytes"] += len(data)
+        self.stats["commits"] += 1
+        self.stats["fsyncs"] += 1
+        self.stats["commit_s_total"] += elapsed
+        self.stats["commit_s_max"] = max(self.stats["commit_s_max"], elapsed)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.max_delay_s / 2):
+            with self._lock:
+                if self._oldest is not None and time.perf_counter() - self._oldest >= self.max_delay_s:
+                    try:
+                        self._commit_locked()
+                    except OSError as e:
+                        print(f"[AUDITOR] [ERROR] Group commit failed, {len(self._pending)} records kept "
+                              f"for retry: {e}")
+
+    def flush(self) -> None:
+        """Commits every pending record now (durability barrier)."""
+        with self._lock:
+            self._commit_locked()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def counters(self) -> dict:
+        """Throughput and commit-latency counters since the writer was opened."""
+        with self._lock:
+            stats = dict(self.stats, pending=len(self._pending))
+        elapsed = time.perf_counter() - self._opened_at
+        commits = stats["commits"]
+        stats["records_per_s"] = stats["records"] / elapsed if elapsed > 0 else 0.0
+        stats["records_per_commit"] = stats["records"] / commits if commits else 0.0
+        stats["commit_ms_mean"] = stats["commit_s_total"] / commits * 1000 if commits else 0.0
+        stats["commit_ms_max"] = stats["commit_s_max"] * 1000
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            try:
+                self._commit_locked()
+            finally:
+                self._file.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+DEFAULT_LOG_PATH = "sovereign_forensic_chain.jsonl"
+
+
 class SovereignIA_Auditor:
-    def __init__(self, log_path="trl9_civil_aviation_audit.log"):
+    def __init__(self, log_path=DEFAULT_LOG_PATH, fsync="count", batch_records=64,
+                 interval_ms=10.0, verbose=False, merkle_batch=0, merkle_ms=None, max_delay_ms=100.0):
         self.log_path = log_path
-        self.last_hash = "0" * 64 # Genesis Hash
+        self.verbose = verbose
+        # Resume the existing chain (Genesis Hash for a new log) instead of forking it.
+        self.recovery = recover_chain_tail(log_path)
+        self.last_hash = self.recovery["last_hash"]
+        self.seq = self.recovery["seq"]
+        if self.recovery["status"] == "legacy":
+            print(f"[AUDITOR] [ERROR] {log_path} is not a forensic chain log (plain text or another format)")
+            raise ValueError(f"{log_path} is not a forensic chain log; refusing to write a chain into it "
+                             f"(pass another log_path or move the file aside)")
+        if self.recovery["torn_bytes"]:
+            print(f"[AUDITOR] [WARNING] Torn final record ({self.recovery['torn_bytes']} bytes) in {log_path}; "
+                  f"moved to {log_path}.torn, chain resumed at seq {self.seq}")
+        self.writer = GroupCommitWriter(log_path, fsync=fsync, batch_records=batch_records, interval_ms=interval_ms,
+                                        max_delay_ms=max_delay_ms)
+        # Hashing and queueing happen under one lock so file order always matches chain order.
+        # Re-entrant: Merkle seals append their record from inside audit_decision or the seal timer.
+        self._chain_lock = threading.RLock()
+        self.merkle = None
+        self._batch_first_seq = {}
+        if merkle_batch > 0:
+            self.merkle = MerkleAccumulator(on_seal=self._seal_batch, max_records=merkle_batch,
+                                            max_delay_ms=merkle_ms, lock=self._chain_lock)
 
     def audit_decision(self, logic_component, decision_type, raw_telemetry):
         """
         Registers an immutable record of an AI decision in a forensic chain.
         Each log entry contains the hash of the PREVIOUS entry.
         """
-        timestamp = datetime.utcnow().isoformat()
-        
         # LGPD PII Anonymization
         sanitized_telemetry = {k: v for k, v in raw_telemetry.items() if "PII" not in k}
-        
+
+        with self._chain_lock:
+            current_hash = self._append(logic_component, decision_type, sanitized_telemetry)
+            if self.merkle is not None:
+                batch_id, leaf_index = self.merkle.add(current_hash)
+                if leaf_index == 0:
+                    self._batch_first_seq[batch_id] = self.seq
+            return current_hash
+
+    def _seal_batch(self, batch):
+        """Writes the sealed Merkle root into the chain; runs under the chain lock."""
+        first_seq = self._batch_first_seq[batch.batch_id]
+        for old in [b for b in self._batch_first_seq if b not in self.merkle.batches]:
+            del self._batch_first_seq[old]
+        self._append("MERKLE_ACCUMULATOR", "MERKLE_SEAL", {
+            "batch_id": batch.batch_id, "merkle_root": batch.root, "leaf_count": batch.size,
+            "first_seq": first_seq, "last_seq": first_seq + batch.size - 1,
+        })
+        if self.verbose:
+            print(f"[AUDITOR] [SUCCESS] Merkle batch {batch.batch_id} sealed: {batch.size} records, "
+                  f"root {batch.root[:16]}...")
+
+    def inclusion_proof(self, seq):
+        """O(log n) proof that record `seq` is under a sealed Merkle root (leaf = its forensic_signature)."""
+        if self.merkle is None:
+            raise ValueError("Merkle batching is disabled (merkle_batch=0)")
+        with self._chain_lock:
+            for batch_id, first_seq in self._batch_first_seq.items():
+                batch = self.merkle.batches.get(batch_id)
+                if batch is not None and first_seq <= seq < first_seq + batch.size:
+                    return dict(self.merkle.proof(batch_id, seq - first_seq), seq=seq)
+        raise KeyError(f"record {seq} is not in a sealed, retained Merkle batch")
+
+    def _append(self, logic_component, decision_type, sanitized_telemetry):
+        timestamp = datetime.utcnow().isoformat()
         record = {
+            "seq": self.seq + 1,
             "timestamp": timestamp,
             "logic_node": logic_component,
             "decision": decision_type,
@@ -42,16 +347,48 @@ class SovereignIA_Auditor:
         current_hash = hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
         record["forensic_signature"] = current_hash
         self.last_hash = current_hash
+        self.seq += 1
         
-        # Save to local persistent log (ISO 27001 Ready)
+        # Save to local persistent log (ISO 27001 Ready). On a failed commit the record stays
+        # queued in chain order for the next commit, and the caller sees the error.
         try:
-            with open(self.log_path, "a") as f:
-                f.write(json.dumps(record) + "\n")
+            self.writer.append(json.dumps(record))
+        except OSError as e:
+            print(f"[AUDITOR] [ERROR] Forensic log commit failed ({self.writer.pending} records pending retry): {e}")
+            raise
+        if self.verbose:
             print(f"[AUDITOR] [SUCCESS] ISO-27001 Log Signed: {current_hash[:16]}...")
-        except Exception as e:
-            print(f"[AUDITOR] [ERROR] Failed to write forensic log: {e}")
+        return current_hash
+
+    def flush(self):
+        """Seals the open Merkle batch and forces pending records to disk (call before handing the log to an investigator)."""
+        if self.merkle is not None:
+            self.merkle.flush()
+        self.writer.flush()
+
+    def counters(self):
+        return self.writer.counters()
+
+    def close(self):
+        if self.merkle is not None:
+            self.merkle.close()
+        self.writer.close()
 
 if __name__ == "__main__":
-    auditor = SovereignIA_Auditor()
+    auditor = SovereignIA_Auditor(verbose=True)
     mock_telemetry = {"ALT": 35000, "VEL": 450, "STATUS": "CRUISE"}
     auditor.audit_decision("AVIONICS_SVM", "NEGATION_SUCCESSFUL", mock_telemetry)
+    auditor.close()
+
+    import tempfile
+    for policy in FSYNC_POLICIES:
+        path = os.path.join(tempfile.mkdtemp(), f"audit_{policy}.log")
+        bench = SovereignIA_Auditor(log_path=path, fsync=policy)
+        n = 200 if policy == "always" else 20000
+        for i in range(n):
+            bench.audit_decision("AVIONICS_SVM", "VALID_TELEMETRY", {"ALT": 35000 + i, "VEL": 450})
+        bench.close()
+        c = bench.counters()
+        print(f"[AUDITOR] fsync={policy:8s} {c['records_per_s']:>10,.0f} rec/s | "
+              f"{c['records_per_commit']:6.1f} rec/commit | commit mean {c['commit_ms_mean']:.3f} ms "
+              f"max {c['commit_ms_max']:.3f} ms")
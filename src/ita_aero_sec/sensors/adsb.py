@@ -1,6 +1,6 @@
 import numpy as np
 from dataclasses import dataclass
-from typing import Generator
+from typing import Generator, Optional
 import time
 from ..utils.logger import logger
 
@@ -14,6 +14,42 @@ class ADSBPacket:
     timestamp: float
     is_spoofed: bool = False
 
+@dataclass(slots=True)
+class CompactADSBPacket:
+    """__slots__ variant of ADSBPacket (no per-instance __dict__) for high-rate edge ingestion."""
+    icao24: int         # 24-bit ICAO address as an integer
+    callsign: str
+    altitude: float
+    velocity: float
+    rssi: float
+    timestamp: float
+    is_spoofed: bool = False
+
+@dataclass
+class ADSBTrackBlock:
+    """
+    Struct-of-arrays snapshot of every simulated track at a single time step.
+    Index ``i`` of each array describes the same aircraft.
+    """
+    step: int
+    timestamp: float
+    icao24: np.ndarray          # uint32, 24-bit ICAO addresses
+    altitude: np.ndarray        # float32, ft
+    velocity: np.ndarray        # float32, knots
+    altitude_delta: np.ndarray  # float32, ft since previous step
+    velocity_delta: np.ndarray  # float32, knots since previous step
+    rssi: np.ndarray            # float32, dBm
+    latency_ms: np.ndarray      # float32, RF propagation delay
+    is_spoofed: np.ndarray      # bool
+
+    def __len__(self) -> int:
+        return self.icao24.shape[0]
+
+    def to_record_batch(self):
+        """Packs the block into the columnar ADS-B record layout."""
+        from .records import RecordBatch
+        return RecordBatch.from_track_block(self)
+
 class ADSBSensor:
     """
     Simulates an ADS-B Receiver/Transponder environment.
@@ -75,4 +111,64 @@ class ADSBSensor:
                 is_spoofed=is_spoof
             )
             
-            yield packet
\ No newline at end of file
+            yield packet
+
+    def stream_flight_batches(self, n_tracks: int = 10000, duration_sec: int = 100,
+                              anomaly_prob: float = 0.1, base_icao: int = 0xE48C01,
+                              seed: Optional[int] = None) -> Generator[ADSBTrackBlock, None, None]:
+        """
+        Yields one struct-of-arrays block per time step for N concurrent tracks.
+        Same physics as stream_flight_data(), advanced with NumPy for the whole airspace at once.
+
+        Args:
+            n_tracks (int): Number of concurrent aircraft to simulate.
+            duration_sec (int): Number of time steps to simulate.
+            anomaly_prob (float): Per-track probability of a spoofed packet at each step.
+            base_icao (int): First ICAO24 address; tracks receive consecutive addresses.
+            seed (int): Optional seed for reproducible airspace scenarios.
+        """
+        rng = np.random.default_rng(seed)
+        icao24 = ((base_icao + np.arange(n_tracks, dtype=np.uint32)) & 0xFFFFFF).astype(np.uint32)
+
+        # Initial Physics State (Cruise Phase, spread across flight levels)
+        current_alt = rng.normal(32000.0, 3000.0, n_tracks)
+        current_vel = rng.normal(480.0, 25.0, n_tracks)
+
+        logger.info(f"Starting batch telemetry stream. Tracks: {n_tracks}, Steps: {duration_sec}, Anomaly Prob: {anomaly_prob}")
+        total_spoofed = 0
+
+        for t in range(duration_sec):
+            is_spoof = rng.random(n_tracks) < anomaly_prob
+
+            # NORMAL: Smooth physics constraints / ANOMALY: Physics violation (teleportation)
+            alt_delta = rng.normal(0.0, np.where(is_spoof, 2000.0, 50.0))
+            vel_delta = rng.normal(0.0, np.where(is_spoof, 500.0, 10.0))
+            rssi = np.where(is_spoof, rng.normal(-90.0, 10.0, n_tracks), rng.normal(-50.0, 5.0, n_tracks))
+            latency = np.where(is_spoof, rng.normal(250.0, 50.0, n_tracks), rng.normal(20.0, 5.0, n_tracks))
+
+            packet_alt = current_alt + alt_delta
+            packet_vel = current_vel + vel_delta
+
+            # Spoofs are transient glitches: only authentic packets update the momentum state
+            current_alt = np.where(is_spoof, current_alt, packet_alt)
+            current_vel = np.where(is_spoof, current_vel, packet_vel)
+
+            n_spoof = int(np.count_nonzero(is_spoof))
+            total_spoofed += n_spoof
+            if n_spoof:
+                logger.debug(f"Injector: {n_spoof} SPOOFED packets at step={t}")
+
+            yield ADSBTrackBlock(
+                step=t,
+                timestamp=time.time(),
+                icao24=icao24,
+                altitude=packet_alt.astype(np.float32),
+                velocity=packet_vel.astype(np.float32),
+                altitude_delta=alt_delta.astype(np.float32),
+                velocity_delta=vel_delta.astype(np.float32),
+                rssi=rssi.astype(np.float32),
+                latency_ms=latency.astype(np.float32),
+                is_spoofed=is_spoof
+            )
+
+        logger.info(f"Batch telemetry stream complete. {total_spoofed} spoofed packets injected across {n_tracks} tracks.")
@@ -0,0 +1,206 @@
+"""
+Bit-accurate ARINC 429 word codec over uint32 NumPy arrays.
+
+Word layout (bit 1 = LSB):
+    1-8   Label (octal, transmitted MSB first -> stored bit-reversed)
+    9-10  SDI
+    11-29 Data (BNR two's complement with sign at bit 29 / BCD digits / discretes)
+    30-31 SSM
+    32    Odd parity
+Labels are referred to by their octal reading as an int (e.g. 203, 270), as in ArincWord.
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+BNR, BCD, DISCRETE = 1, 2, 3
+
+# Word states returned by word_state()
+STATE_VALID = 0
+STATE_PARITY_ERROR = 1
+STATE_FAILURE_WARNING = 2
+STATE_NO_COMPUTED_DATA = 3
+STATE_FUNCTIONAL_TEST = 4
+STATE_UNKNOWN_LABEL = 5
+STATE_NAMES = ("VALID", "PARITY_ERROR", "FAILURE", "NO_COMPUTED_DATA", "FUNCTIONAL_TEST", "UNKNOWN_LABEL")
+
+# SSM codes
+SSM_BNR_FAILURE, SSM_BNR_NCD, SSM_BNR_TEST, SSM_BNR_NORMAL = 0, 1, 2, 3
+SSM_BCD_PLUS, SSM_BCD_NCD, SSM_BCD_TEST, SSM_BCD_MINUS = 0, 1, 2, 3
+SSM_DIS_NORMAL, SSM_DIS_NCD, SSM_DIS_TEST, SSM_DIS_FAILURE = 0, 1, 2, 3
+
+
+@dataclass(frozen=True)
+class LabelSpec:
+    name: str
+    encoding: int
+    unit: str
+    sig_bits: int = 0        # BNR significant bits (excluding sign)
+    full_scale: float = 0.0  # BNR range: MSB weight is full_scale / 2
+    digits: int = 0          # BCD significant digits
+    resolution: float = 1.0  # BCD LSD weight
+
+
+# Per-label scaling table (GAMA / ARINC 429 Part 1 conventions)
+LABEL_SPECS: Dict[int, LabelSpec] = {
+    0o001: LabelSpec("Distance To Go", BCD, "NM", digits=5, resolution=0.1),
+    0o012: LabelSpec("Ground Speed (BCD)", BCD, "knots", digits=4, resolution=1.0),
+    0o203: LabelSpec("Pressure Altitude", BNR, "ft", sig_bits=17, full_scale=131072.0),
+    0o204: LabelSpec("Baro Corrected Altitude", BNR, "ft", sig_bits=17, full_scale=131072.0),
+    0o205: LabelSpec("Mach", BNR, "mach", sig_bits=16, full_scale=4.096),
+    0o206: LabelSpec("Computed Airspeed", BNR, "knots", sig_bits=14, full_scale=1024.0),
+    0o210: LabelSpec("True Airspeed", BNR, "knots", sig_bits=15, full_scale=2048.0),
+    0o212: LabelSpec("Altitude Rate", BNR, "ft/min", sig_bits=11, full_scale=32768.0),
+    0o270: LabelSpec("Landing Gear Discrete", DISCRETE, "discrete"),
+    0o310: LabelSpec("Present Position Latitude", BNR, "deg", sig_bits=18, full_scale=180.0),
+    0o311: LabelSpec("Present Position Longitude", BNR, "deg", sig_bits=18, full_scale=180.0),
+    0o312: LabelSpec("Ground Speed", BNR, "knots", sig_bits=15, full_scale=4096.0),
+    0o313: LabelSpec("Track Angle True", BNR, "deg", sig_bits=12, full_scale=180.0),
+    0o314: LabelSpec("True Heading", BNR, "deg", sig_bits=12, full_scale=180.0),
+    0o324: LabelSpec("Pitch Angle", BNR, "deg", sig_bits=14, full_scale=180.0),
+    0o325: LabelSpec("Roll Angle", BNR, "deg", sig_bits=14, full_scale=180.0),
+}
+
+# Lookup tables indexed by the 8-bit label code (0-255)
+_REV8 = np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint32)
+_POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+LABEL_CODE_TO_OCTAL = np.array([int(f"{i:o}") for i in range(256)], dtype=np.uint16)
+_ENC = np.zeros(256, dtype=np.uint8)
+_SIG = np.zeros(256, dtype=np.int64)
+_LSB = np.zeros(256, dtype=np.float64)
+_DIGITS = np.zeros(256, dtype=np.int64)
+for _code, _spec in LABEL_SPECS.items():
+    _ENC[_code] = _spec.encoding
+    _SIG[_code] = _spec.sig_bits
+    _LSB[_code] = (_spec.full_scale / 2 ** _spec.sig_bits) if _spec.encoding == BNR else _spec.resolution
+    _DIGITS[_code] = _spec.digits
+
+# BCD digit positions from most to least significant: (shift within data field, bit width)
+_BCD_DIGITS = ((16, 3), (12, 4), (8, 4), (4, 4), (0, 4))
+
+
+def octal_label_to_code(label) -> np.ndarray:
+    """Converts octal-read labels (e.g. 203) to their 8-bit code (0o203 = 131)."""
+    label = np.asarray(label, dtype=np.int64)
+    d2, d1, d0 = label // 100, (label // 10) % 10, label % 10
+    return (d2 * 64 + d1 * 8 + d0).astype(np.uint32)
+
+
+def _popcount32(words: np.ndarray) -> np.ndarray:
+    return (_POP8[words & 0xFF] + _POP8[(words >> 8) & 0xFF]
+            + _POP8[(words >> 16) & 0xFF] + _POP8[(words >> 24) & 0xFF])
+
+
+def parity_ok(words) -> np.ndarray:
+    """True where the word carries odd parity over all 32 bits."""
+    return (_popcount32(np.asarray(words, dtype=np.uint32)) & 1).astype(bool)
+
+
+def unpack_fields(words) -> Dict[str, np.ndarray]:
+    """Splits raw words into label code, SDI, 19-bit data field, SSM and parity bit."""
+    words = np.asarray(words, dtype=np.uint32)
+    return {
+        "label_code": _REV8[words & 0xFF],
+        "sdi": ((words >> 8) & 0x3).astype(np.uint8),
+        "data": (words >> 10) & 0x7FFFF,
+        "ssm": ((words >> 29) & 0x3).astype(np.uint8),
+        "parity": (words >> 31).astype(np.uint8),
+    }
+
+
+def decode_values(label_code: np.ndarray, data: np.ndarray, ssm: np.ndarray) -> np.ndarray:
+    """Engineering values for each word according to its label's encoding; NaN for unknown labels."""
+    enc = _ENC[label_code]
+    lsb = _LSB[label_code]
+    data = data.astype(np.int64)
+
+    # BNR: 19-bit two's complement, truncated to the label's significant bits
+    signed = np.where(data & (1 << 18), data - (1 << 19), data)
+    bnr = (signed >> (18 - _SIG[label_code])) * lsb
+
+    # BCD: up to five digits from the top of the field, sign carried by the SSM
+    digits = _DIGITS[label_code]
+    bcd = np.zeros(data.shape, dtype=np.float64)
+    for k, (shift, width) in enumerate(_BCD_DIGITS):
+        nibble = (data >> shift) & ((1 << width) - 1)
+        used = k < digits
+        bcd = np.where(used, bcd * 10 + nibble, bcd)
+    bcd = bcd * lsb * np.where(ssm == SSM_BCD_MINUS, -1.0, 1.0)
+
+    values = np.full(data.shape, np.nan)
+    values = np.where(enc == BNR, bnr, values)
+    values = np.where(enc == BCD, bcd, values)
+    values = np.where(enc == DISCRETE, data.astype(np.float64), values)
+    return values
+
+
+def decode_words(words) -> Dict[str, np.ndarray]:
+    """Full decode: fields, octal labels, engineering values and word state."""
+    fields = unpack_fields(words)
+    fields["label"] = LABEL_CODE_TO_OCTAL[fields["label_code"]]
+    fields["value"] = decode_values(fields["label_code"], fields["data"], fields["ssm"])
+    fields["state"] = word_state(words, fields)
+    return fields
+
+
+def word_state(words, fields: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+    """Per-word STATE_* code from parity, label table and encoding-specific SSM semantics."""
+    words = np.asarray(words, dtype=np.uint32)
+    fields = fields or unpack_fields(words)
+    enc = _ENC[fields["label_code"]]
+    ssm = fields["ssm"]
+
+    state = np.full(words.shape, STATE_VALID, dtype=np.uint8)
+    bnr = enc == BNR
+    dis = enc == DISCRETE
+    bcd = enc == BCD
+    state[(bnr & (ssm == SSM_BNR_FAILURE)) | (dis & (ssm == SSM_DIS_FAILURE))] = STATE_FAILURE_WARNING
+    state[((bnr | dis) & (ssm == SSM_BNR_NCD)) | (bcd & (ssm == SSM_BCD_NCD))] = STATE_NO_COMPUTED_DATA
+    state[ssm == 2] = STATE_FUNCTIONAL_TEST
+    state[enc == 0] = STATE_UNKNOWN_LABEL
+    state[~parity_ok(words)] = STATE_PARITY_ERROR
+    return state
+
+
+def encode_words(labels, values, sdi=0, ssm=None) -> np.ndarray:
+    """
+    Packs engineering values into ARINC 429 words with odd parity.
+    BNR values saturate at the label's range; BCD sign goes to the SSM.
+    If `ssm` is None the normal-operation code for each label's encoding is used.
+    """
+    code = octal_label_to_code(labels)
+    values = np.asarray(values, dtype=np.float64)
+    code, values = np.broadcast_arrays(code, values)
+    enc = _ENC[code]
+    if np.any(enc == 0):
+        unknown = np.unique(LABEL_CODE_TO_OCTAL[code[enc == 0]])
+        raise ValueError(f"No ARINC 429 scaling defined for label(s) {unknown.tolist()}")
+    lsb = _LSB[code]
+
+    # BNR
+    sig = _SIG[code]
+    n = np.clip(np.round(values / lsb), -(1 << sig), (1 << sig) - 1).astype(np.int64)
+    bnr = (n << (18 - sig)) & 0x7FFFF
+
+    # BCD
+    digits = _DIGITS[code]
+    mag = np.round(np.abs(values) / lsb).astype(np.int64)
+    bcd = np.zeros(values.shape, dtype=np.int64)
+    for k, (shift, width) in enumerate(_BCD_DIGITS):
+        place = np.maximum(digits - 1 - k, 0)
+        digit = (mag // (10 ** place)) % 10
+        bcd |= np.where(k < digits, (digit & ((1 << width) - 1)) << shift, 0)
+
+    discrete = values.astype(np.int64) & 0x7FFFF
+    data = np.where(enc == BNR, bnr, np.where(enc == BCD, bcd, discrete)).astype(np.uint32)
+
+    if ssm is None:
+        ssm = np.where(enc == BNR, SSM_BNR_NORMAL,
+                       np.where(enc == BCD, np.where(values < 0, SSM_BCD_MINUS, SSM_BCD_PLUS), SSM_DIS_NORMAL))
+    ssm = np.broadcast_to(np.asarray(ssm, dtype=np.uint32), data.shape)
+    sdi = np.broadcast_to(np.asarray(sdi, dtype=np.uint32), data.shape)
+
+    words = _REV8[code] | ((sdi & 0x3) << 8) | (data << 10) | ((ssm & 0x3) << 29)
+    words = words.astype(np.uint32)
+    even = (_popcount32(words) & 1) == 0
+    return words | (even.astype(np.uint32) << 31)
@@ -1,7 +1,12 @@
 import numpy as np
 from dataclasses import dataclass
-from typing import Generator
+from typing import Generator, Optional
 from ..utils.logger import logger
+from . import arinc429_codec as codec
+from .records import RecordBatch, ARINC_RECORD_DTYPE, AVIONICS_FRAME_DTYPE
+
+# Labels sampled once per bus cycle by capture_bus_words(): TAS, pressure altitude, gear discrete
+CYCLE_LABELS = (210, 203, 270)
 
 @dataclass
 class ArincWord:
@@ -13,6 +18,17 @@ class ArincWord:
     timestamp: float
     is_injection: bool = False
 
+@dataclass(slots=True)
+class CompactArincWord:
+    """__slots__ variant of ArincWord (no per-instance __dict__) for full bus captures."""
+    label: int
+    sdi: int
+    data: float
+    ssm: int
+    parity: int
+    timestamp: float
+    is_injection: bool = False
+
 class Arinc429Bus:
     """
     Simulates an ARINC 429 Data Bus (Standard for Commercial/Transport Aircraft).
@@ -63,4 +79,65 @@ class Arinc429Bus:
                     is_injection=False
                 )
             
-            yield word
\ No newline at end of file
+            yield word
+
+    def capture_bus_words(self, duration_cycles: int = 100000, injection_prob: float = 0.05,
+                          seed: Optional[int] = None) -> RecordBatch:
+        """
+        Generates a full bus capture in one call: labels 210/203/270 per cycle, packed into real
+        32-bit ARINC 429 words (odd parity) and decoded back into the columnar ARINC layout.
+        """
+        rng = np.random.default_rng(seed)
+        is_attack = rng.random(duration_cycles) < injection_prob
+        airspeed = 480 + rng.normal(0, 2, duration_cycles)
+        altitude = 32000 + rng.normal(0, 20, duration_cycles)
+        gear = is_attack.astype(np.float64)  # 1 = DOWN (malicious at cruise)
+
+        labels = np.tile(np.array(CYCLE_LABELS), duration_cycles)
+        values = np.column_stack([airspeed, altitude, gear]).ravel()
+        words = codec.encode_words(labels, values)
+        timestamps = np.repeat(np.arange(duration_cycles, dtype=np.float64), len(CYCLE_LABELS))
+        injection = np.repeat(is_attack, len(CYCLE_LABELS)) & (labels == 270)
+
+        n_attacks = int(is_attack.sum())
+        if n_attacks:
+            logger.critical(f"BUS ALERT: {n_attacks} malicious gear injections in captured traffic on {self.bus_name}")
+        return self.decode_capture(words, timestamps, injection)
+
+    @staticmethod
+    def decode_capture(words: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                       is_injection: Optional[np.ndarray] = None) -> RecordBatch:
+        """Decodes raw uint32 bus words in bulk into the columnar ARINC record layout."""
+        words = np.asarray(words, dtype=np.uint32)
+        fields = codec.decode_words(words)
+        records = np.empty(words.shape[0], dtype=ARINC_RECORD_DTYPE)
+        records['word'] = words
+        records['timestamp'] = np.arange(words.shape[0]) if timestamps is None else timestamps
+        records['data'] = fields['value']
+        records['label'] = fields['label']
+        records['sdi'] = fields['sdi']
+        records['ssm'] = fields['ssm']
+        records['parity'] = fields['parity']
+        records['is_injection'] = False if is_injection is None else is_injection
+        return RecordBatch(records)
+
+    @staticmethod
+    def to_avionics_frames(batch: RecordBatch) -> RecordBatch:
+        """
+        Assembles decoded words into one frame per timestamp with the AvionicsAnomalyDetector
+        features (label 210 airspeed, 203 altitude, 270 gear). Missing labels carry the last value.
+        """
+        frame_times, frame_idx = np.unique(batch['timestamp'], return_inverse=True)
+        frames = np.zeros(len(frame_times), dtype=AVIONICS_FRAME_DTYPE)
+        frames['timestamp'] = frame_times
+        valid = codec.parity_ok(batch['word'])
+        for label, column in ((210, 'airspeed'), (203, 'altitude'), (270, 'gear_status')):
+            sel = (batch['label'] == label) & valid
+            values = np.full(len(frame_times), np.nan, dtype=np.float32)
+            values[frame_idx[sel]] = batch['data'][sel]
+            # Forward-fill gaps (labels refreshed at a lower rate than the frame)
+            idx = np.where(np.isnan(values), 0, np.arange(len(values)))
+            np.maximum.accumulate(idx, out=idx)
+            frames[column] = values[idx]
+        np.logical_or.at(frames['is_injection'], frame_idx, batch['is_injection'])
+        return RecordBatch(frames)
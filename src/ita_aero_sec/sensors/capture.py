@@ -0,0 +1,264 @@
+"""
+Append-only binary capture format for ADS-B / ARINC 429 streams, with memory-mapped replay.
+
+Layout of `<name>.wcfcap`:
+    b'WCFCAP01' followed by chunks of [CHUNK_HEADER | n * record itemsize bytes]
+Sidecar `<name>.wcfcap.idx`: one INDEX_DTYPE row per chunk (time range, payload offset, count).
+The index is a few bytes per chunk, so seeking by timestamp never touches the record payload.
+"""
+import os
+import time
+import numpy as np
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+from ..utils.logger import logger
+from .records import RecordBatch, ADSB_RECORD_DTYPE, ARINC_RECORD_DTYPE, AVIONICS_FRAME_DTYPE, ADSB_FEATURES
+from .sbs1 import SBS1_DTYPE
+
+CAPTURE_MAGIC = b'WCFCAP01'
+
+STREAM_ADSB = 1
+STREAM_ARINC = 2
+STREAM_AVIONICS = 3
+STREAM_SBS1 = 4
+
+STREAM_DTYPES = {
+    STREAM_ADSB: ADSB_RECORD_DTYPE,
+    STREAM_ARINC: ARINC_RECORD_DTYPE,
+    STREAM_AVIONICS: AVIONICS_FRAME_DTYPE,
+    STREAM_SBS1: SBS1_DTYPE,
+}
+
+CHUNK_HEADER_DTYPE = np.dtype([
+    ('stream', 'u1'),
+    ('reserved', 'u1', (3,)),
+    ('count', '<u4'),
+    ('itemsize', '<u4'),
+    ('reserved2', '<u4'),
+    ('t_first', '<f8'),
+    ('t_last', '<f8'),
+])
+
+INDEX_DTYPE = np.dtype([
+    ('t_first', '<f8'),
+    ('t_last', '<f8'),
+    ('offset', '<u8'),   # Byte offset of the chunk payload (records) in the capture file
+    ('count', '<u4'),
+    ('stream', 'u1'),
+])
+
+
+class CaptureWriter:
+    """Appends record batches to a capture file and its time index."""
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + '.idx'
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._data = open(path, 'ab')
+        self._index = open(self.index_path, 'ab')
+        if new_file:
+            self._data.write(CAPTURE_MAGIC)
+        self.records_written = 0
+
+    def write(self, stream: int, batch) -> None:
+        """Writes one chunk. `batch` is a RecordBatch, ADSBTrackBlock or structured array."""
+        if hasattr(batch, 'to_record_batch'):
+            batch = batch.to_record_batch()
+        records = batch.records if isinstance(batch, RecordBatch) else batch
+        if records.dtype != STREAM_DTYPES[stream]:
+            raise TypeError(f"Stream {stream} expects dtype {STREAM_DTYPES[stream]}, got {records.dtype}")
+        if len(records) == 0:
+            return
+        ts = records['timestamp']
+        header = np.zeros(1, dtype=CHUNK_HEADER_DTYPE)
+        header['stream'] = stream
+        header['count'] = len(records)
+        header['itemsize'] = records.dtype.itemsize
+        header['t_first'] = ts.min()
+        header['t_last'] = ts.max()
+
+        offset = self._data.tell() + CHUNK_HEADER_DTYPE.itemsize
+        self._data.write(header.tobytes())
+        self._data.write(np.ascontiguousarray(records).tobytes())
+        self._data.flush()
+
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry['t_first'], entry['t_last'] = header['t_first'], header['t_last']
+        entry['offset'], entry['count'], entry['stream'] = offset, len(records), stream
+        self._index.write(entry.tobytes())
+        self._index.flush()
+        self.records_written += len(records)
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def rebuild_index(path: str) -> np.ndarray:
+    """Recreates the sidecar index by hopping over chunk headers (payloads are skipped, not read)."""
+    entries = []
+    with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a WCF capture file")
+        size = os.fstat(f.fileno()).st_size
+        while f.tell() + CHUNK_HEADER_DTYPE.itemsize <= size:
+            header = np.frombuffer(f.read(CHUNK_HEADER_DTYPE.itemsize), dtype=CHUNK_HEADER_DTYPE)[0]
+            offset = f.tell()
+            length = int(header['count']) * int(header['itemsize'])
+            if offset + length > size:
+                logger.warning(f"Capture {path}: truncated chunk at byte {offset - CHUNK_HEADER_DTYPE.itemsize} ignored")
+                break
+            entries.append((header['t_first'], header['t_last'], offset, header['count'], header['stream']))
+            f.seek(length, os.SEEK_CUR)
+    index = np.array(entries, dtype=INDEX_DTYPE)
+    index.tofile(path + '.idx')
+    return index
+
+
+class CaptureReplayer:
+    """
+    Memory-maps a capture and replays it at 1x, Nx or maximum speed.
+    Yielded batches are zero-copy views into the mapped file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        index_path = path + '.idx'
+        if os.path.exists(index_path):
+            self.index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+        else:
+            self.index = rebuild_index(path)
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self._map[:len(CAPTURE_MAGIC)]) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a WCF capture file")
+        # Chunks are appended in time order; the running max keeps seeks valid if a stream lags.
+        self._t_last_max = np.maximum.accumulate(self.index['t_last']) if len(self.index) else self.index['t_last']
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        if not len(self.index):
+            return (0.0, 0.0)
+        return float(self.index['t_first'].min()), float(self.index['t_last'].max())
+
+    def __len__(self) -> int:
+        return int(self.index['count'].sum())
+
+    def _chunk(self, i: int) -> np.ndarray:
+        entry = self.index[i]
+        dtype = STREAM_DTYPES[int(entry['stream'])]
+        start = int(entry['offset'])
+        raw = self._map[start:start + int(entry['count']) * dtype.itemsize]
+        return raw.view(dtype)
+
+    def chunks(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+               streams: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, RecordBatch]]:
+        """Yields (stream, RecordBatch) for every chunk overlapping [start_time, end_time]."""
+        first = 0
+        if start_time is not None:
+            first = int(np.searchsorted(self._t_last_max, start_time, side='left'))
+        for i in range(first, len(self.index)):
+            entry = self.index[i]
+            if end_time is not None and entry['t_first'] > end_time:
+                break
+            stream = int(entry['stream'])
+            if streams is not None and stream not in streams:
+                continue
+            records = self._chunk(i)
+            if (start_time is not None and entry['t_first'] < start_time) or \
+               (end_time is not None and entry['t_last'] > end_time):
+                ts = records['timestamp']
+                mask = np.ones(len(records), dtype=bool)
+                if start_time is not None:
+                    mask &= ts >= start_time
+                if end_time is not None:
+                    mask &= ts <= end_time
+                records = records[mask]
+            if len(records):
+                yield stream, RecordBatch(records)
+
+    def replay(self, speed: Optional[float] = 1.0, start_time: Optional[float] = None,
+               end_time: Optional[float] = None, streams: Optional[Sequence[int]] = None
+               ) -> Iterator[Tuple[int, RecordBatch]]:
+        """
+        Replays chunks paced to their capture timestamps.
+        speed=1.0 is real time, speed=N is N times faster, speed=None is as fast as possible.
+        """
+        wall_start = time.perf_counter()
+        t0 = None
+        for stream, batch in self.chunks(start_time, end_time, streams):
+            if speed:
+                t_chunk = float(batch['timestamp'][0])
+                t0 = t_chunk if t0 is None else t0
+                delay = (t_chunk - t0) / speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield stream, batch
+
+    def replay_into(self, sinks: Dict[int, Callable[[RecordBatch], object]], speed: Optional[float] = None,
+                    start_time: Optional[float] = None, end_time: Optional[float] = None) -> Dict[int, int]:
+        """Feeds every replayed batch to the sink registered for its stream. Returns records per stream."""
+        counts = {stream: 0 for stream in sinks}
+        for stream, batch in self.replay(speed, start_time, end_time, streams=list(sinks)):
+            sinks[stream](batch)
+            counts[stream] += len(batch)
+        logger.info(f"Capture replay complete: {counts}")
+        return counts
+
+    def close(self) -> None:
+        # The mapping is released once the last batch view referencing it is dropped.
+        self._map = None
+
+
+def adsb_detector_sink(detector, results: Optional[list] = None) -> Callable[[RecordBatch], np.ndarray]:
+    """Scores replayed ADS-B batches with a trained ADSBSpoofingDetector (1 = spoofed)."""
+    def sink(batch: RecordBatch) -> np.ndarray:
+        X = detector.scaler.transform(batch.to_pandas(list(detector.features)))
+        preds = np.where(detector.model.predict(X) == -1, 1, 0)
+        if results is not None:
+            results.append(preds)
+        return preds
+    return sink
+
+
+def avionics_detector_sink(detector, results: Optional[list] = None) -> Callable[[RecordBatch], np.ndarray]:
+    """Scores replayed avionics frames (or raw ARINC word batches) with an AvionicsAnomalyDetector."""
+    from .avionics import Arinc429Bus
+
+    def sink(batch: RecordBatch) -> np.ndarray:
+        if batch.dtype == ARINC_RECORD_DTYPE:
+            batch = Arinc429Bus.to_avionics_frames(batch)
+        X = detector.scaler.transform(batch.to_pandas(list(detector.features)))
+        preds = np.where(detector.model.predict(X) == -1, 1, 0)
+        if results is not None:
+            results.append(preds)
+        return preds
+    return sink
+
+
+def swarm_sink(perito, altitude_limit: float = 60000.0, engine=None) -> Callable[[RecordBatch], int]:
+    """
+    Forwards suspicious replayed ADS-B records to the GEAR swarm (ADSBCyberPeritoAgent.process).
+    A record is suspicious when it breaks the physical envelope (ADS-B violation rules, altitude
+    above `altitude_limit`, non-finite features) or, given an `engine` (ADSBInferenceEngine), when
+    the model flags it in the ambiguous band. The ground-truth `is_spoofed` column is only for
+    evaluation and never drives escalation. Returns the number of escalations.
+    """
+    from ..ai.envelope_rules import ADSB_VIOLATION_RULES, ADSB_NOMINAL_RULES, EnvelopeRule, RuleCascade
+    ceiling = EnvelopeRule("altitude_ceiling", (("altitude", ">", altitude_limit),),
+                           f"Reported altitude above {altitude_limit:.0f} ft")
+    if engine is None:
+        cascade = RuleCascade(ADSB_VIOLATION_RULES + (ceiling,), (), None, ADSB_FEATURES)
+    else:
+        cascade = RuleCascade(ADSB_VIOLATION_RULES + (ceiling,), ADSB_NOMINAL_RULES, engine.predict_model,
+                              engine.features)
+
+    def sink(batch: RecordBatch) -> int:
+        suspicious = np.nonzero(cascade.predict_batch(batch))[0]
+        for i in suspicious:
+            perito.process({"icao": f"0x{int(batch['icao24'][i]):06X}", "alt": float(batch['altitude'][i])})
+        return len(suspicious)
+    return sink
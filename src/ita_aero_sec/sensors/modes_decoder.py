@@ -0,0 +1,344 @@
+"""
+Vectorized Mode-S / 1090ES extended squitter decoder (DO-260B).
+
+Frames are handled as (n, 14) uint8 arrays of 112-bit DF17/18 messages. Parity, altitude
+(Q-bit and Gillham), CPR positions (global pairs and local reference) and airborne velocity
+(type code 19) are computed with array operations over the whole batch.
+Raw input can be AVR text ("*8D...;" / "@<mlat>8D...;") or Beast binary.
+"""
+import re
+import numpy as np
+from typing import Optional, Tuple
+
+MODES_LONG_BYTES = 14
+CRC24_GENERATOR = 0xFFF409
+CPR_MAX = 131072.0      # 2^17
+CPR_PAIR_MAX_SEC = 10.0  # Max age difference for a valid even/odd global decode
+BEAST_CLOCK_HZ = 12e6
+
+DECODED_DTYPE = np.dtype([
+    ('icao24', '<u4'),
+    ('timestamp', '<f8'),
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+    ('altitude', '<f4'),          # ft (barometric for TC 9-18)
+    ('ground_speed', '<f4'),      # knots (TC 19 subtype 1/2)
+    ('track', '<f4'),             # degrees (ground track or magnetic heading)
+    ('airspeed', '<f4'),          # knots (TC 19 subtype 3/4)
+    ('vertical_rate', '<f4'),     # ft/min
+    ('df', 'u1'),
+    ('tc', 'u1'),
+    ('velocity_subtype', 'u1'),
+    ('cpr_odd', '?'),
+    ('crc_ok', '?'),
+])
+
+
+def _crc24_table() -> np.ndarray:
+    table = np.zeros(256, dtype=np.uint32)
+    for i in range(256):
+        c = i << 16
+        for _ in range(8):
+            c = ((c << 1) ^ CRC24_GENERATOR) if c & 0x800000 else (c << 1)
+        table[i] = c & 0xFFFFFF
+    return table
+
+CRC24_TABLE = _crc24_table()
+
+
+def crc24_remainder(frames: np.ndarray) -> np.ndarray:
+    """Table-driven CRC-24 over the 88 data bits, XORed with the transmitted parity field."""
+    frames = np.asarray(frames, dtype=np.uint8)
+    crc = np.zeros(frames.shape[0], dtype=np.uint32)
+    for i in range(MODES_LONG_BYTES - 3):
+        crc = ((crc << 8) & 0xFFFFFF) ^ CRC24_TABLE[((crc >> 16) ^ frames[:, i]) & 0xFF]
+    parity = ((frames[:, 11].astype(np.uint32) << 16) | (frames[:, 12].astype(np.uint32) << 8)
+              | frames[:, 13].astype(np.uint32))
+    return crc ^ parity
+
+
+def _field(bits: np.ndarray, start: int, length: int) -> np.ndarray:
+    """Unsigned integer from bits[start:start+length] (MSB first) for every frame."""
+    weights = np.left_shift(1, np.arange(length - 1, -1, -1), dtype=np.int64)
+    return bits[:, start:start + length] @ weights
+
+
+def _gray_to_int(gray: np.ndarray) -> np.ndarray:
+    n = gray.copy()
+    for shift in (8, 4, 2, 1):
+        n ^= n >> shift
+    return n
+
+
+def decode_altitude_field(alt: np.ndarray) -> np.ndarray:
+    """
+    Decodes the 12-bit airborne position altitude field (C1 A1 C2 A2 C4 A4 B1 Q B2 D2 B4 D4).
+    Q=1 -> 25 ft increments; Q=0 -> Gillham (Gray-coded 100 ft) altitude. Invalid codes -> NaN.
+    """
+    alt = np.asarray(alt, dtype=np.int64)
+    bit = lambda i: (alt >> (11 - i)) & 1
+    q = bit(7).astype(bool)
+
+    n25 = ((alt >> 5) << 4) | (alt & 0x0F)
+    alt_q = n25 * 25.0 - 1000.0
+
+    c1, a1, c2, a2, c4, a4, b1, b2, d2, b4, d4 = (bit(i) for i in (0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11))
+    gc500 = (d2 << 7) | (d4 << 6) | (a1 << 5) | (a2 << 4) | (a4 << 3) | (b1 << 2) | (b2 << 1) | b4
+    gc100 = (c1 << 2) | (c2 << 1) | c4
+    n500 = _gray_to_int(gc500)
+    n100 = _gray_to_int(gc100)
+    gillham_ok = ~np.isin(n100, (0, 5, 6))
+    n100 = np.where(n100 == 7, 5, n100)
+    n100 = np.where(n500 % 2 == 1, 6 - n100, n100)
+    alt_g = (n500 * 500 + n100 * 100) - 1300.0
+
+    out = np.where(q, alt_q, np.where(gillham_ok, alt_g, np.nan))
+    out[alt == 0] = np.nan
+    return out
+
+
+def cpr_nl(lat: np.ndarray) -> np.ndarray:
+    """Number of longitude zones (NL) for each latitude, per DO-260B."""
+    lat = np.abs(np.asarray(lat, dtype=np.float64))
+    a = 1.0 - np.cos(np.pi / (2 * 15))
+    b = np.cos(np.pi / 180.0 * np.minimum(lat, 86.9)) ** 2
+    nl = np.floor(2 * np.pi / np.arccos(1.0 - a / b))
+    nl = np.where(np.isclose(lat, 0.0), 59, nl)
+    nl = np.where(np.isclose(lat, 87.0), 2, nl)
+    nl = np.where(lat > 87.0, 1, nl)
+    return nl.astype(np.int64)
+
+
+def cpr_global(lat_even, lon_even, lat_odd, lon_odd, odd_is_newer) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Globally unambiguous airborne position from even/odd CPR pairs (values already divided by 2^17).
+    Pairs straddling a latitude zone boundary return NaN.
+    """
+    lat_even, lon_even = np.asarray(lat_even, float), np.asarray(lon_even, float)
+    lat_odd, lon_odd = np.asarray(lat_odd, float), np.asarray(lon_odd, float)
+    odd_is_newer = np.asarray(odd_is_newer, bool)
+
+    j = np.floor(59 * lat_even - 60 * lat_odd + 0.5)
+    rlat_even = (360.0 / 60) * (np.mod(j, 60) + lat_even)
+    rlat_odd = (360.0 / 59) * (np.mod(j, 59) + lat_odd)
+    rlat_even = np.where(rlat_even >= 270, rlat_even - 360, rlat_even)
+    rlat_odd = np.where(rlat_odd >= 270, rlat_odd - 360, rlat_odd)
+    same_zone = cpr_nl(rlat_even) == cpr_nl(rlat_odd)
+
+    lat = np.where(odd_is_newer, rlat_odd, rlat_even)
+    nl = cpr_nl(lat)
+    ni = np.maximum(nl - odd_is_newer.astype(np.int64), 1)
+    m = np.floor(lon_even * (nl - 1) - lon_odd * nl + 0.5)
+    lon = (360.0 / ni) * (np.mod(m, ni) + np.where(odd_is_newer, lon_odd, lon_even))
+    lon = np.where(lon > 180, lon - 360, lon)
+    return np.where(same_zone, lat, np.nan), np.where(same_zone, lon, np.nan)
+
+
+def cpr_local(cpr_lat, cpr_lon, odd, ref_lat, ref_lon) -> Tuple[np.ndarray, np.ndarray]:
+    """Airborne position from a single CPR frame relative to a reference within 180 NM."""
+    cpr_lat, cpr_lon = np.asarray(cpr_lat, float), np.asarray(cpr_lon, float)
+    odd = np.asarray(odd, np.int64)
+    ref_lat, ref_lon = np.asarray(ref_lat, float), np.asarray(ref_lon, float)
+
+    d_lat = np.where(odd == 1, 360.0 / 59, 360.0 / 60)
+    j = np.floor(ref_lat / d_lat) + np.floor(0.5 + np.mod(ref_lat, d_lat) / d_lat - cpr_lat)
+    lat = d_lat * (j + cpr_lat)
+    ni = cpr_nl(lat) - odd
+    d_lon = np.where(ni > 0, 360.0 / np.maximum(ni, 1), 360.0)
+    m = np.floor(ref_lon / d_lon) + np.floor(0.5 + np.mod(ref_lon, d_lon) / d_lon - cpr_lon)
+    return lat, d_lon * (m + cpr_lon)
+
+
+def _pair_cpr_frames(icao, odd, t, is_pos) -> np.ndarray:
+    """
+    For every position frame, index of the most recent earlier-or-equal frame of the same aircraft
+    with the opposite CPR format (within CPR_PAIR_MAX_SEC), or -1. Computed with a sort and
+    running maxima instead of per-aircraft dictionaries.
+    """
+    n = icao.shape[0]
+    order = np.lexsort((np.arange(n), t, icao))
+    s_icao, s_odd, s_t, s_pos = icao[order], odd[order], t[order], is_pos[order]
+    pos_idx = np.arange(n)
+    last_even = np.maximum.accumulate(np.where(s_pos & ~s_odd, pos_idx, -1))
+    last_odd = np.maximum.accumulate(np.where(s_pos & s_odd, pos_idx, -1))
+    partner = np.where(s_odd, last_even, last_odd)
+    ok = ((partner >= 0) & s_pos
+          & (s_icao[np.maximum(partner, 0)] == s_icao)
+          & (s_t - s_t[np.maximum(partner, 0)] <= CPR_PAIR_MAX_SEC))
+    out = np.full(n, -1, dtype=np.int64)
+    out[order] = np.where(ok, order[np.maximum(partner, 0)], -1)
+    return out
+
+
+def decode_frames(frames: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                  ref_lat: Optional[float] = None, ref_lon: Optional[float] = None) -> np.ndarray:
+    """
+    Decodes a batch of 112-bit extended squitters into DECODED_DTYPE rows.
+
+    Args:
+        frames (ndarray): (n, 14) uint8 raw frames.
+        timestamps (ndarray): Receive times in seconds (defaults to arrival order).
+        ref_lat, ref_lon (float): Receiver position for local CPR decoding of unpaired frames.
+    """
+    frames = np.ascontiguousarray(frames, dtype=np.uint8).reshape(-1, MODES_LONG_BYTES)
+    n = frames.shape[0]
+    t = np.arange(n, dtype=np.float64) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+    bits = np.unpackbits(frames, axis=1)
+
+    out = np.zeros(n, dtype=DECODED_DTYPE)
+    for name in ('lat', 'lon', 'altitude', 'ground_speed', 'track', 'airspeed', 'vertical_rate'):
+        out[name] = np.nan
+    out['timestamp'] = t
+
+    df = _field(bits, 0, 5)
+    tc = _field(bits, 32, 5)
+    icao = _field(bits, 8, 24)
+    out['df'] = df
+    out['tc'] = tc
+    out['icao24'] = icao
+    out['crc_ok'] = crc24_remainder(frames) == 0
+
+    es = out['crc_ok'] & ((df == 17) | (df == 18))
+
+    # --- Airborne position, barometric altitude (TC 9-18) ---
+    is_pos = es & (tc >= 9) & (tc <= 18)
+    odd = bits[:, 53].astype(bool)
+    out['cpr_odd'] = odd & is_pos
+    out['altitude'] = np.where(is_pos, decode_altitude_field(_field(bits, 40, 12)), np.nan)
+
+    cpr_lat = _field(bits, 54, 17) / CPR_MAX
+    cpr_lon = _field(bits, 71, 17) / CPR_MAX
+    partner = _pair_cpr_frames(icao, odd, t, is_pos)
+    paired = partner >= 0
+    if paired.any():
+        k, p = np.nonzero(paired)[0], partner[paired]
+        lat_e = np.where(odd[k], cpr_lat[p], cpr_lat[k])
+        lon_e = np.where(odd[k], cpr_lon[p], cpr_lon[k])
+        lat_o = np.where(odd[k], cpr_lat[k], cpr_lat[p])
+        lon_o = np.where(odd[k], cpr_lon[k], cpr_lon[p])
+        out['lat'][k], out['lon'][k] = cpr_global(lat_e, lon_e, lat_o, lon_o, odd[k])
+
+    if ref_lat is not None and ref_lon is not None:
+        local = is_pos & np.isnan(out['lat'])
+        if local.any():
+            out['lat'][local], out['lon'][local] = cpr_local(
+                cpr_lat[local], cpr_lon[local], odd[local], ref_lat, ref_lon)
+
+    # --- Airborne velocity (TC 19) ---
+    is_vel = es & (tc == 19)
+    subtype = _field(bits, 37, 3)
+    out['velocity_subtype'] = np.where(is_vel, subtype, 0)
+    vr_raw = _field(bits, 69, 9)
+    vr = (vr_raw - 1) * 64.0 * np.where(bits[:, 68] == 1, -1, 1)
+    out['vertical_rate'] = np.where(is_vel & (vr_raw > 0), vr, np.nan)
+
+    ground = is_vel & ((subtype == 1) | (subtype == 2))
+    scale = np.where(subtype == 2, 4.0, 1.0)
+    v_ew_raw, v_ns_raw = _field(bits, 46, 10), _field(bits, 57, 10)
+    v_ew = (v_ew_raw - 1) * scale * np.where(bits[:, 45] == 1, -1, 1)
+    v_ns = (v_ns_raw - 1) * scale * np.where(bits[:, 56] == 1, -1, 1)
+    ground &= (v_ew_raw > 0) & (v_ns_raw > 0)
+    out['ground_speed'] = np.where(ground, np.hypot(v_ew, v_ns), np.nan)
+    track = np.mod(np.degrees(np.arctan2(v_ew, v_ns)), 360.0)
+
+    air = is_vel & ((subtype == 3) | (subtype == 4))
+    heading = _field(bits, 46, 10) * (360.0 / 1024)
+    as_raw = _field(bits, 57, 10)
+    air_ok = air & (as_raw > 0)
+    out['airspeed'] = np.where(air_ok, (as_raw - 1) * np.where(subtype == 4, 4.0, 1.0), np.nan)
+    out['track'] = np.where(ground, track, np.where(air & (bits[:, 45] == 1), heading, np.nan))
+    return out
+
+
+_AVR_RE = re.compile(rb'([*@])([0-9A-Fa-f]+);')
+
+
+def parse_avr(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extracts long frames from AVR text. Returns (frames, mlat_ticks); ticks are 0 for '*' lines.
+    The hex payloads are converted in one bytes.fromhex call for the whole buffer.
+    """
+    hex_frames, ticks = [], []
+    for kind, payload in _AVR_RE.findall(data):
+        if kind == b'@':
+            ticks.append(int(payload[:12], 16))
+            payload = payload[12:]
+        else:
+            ticks.append(0)
+        if len(payload) != MODES_LONG_BYTES * 2:
+            ticks.pop()
+            continue
+        hex_frames.append(payload)
+    raw = bytes.fromhex(b''.join(hex_frames).decode('ascii'))
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, MODES_LONG_BYTES)
+    return frames, np.asarray(ticks, dtype=np.int64)
+
+
+def parse_beast(data: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Extracts long (type '3') frames from a Beast binary buffer.
+    Returns (frames, mlat_ticks, signal, consumed) where `consumed` is the number of bytes parsed;
+    an incomplete trailing frame is left for the next buffer.
+    """
+    lengths = {0x31: 2, 0x32: 7, 0x33: 14, 0x34: 14}
+    frames, ticks, signal = [], [], []
+    i, end, consumed = 0, len(data), 0
+    while True:
+        i = data.find(b'\x1a', i)
+        if i < 0 or i + 1 >= end:
+            break
+        kind = data[i + 1]
+        if kind not in lengths:
+            i += 1
+            continue
+        need = 6 + 1 + lengths[kind]
+        body = bytearray()
+        j = i + 2
+        while len(body) < need and j < end:
+            b = data[j]
+            if b == 0x1a:
+                if j + 1 >= end:
+                    break
+                if data[j + 1] != 0x1a:  # Unescaped sync inside a frame: corrupt, resync here
+                    break
+                j += 1
+            body.append(b)
+            j += 1
+        if len(body) < need:
+            if j >= end - 1:
+                break  # Truncated frame at end of buffer
+            i = j
+            continue
+        if kind == 0x33:
+            ticks.append(int.from_bytes(body[:6], 'big'))
+            signal.append(body[6])
+            frames.append(bytes(body[7:]))
+        i = consumed = j
+    raw = b''.join(frames)
+    return (np.frombuffer(raw, dtype=np.uint8).reshape(-1, MODES_LONG_BYTES),
+            np.asarray(ticks, dtype=np.int64), np.asarray(signal, dtype=np.uint8), consumed)
+
+
+def encode_beast(frames: np.ndarray, ticks: Optional[np.ndarray] = None, signal: int = 0x80) -> bytes:
+    """Serializes long frames into Beast binary (used for replay and tests)."""
+    frames = np.asarray(frames, dtype=np.uint8).reshape(-1, MODES_LONG_BYTES)
+    ticks = np.zeros(len(frames), dtype=np.int64) if ticks is None else ticks
+    out = bytearray()
+    for frame, tick in zip(frames, ticks):
+        body = int(tick).to_bytes(6, 'big') + bytes([signal]) + frame.tobytes()
+        out += b'\x1a\x33' + body.replace(b'\x1a', b'\x1a\x1a')
+    return bytes(out)
+
+
+if __name__ == "__main__":
+    import time
+    sample = np.frombuffer(bytes.fromhex("8D40621D58C382D690C8AC2863A7" "8D40621D58C386435CC412692AD6"
+                                         "8D485020994409940838175B284F" "8DA05F219B06B6AF189400CBC33F"),
+                           dtype=np.uint8).reshape(-1, MODES_LONG_BYTES)
+    frames = np.tile(sample, (250000, 1))
+    t = np.arange(len(frames), dtype=np.float64) * 1e-4
+    start = time.perf_counter()
+    decoded = decode_frames(frames, t)
+    elapsed = time.perf_counter() - start
+    print(f"[MODE-S DECODER] {len(frames) / elapsed:,.0f} frames/s "
+          f"({len(frames)} frames, {np.count_nonzero(decoded['crc_ok'])} CRC-valid)")
@@ -0,0 +1,147 @@
+import numpy as np
+from numpy.lib import recfunctions as rfn
+from typing import Iterable, Optional, Sequence
+
+# Packed structured layouts (one row per message). The float32 feature columns are kept
+# adjacent so detector feature matrices can be exposed as strided views without copying.
+ADSB_RECORD_DTYPE = np.dtype([
+    ('icao24', '<u4'),
+    ('timestamp', '<f8'),
+    ('altitude', '<f4'),
+    ('velocity', '<f4'),
+    ('altitude_delta', '<f4'),
+    ('velocity_delta', '<f4'),
+    ('rssi', '<f4'),
+    ('latency_ms', '<f4'),
+    ('callsign', 'S8'),
+    ('is_spoofed', '?'),
+])
+
+ARINC_RECORD_DTYPE = np.dtype([
+    ('word', '<u4'),        # Raw 32-bit ARINC 429 word
+    ('timestamp', '<f8'),
+    ('data', '<f4'),        # Decoded engineering value
+    ('label', '<u2'),       # Label as the octal-read integer (e.g. 270)
+    ('sdi', 'u1'),
+    ('ssm', 'u1'),
+    ('parity', 'u1'),
+    ('is_injection', '?'),
+])
+
+# One row per bus frame: the labels consumed by AvionicsAnomalyDetector, sampled together.
+AVIONICS_FRAME_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('airspeed', '<f4'),     # Label 210 (KTAS)
+    ('altitude', '<f4'),     # Label 203 (ft)
+    ('gear_status', '<f4'),  # Label 270 discrete (0 = UP, 1 = DOWN)
+    ('is_injection', '?'),
+])
+
+# Same column order as ADSBSpoofingDetector.features / AvionicsAnomalyDetector.features
+ADSB_FEATURES = ('altitude_delta', 'velocity_delta', 'rssi', 'latency_ms')
+AVIONICS_FEATURES = ('airspeed', 'altitude', 'gear_status')
+
+_DEFAULT_FEATURES = {
+    ADSB_RECORD_DTYPE: ADSB_FEATURES,
+    AVIONICS_FRAME_DTYPE: AVIONICS_FEATURES,
+    ARINC_RECORD_DTYPE: ('data',),
+}
+
+
+class RecordBatch:
+    """
+    Columnar container over a packed NumPy structured array.
+    Column access, feature matrices and pandas frames are views on the same buffer,
+    so a batch of N messages costs N * itemsize bytes instead of N Python objects.
+    """
+    __slots__ = ('records',)
+
+    def __init__(self, records: np.ndarray):
+        if records.dtype.names is None:
+            raise TypeError("RecordBatch requires a structured array.")
+        self.records = records
+
+    @classmethod
+    def empty(cls, dtype: np.dtype, size: int = 0) -> "RecordBatch":
+        return cls(np.zeros(size, dtype=dtype))
+
+    @classmethod
+    def from_adsb_packets(cls, packets: Iterable) -> "RecordBatch":
+        """Packs ADSBPacket / CompactADSBPacket objects into an ADS-B batch."""
+        rows = [
+            (int(p.icao24, 16) if isinstance(p.icao24, str) else p.icao24, p.timestamp,
+             p.altitude, p.velocity, np.nan, np.nan, p.rssi, np.nan,
+             p.callsign.encode('ascii', 'replace')[:8], p.is_spoofed)
+            for p in packets
+        ]
+        return cls(np.array(rows, dtype=ADSB_RECORD_DTYPE))
+
+    @classmethod
+    def from_track_block(cls, block) -> "RecordBatch":
+        """Packs an ADSBTrackBlock (struct-of-arrays step) into an ADS-B batch."""
+        records = np.empty(len(block), dtype=ADSB_RECORD_DTYPE)
+        records['icao24'] = block.icao24
+        records['timestamp'] = block.timestamp
+        records['altitude'] = block.altitude
+        records['velocity'] = block.velocity
+        records['altitude_delta'] = block.altitude_delta
+        records['velocity_delta'] = block.velocity_delta
+        records['rssi'] = block.rssi
+        records['latency_ms'] = block.latency_ms
+        records['callsign'] = b''
+        records['is_spoofed'] = block.is_spoofed
+        return cls(records)
+
+    @classmethod
+    def from_arinc_words(cls, words: Iterable) -> "RecordBatch":
+        """Packs ArincWord / CompactArincWord objects into an ARINC 429 batch."""
+        rows = [
+            (0, w.timestamp, w.data, w.label, w.sdi, w.ssm, w.parity, w.is_injection)
+            for w in words
+        ]
+        return cls(np.array(rows, dtype=ARINC_RECORD_DTYPE))
+
+    @classmethod
+    def concat(cls, batches: Sequence["RecordBatch"]) -> "RecordBatch":
+        return cls(np.concatenate([b.records for b in batches]))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.records.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes
+
+    def __len__(self) -> int:
+        return self.records.shape[0]
+
+    def __getitem__(self, key):
+        """Field name -> column view; int/slice/mask -> row selection."""
+        if isinstance(key, str):
+            return self.records[key]
+        return RecordBatch(np.atleast_1d(self.records[key]))
+
+    def feature_matrix(self, fields: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Returns an (n, k) matrix of the detector feature columns.
+        For the default layouts this is a strided view, not a copy.
+        """
+        fields = list(fields or _DEFAULT_FEATURES.get(self.dtype, ()))
+        if not fields:
+            raise ValueError("No feature columns defined for this record layout.")
+        return rfn.structured_to_unstructured(self.records[fields])
+
+    def to_pandas(self, fields: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+        """
+        Wraps the numeric columns in a DataFrame without copying them.
+        Byte-string columns (e.g. callsign) are only materialized when requested explicitly.
+        """
+        if fields is None:
+            fields = [n for n in self.dtype.names if self.dtype[n].kind != 'S']
+        columns = {}
+        for name in fields:
+            column = self.records[name]
+            columns[name] = column.astype(str) if column.dtype.kind == 'S' else column
+        import pandas as pd  # Only frame consumers pay for the pandas import
+        return pd.DataFrame(columns, copy=False)
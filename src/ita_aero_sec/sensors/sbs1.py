@@ -0,0 +1,308 @@
+"""
+SBS-1 BaseStation (dump1090 port 30003) ingestion engine.
+
+- SBS1Parser: incremental, allocation-light parser from raw TCP chunks to structured arrays.
+- SBS1StreamReader: asyncio reader for several receivers with reconnect backoff and batched output.
+- FakeDump1090Server: local server replaying captured SBS lines at a configurable rate.
+"""
+import asyncio
+import random
+import time
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+from ..utils.logger import logger
+
+SBS1_DTYPE = np.dtype([
+    ('icao24', '<u4'),
+    ('timestamp', '<f8'),       # Receive time at the edge node (epoch seconds)
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+    ('altitude', '<f4'),        # ft (NaN when absent in the message)
+    ('ground_speed', '<f4'),    # knots
+    ('track', '<f4'),           # degrees
+    ('vertical_rate', '<f4'),   # ft/min
+    ('squawk', '<u2'),
+    ('msg_type', 'u1'),         # SBS transmission type 1-8
+    ('receiver', 'u1'),         # Index of the receiver that delivered the line
+    ('on_ground', '?'),
+    ('callsign', 'S8'),
+])
+
+_NAN = float('nan')
+
+
+def _num(field: bytes) -> float:
+    return float(field) if field else _NAN
+
+
+class SBS1Parser:
+    """
+    Incremental SBS-1 parser. Feed it arbitrary TCP chunks; complete lines are parsed and
+    partial trailing lines are kept for the next call. Malformed lines are counted and skipped.
+    """
+    def __init__(self, receiver: int = 0):
+        self.receiver = receiver
+        self._tail = b''
+        self.lines_parsed = 0
+        self.lines_rejected = 0
+
+    def feed(self, chunk: bytes, rx_time: Optional[float] = None) -> List[tuple]:
+        """Consumes a raw chunk and returns parsed rows (tuples in SBS1_DTYPE order)."""
+        data = self._tail + chunk if self._tail else chunk
+        cut = data.rfind(b'\n')
+        if cut < 0:
+            self._tail = data
+            return []
+        self._tail = data[cut + 1:]
+        return self.parse_lines(data[:cut].split(b'\n'), rx_time)
+
+    def parse_lines(self, lines: Iterable[bytes], rx_time: Optional[float] = None) -> List[tuple]:
+        rx_time = time.time() if rx_time is None else rx_time
+        rows = []
+        append = rows.append
+        receiver = self.receiver
+        for line in lines:
+            f = line.rstrip(b'\r').split(b',')
+            if len(f) < 22 or f[0] != b'MSG':
+                if line.strip():
+                    self.lines_rejected += 1
+                continue
+            try:
+                append((
+                    int(f[4], 16), rx_time,
+                    _num(f[14]), _num(f[15]),
+                    _num(f[11]), _num(f[12]), _num(f[13]), _num(f[16]),
+                    int(f[17]) if f[17] else 0,
+                    int(f[1]), receiver,
+                    f[21] == b'-1' or f[21] == b'1',
+                    f[10].strip()[:8],
+                ))
+            except ValueError:
+                self.lines_rejected += 1
+        self.lines_parsed += len(rows)
+        return rows
+
+    @staticmethod
+    def to_array(rows: Sequence[tuple]) -> np.ndarray:
+        return np.array(rows, dtype=SBS1_DTYPE)
+
+
+class SBS1StreamReader:
+    """
+    Asyncio reader for one or more dump1090 receivers (SBS-1 port 30003).
+    Rows from all receivers are merged and emitted as structured-array batches on `self.batches`
+    whenever `batch_size` rows are pending or `batch_timeout` seconds have elapsed.
+    """
+    def __init__(self, receivers: Sequence[Tuple[str, int]] = (('127.0.0.1', 30003),),
+                 batch_size: int = 1024, batch_timeout: float = 0.25,
+                 backoff_initial: float = 0.5, backoff_max: float = 30.0,
+                 max_retries: Optional[int] = None, chunk_size: int = 1 << 16,
+                 queue_size: int = 64):
+        self.receivers = list(receivers)
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.batches: Optional[asyncio.Queue] = None
+        self.running = False
+        self.stats = {"bytes": 0, "messages": 0, "batches": 0, "reconnects": 0, "rejected": 0}
+        self._pending: List[tuple] = []
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self.running = True
+        self.batches = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._receiver_loop(i, host, port))
+                       for i, (host, port) in enumerate(self.receivers)]
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Queue the final partial batch while `running` still keeps iter_batches alive.
+        await self._flush()
+        self.running = False
+
+    async def iter_batches(self):
+        """Async iterator over emitted batches; ends once the reader is stopped and drained."""
+        while self.running or not self.batches.empty():
+            try:
+                yield await asyncio.wait_for(self.batches.get(), timeout=self.batch_timeout)
+            except asyncio.TimeoutError:
+                continue
+
+    async def _receiver_loop(self, index: int, host: str, port: int) -> None:
+        delay = self.backoff_initial
+        attempts = 0
+        while self.running:
+            parser = SBS1Parser(receiver=index)
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+            except OSError as e:
+                attempts += 1
+                if self.max_retries is not None and attempts > self.max_retries:
+                    logger.error(f"SBS-1 receiver {host}:{port} unreachable after {attempts} attempts: {e}")
+                    return
+                logger.warning(f"SBS-1 receiver {host}:{port} unavailable ({e}). Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, self.backoff_max)
+                continue
+
+            logger.info(f"SBS-1 receiver connected: {host}:{port}")
+            received = False
+            try:
+                while self.running:
+                    chunk = await reader.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if not received:
+                        # Only a link that actually delivers data resets the backoff.
+                        received = True
+                        delay = self.backoff_initial
+                        attempts = 0
+                    self.stats["bytes"] += len(chunk)
+                    rows = parser.feed(chunk)
+                    if rows:
+                        self._pending.extend(rows)
+                        if len(self._pending) >= self.batch_size:
+                            await self._flush()
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"SBS-1 receiver {host}:{port} dropped: {e}")
+            finally:
+                self.stats["rejected"] += parser.lines_rejected
+                writer.close()
+            if not self.running:
+                return
+            self.stats["reconnects"] += 1
+            if not received:
+                attempts += 1
+                if self.max_retries is not None and attempts > self.max_retries:
+                    logger.error(f"SBS-1 receiver {host}:{port} closed without data {attempts} times; giving up")
+                    return
+            # Accept-then-close (dump1090 restarting, port forwarders) must not spin on reconnects.
+            logger.warning(f"SBS-1 receiver {host}:{port} disconnected. Reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, self.backoff_max)
+
+    async def _flush_loop(self) -> None:
+        while self.running:
+            await asyncio.sleep(self.batch_timeout)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        batch = SBS1Parser.to_array(rows)
+        self.stats["messages"] += len(batch)
+        self.stats["batches"] += 1
+        await self.batches.put(batch)
+
+
+class FakeDump1090Server:
+    """
+    Replays captured SBS-1 lines over TCP like a dump1090 instance.
+    `rate` is messages/second per client (None = as fast as the socket accepts).
+    """
+    def __init__(self, lines: Sequence[bytes], host: str = '127.0.0.1', port: int = 0,
+                 rate: Optional[float] = None, loop: bool = True, lines_per_write: int = 256):
+        self.lines = [l if l.endswith(b'\n') else l + b'\n' for l in lines]
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.loop = loop
+        self.lines_per_write = lines_per_write
+        self.messages_sent = 0
+        self._server = None
+
+    @classmethod
+    def from_capture(cls, path: str, **kwargs) -> "FakeDump1090Server":
+        with open(path, 'rb') as f:
+            return cls([l for l in f.read().splitlines() if l.startswith(b'MSG')], **kwargs)
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve_client(self, reader, writer) -> None:
+        # Pre-join fixed-size chunks once so replay cost is dominated by the socket, not Python.
+        step = self.lines_per_write
+        chunks = [(b''.join(self.lines[i:i + step]), len(self.lines[i:i + step]))
+                  for i in range(0, len(self.lines), step)]
+        start = time.perf_counter()
+        sent = 0
+        try:
+            while True:
+                for payload, n in chunks:
+                    writer.write(payload)
+                    await writer.drain()
+                    sent += n
+                    self.messages_sent += n
+                    if self.rate:
+                        ahead = sent / self.rate - (time.perf_counter() - start)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+                if not self.loop:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def synthesize_sbs_lines(n_messages: int, n_tracks: int = 200, seed: int = 0) -> List[bytes]:
+    """Builds airborne-position (MSG,3) lines for replay when no real capture is available."""
+    rng = np.random.default_rng(seed)
+    icao = 0x400000 + rng.integers(0, 0x3FFFFF, n_tracks)
+    base_alt = rng.integers(10000, 40000, n_tracks)
+    idx = rng.integers(0, n_tracks, n_messages)
+    alts = base_alt[idx] + rng.integers(-100, 100, n_messages)
+    lats = rng.uniform(-24.0, -23.0, n_messages)
+    lons = rng.uniform(-47.0, -46.0, n_messages)
+    return [
+        (f"MSG,3,1,1,{icao[i]:06X},1,2026/01/01,00:00:00.000,2026/01/01,00:00:00.000,,"
+         f"{alts[k]},,,{lats[k]:.5f},{lons[k]:.5f},,,0,0,0,0").encode()
+        for k, i in enumerate(idx)
+    ]
+
+
+async def _throughput_benchmark(rate: Optional[float], duration: float, n_receivers: int) -> None:
+    lines = synthesize_sbs_lines(50000)
+    servers = [FakeDump1090Server(lines, rate=rate) for _ in range(n_receivers)]
+    ports = [await s.start() for s in servers]
+    reader = SBS1StreamReader([('127.0.0.1', p) for p in ports])
+    await reader.start()
+
+    async def drain():
+        async for _ in reader.iter_batches():
+            pass
+
+    consumer = asyncio.create_task(drain())
+    await asyncio.sleep(duration)
+    await reader.stop()
+    await consumer
+    for s in servers:
+        await s.stop()
+    print(f"[SBS-1 BENCH] {reader.stats['messages'] / duration:,.0f} msg/s over {n_receivers} receiver(s) | "
+          f"{reader.stats['batches']} batches | {reader.stats['bytes'] / duration / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='SBS-1 ingestion throughput test against a local fake dump1090')
+    parser.add_argument('--rate', type=float, default=None, help='Messages/s per receiver (default: unthrottled)')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--receivers', type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(_throughput_benchmark(args.rate, args.duration, args.receivers))
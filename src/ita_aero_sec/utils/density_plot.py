@@ -0,0 +1,116 @@
+"""
+Density-binned rendering for large detection result sets.
+
+Scatter plots draw one marker per sample, so render time and memory grow with
+the traffic volume. Here points are binned into 2D histograms with NumPy
+(chunk by chunk), one layer per predicted label, and only a capped random
+sample of flagged / true-anomaly points is drawn as markers on top. Cost is
+O(n) binning plus a constant-size image, independent of the point count.
+"""
+import numpy as np
+
+CHUNK = 1 << 20
+NOMINAL_COLOR = '#00e5ff'
+THREAT_COLOR = '#ff1744'
+
+
+def _column(values) -> np.ndarray:
+    return values.to_numpy() if hasattr(values, 'to_numpy') else np.asarray(values)
+
+
+def data_extent(x, y, chunk: int = CHUNK):
+    """(xmin, xmax, ymin, ymax) over the finite values, computed chunk by chunk."""
+    x, y = _column(x), _column(y)
+    lo = np.array([np.inf, np.inf])
+    hi = -lo
+    for start in range(0, len(x), chunk):
+        for i, v in enumerate((x[start:start + chunk], y[start:start + chunk])):
+            v = v[np.isfinite(v)]
+            if len(v):
+                lo[i], hi[i] = min(lo[i], v.min()), max(hi[i], v.max())
+    if not np.all(np.isfinite(lo)):
+        return (0.0, 1.0, 0.0, 1.0)
+    # Degenerate ranges get a unit width so histogram2d has valid edges.
+    hi = np.where(hi > lo, hi, lo + 1.0)
+    return (float(lo[0]), float(hi[0]), float(lo[1]), float(hi[1]))
+
+
+def density_layers(x, y, pred, label=None, bins: int = 200, extent=None, chunk: int = CHUNK):
+    """
+    Bins (x, y) into a (bins, bins) count grid per (predicted, true) label pair.
+
+    Returns:
+        (layers, extent): layers maps (pred, label) -> counts with counts[ix, iy];
+        label is None for every key when no true labels are given.
+    """
+    x, y, pred = _column(x), _column(y), _column(pred)
+    label = None if label is None else _column(label)
+    extent = extent or data_extent(x, y, chunk)
+    bounds = [extent[:2], extent[2:]]
+    layers = {}
+    for start in range(0, len(x), chunk):
+        sl = slice(start, start + chunk)
+        cx, cy, cp = x[sl], y[sl], pred[sl]
+        cl = label[sl] if label is not None else None
+        for p in (0, 1):
+            for t in ((0, 1) if cl is not None else (None,)):
+                mask = cp == p if t is None else (cp == p) & (cl == t)
+                if not mask.any():
+                    continue
+                counts, _, _ = np.histogram2d(cx[mask], cy[mask], bins=bins, range=bounds)
+                layers[(p, t)] = layers[(p, t)] + counts if (p, t) in layers else counts
+    return layers, extent
+
+
+def anomaly_sample(pred, label=None, cap: int = 2000, seed: int = 0) -> np.ndarray:
+    """Indices of at most `cap` points that were flagged or are true anomalies."""
+    mask = _column(pred) == 1
+    if label is not None:
+        mask |= _column(label) == 1
+    idx = np.flatnonzero(mask)
+    if len(idx) > cap:
+        idx = np.sort(np.random.default_rng(seed).choice(idx, cap, replace=False))
+    return idx
+
+
+def _rgba(counts: np.ndarray, color: str) -> np.ndarray:
+    from matplotlib.colors import to_rgb
+    image = np.zeros(counts.T.shape + (4,))
+    image[..., :3] = to_rgb(color)
+    # Log scale so sparse edges of the envelope stay visible next to the dense core.
+    peak = np.log1p(counts.max()) or 1.0
+    image[..., 3] = np.log1p(counts.T) / peak
+    return image
+
+
+def plot_density(ax, x, y, pred, label=None, bins: int = 200, extent=None, max_anomaly_points: int = 2000,
+                 palette=None, seed: int = 0):
+    """
+    Draws one log-density image per predicted label on `ax`, then overlays a capped
+    sample of flagged / true-anomaly points (marker by true label, color by prediction).
+    """
+    palette = palette or {0: NOMINAL_COLOR, 1: THREAT_COLOR}
+    layers, extent = density_layers(x, y, pred, label, bins, extent)
+    for p in (0, 1):
+        counts = sum(c for (lp, _), c in layers.items() if lp == p)
+        if isinstance(counts, np.ndarray):
+            ax.imshow(_rgba(counts, palette[p]), origin='lower', extent=extent, aspect='auto',
+                      interpolation='nearest', zorder=1)
+
+    idx = anomaly_sample(pred, label, max_anomaly_points, seed)
+    if len(idx):
+        x, y, pred = _column(x)[idx], _column(y)[idx], _column(pred)[idx]
+        if label is None:
+            truth, groups = np.ones(len(idx)), ((1, 'o', 'flagged'),)
+        else:
+            truth, groups = _column(label)[idx], ((1, 'o', 'true anomaly'), (0, 'x', 'false alarm'))
+        for t, marker, name in groups:
+            for p in (0, 1):
+                m = (truth == t) & (pred == p)
+                if m.any():
+                    ax.scatter(x[m], y[m], s=8, marker=marker, color=palette[p], linewidths=0.8,
+                               label=f"pred {p} / {name}", zorder=2)
+        ax.legend(loc='upper right', fontsize='small')
+    ax.set_xlim(extent[:2])
+    ax.set_ylim(extent[2:])
+    return ax
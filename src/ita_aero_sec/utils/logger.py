@@ -24,8 +24,8 @@ class EngineeringLogger:
         c_format = logging.Formatter('%(asctime)s - [%(levelname)s] - %(message)s', datefmt='%H:%M:%S')
         c_handler.setFormatter(c_format)
         
-        # 2. File Handler (JSON Audit Trail)
-        f_handler = logging.FileHandler('flight_blackbox.jsonl')
+        # 2. File Handler (JSON Audit Trail), opened on the first record rather than at import
+        f_handler = logging.FileHandler('flight_blackbox.jsonl', delay=True)
         f_handler.setLevel(logging.DEBUG)
         
         class JsonFormatter(logging.Formatter):
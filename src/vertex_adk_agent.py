@@ -2,12 +2,11 @@
 We Can Fly V2.0 - GCP Vertex AI Agent (TRL-9)
 Conectado e Autenticado diretamente ao seu Projeto Google Cloud!
 """
-from google import genai
-from google.genai import types
 import json
 import hashlib
 import time
 import os
+from functools import lru_cache
 
 # Força o SDK a usar as credenciais do seu login `gcloud auth application-default login`
 os.environ["GOOGLE_CLOUD_PROJECT"] = "ita-wecanfly-v2-dev"
@@ -20,8 +19,11 @@ def block_sdr_port(mac_address: str, threat_type: str) -> str:
     hash_record = hashlib.sha256(f"BLOCKED:{mac_address}:{time.time()}".encode()).hexdigest()
     return f"ACTION SUCCESS: MAC {mac_address} neutralized. Forensic Hash: {hash_record}"
 
-# Inicia o Cliente Vertex AI apontando para o seu projeto recém-criado
-client = genai.Client(vertexai=True, project="ita-wecanfly-v2-dev", location="us-central1")
+@lru_cache(maxsize=1)
+def get_client():
+    """Inicia o Cliente Vertex AI apontando para o seu projeto (SDK e credenciais carregados no primeiro uso)."""
+    from google import genai
+    return genai.Client(vertexai=True, project="ita-wecanfly-v2-dev", location="us-central1")
 
 suspicious_payload = {
     "flight_id": "GHOST-77",
@@ -44,7 +46,8 @@ if __name__ == "__main__":
     
     # Executa a IA diretamente na Nuvem corporativa do seu projeto ita-wecanfly-v2-dev
     try:
-        response = client.models.generate_content(
+        from google.genai import types
+        response = get_client().models.generate_content(
             model='gemini-2.5-flash',
             contents=f"Analyze this payload and take autonomous action if needed based on your system instructions: {json.dumps(suspicious_payload)}",
             config=types.GenerateContentConfig(
@@ -0,0 +1,11 @@
+import pytest
+
+from src.gear_log_sink import configure_sink
+
+
+@pytest.fixture(autouse=True, scope="session")
+def quiet_agent_sink():
+    """Agents built without their own sink write to a silent shared sink, closed before pytest exits."""
+    sink = configure_sink(stdout=False)
+    yield sink
+    sink.close()
@@ -0,0 +1,847 @@
+import pytest
+import numpy as np
+import joblib
+import time
+import sys
+import os
+
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from adsb_spoofing import ADSBSpoofingDetector, ADSBInferenceEngine, MicroBatcher
+from ita_aero_sec.ai.kinematic_features import TrackFeatureExtractor, DETECTOR_FEATURES
+from ita_aero_sec.ai.flat_forest import FlatIsolationForest
+from ita_aero_sec.ai.online_retrainer import SampleWindow, OnlineRetrainer
+from ita_aero_sec.ai.deep_detection import DeepAnomalyDetector, NoModelError
+from ita_aero_sec.ai.numpy_lstm import NumpyLSTMAutoencoder, export_autoencoder_weights
+from ita_aero_sec.ai.envelope_rules import (EnvelopeRule, RuleCascade, adsb_cascade, avionics_cascade,
+                                            STAGE_VIOLATION, STAGE_NOMINAL, STAGE_MODEL,
+                                            STAGE_UNSCORED, NON_FINITE_RULE)
+from ita_aero_sec.utils.density_plot import density_layers, anomaly_sample
+from ita_aero_sec.ai.sovereign_auditor import SovereignIA_Auditor, GroupCommitWriter, recover_chain_tail
+from ita_aero_sec.ai.chain_verifier import verify_chain, plan_segments
+from ita_aero_sec.ai.merkle import MerkleTree, MerkleAccumulator, leaf_hash, verify_proof, verify_batch
+import run_chain_verifier
+
+@pytest.fixture(scope="module")
+def trained_adsb():
+    detector = ADSBSpoofingDetector(contamination=0.05)
+    df = detector.generate_flight_data(n_samples=1000)
+    detector.train_detector(df)
+    return detector, df
+
+class TestADSBInferenceEngine:
+    def test_matches_detector_predictions(self, trained_adsb):
+        """Raw-array scoring reproduces the DataFrame path."""
+        detector, df = trained_adsb
+        engine = ADSBInferenceEngine.from_detector(detector)
+        expected = np.where(detector.model.predict(detector.scaler.transform(df[detector.features])) == -1, 1, 0)
+        X = df[detector.features].to_numpy(dtype=np.float32)
+        np.testing.assert_array_equal(engine.predict_model(X), expected)
+        assert engine.score_batch(X).shape == (len(df),)
+
+    def test_load_training_artifact(self, trained_adsb, tmp_path):
+        """The --train artifact is loaded once and scored without pandas."""
+        detector, df = trained_adsb
+        path = tmp_path / "latest_model.joblib"
+        joblib.dump({'model': detector.model, 'scaler': detector.scaler, 'features': detector.features}, path)
+        engine = ADSBInferenceEngine.load(str(path))
+        X = df[detector.features].to_numpy(dtype=np.float32)
+        np.testing.assert_array_equal(engine.predict_batch(X), ADSBInferenceEngine.from_detector(detector).predict_batch(X))
+
+    def test_single_sample(self, trained_adsb):
+        """A 1-D feature vector is treated as a batch of one."""
+        engine = ADSBInferenceEngine.from_detector(trained_adsb[0])
+        assert engine.predict_batch(np.array([3000.0, 800.0, -95.0, 300.0])).tolist() == [1]
+        assert engine.predict_batch(np.array([5.0, 1.0, -50.0, 20.0])).tolist() == [0]
+
+    def test_micro_batching(self, trained_adsb):
+        """Single-packet submissions are coalesced into fewer model calls."""
+        detector, df = trained_adsb
+        engine = ADSBInferenceEngine.from_detector(detector)
+        X = df[detector.features].to_numpy(dtype=np.float32)[:300]
+        batcher = MicroBatcher(engine, max_batch=64, max_delay_ms=20)
+        futures = [batcher.submit(x) for x in X]
+        labels = np.array([f.result(timeout=5) for f in futures])
+        batcher.close()
+        np.testing.assert_array_equal(labels, engine.predict_batch(X))
+        assert batcher.batches_scored < len(X)
+        with pytest.raises(RuntimeError):
+            batcher.submit(X[0])
+
+def _messages(n=400, n_tracks=20, seed=0):
+    rng = np.random.default_rng(seed)
+    icao = rng.integers(0, n_tracks, n) + 0xE48C00
+    t = np.arange(n, dtype=np.float64) * 0.1
+    return icao, t, rng.normal(32000, 50, n), rng.normal(480, 10, n), rng.normal(-50, 5, n)
+
+class TestTrackFeatureExtractor:
+    def test_deltas_follow_track_history(self):
+        """Deltas are taken against the previous message of the same aircraft."""
+        fx = TrackFeatureExtractor(window=4)
+        out = fx.update([1, 2, 1, 1], [0.0, 0.0, 1.0, 3.0], [1000, 5000, 1100, 1050],
+                        [400, 300, 410, 405], [-50, -60, -52, -54], extended=True)
+        np.testing.assert_allclose(out[:, 0], [0, 0, 100, -50])
+        np.testing.assert_allclose(out[:, 1], [0, 0, 10, -5])
+        np.testing.assert_allclose(out[:, 4], [0, 0, 100, -25])           # altitude_rate ft/s
+        np.testing.assert_allclose(out[:, 6], [-50, -60, -51, -52])       # rolling RSSI mean
+        assert len(fx) == 2
+
+    def test_batch_equals_sequential(self):
+        """A batch update is identical to feeding the same messages one at a time."""
+        icao, t, alt, vel, rssi = _messages()
+        batched = TrackFeatureExtractor(window=8).update(icao, t, alt, vel, rssi, extended=True)
+        single = TrackFeatureExtractor(window=8)
+        sequential = np.vstack([single.update(icao[i:i + 1], t[i:i + 1], alt[i:i + 1], vel[i:i + 1],
+                                              rssi[i:i + 1], extended=True) for i in range(len(icao))])
+        np.testing.assert_allclose(batched, sequential, rtol=1e-5, atol=1e-3)
+
+    def test_rolling_window_statistics(self):
+        """Rolling RSSI statistics only cover the last `window` messages."""
+        fx = TrackFeatureExtractor(window=3)
+        rssi = np.array([-90.0, -50.0, -52.0, -54.0])
+        out = fx.update(np.ones(4), np.arange(4.0), np.zeros(4), np.zeros(4), rssi, extended=True)
+        assert out[-1, 6] == pytest.approx(-52.0)
+        assert out[-1, 7] == pytest.approx(np.std([-50.0, -52.0, -54.0]), rel=1e-4)
+
+    def test_latency_and_detector_columns(self):
+        """Default output has the detector's four columns; latency comes from receive time."""
+        fx = TrackFeatureExtractor()
+        out = fx.update([7], [10.0], [32000], [480], [-50], rx_time=[10.025])
+        assert out.shape == (1, len(DETECTOR_FEATURES))
+        assert out[0, 3] == pytest.approx(25.0, rel=1e-3)
+
+    def test_stale_tracks_evicted(self):
+        """Tracks silent for longer than the TTL free their slots."""
+        fx = TrackFeatureExtractor(max_tracks=4, track_ttl_s=5.0)
+        fx.update([1, 2, 3], [0.0, 0.0, 0.0], [0] * 3, [0] * 3, [0] * 3)
+        fx.update([3], [4.0], [0], [0], [0])
+        assert fx.evict_stale(now=6.0) == 2
+        assert len(fx) == 1
+
+    def test_capacity_recycles_oldest_tracks(self):
+        """A full table recycles the least recently seen tracks, never ones in the current batch."""
+        fx = TrackFeatureExtractor(max_tracks=4, track_ttl_s=1e9)
+        fx.update([1, 2, 3, 4], [0.0, 1.0, 2.0, 3.0], [0] * 4, [0] * 4, [0] * 4)
+        out = fx.update([1, 5], [4.0, 4.0], [100, 0], [0, 0], [0, 0])
+        assert out[0, 0] == 100  # Track 1 kept its history
+        assert len(fx) <= 4 and 5 in fx._slots and 1 in fx._slots
+        with pytest.raises(RuntimeError):
+            fx.update(np.arange(10, 20), np.full(10, 5.0), np.zeros(10), np.zeros(10), np.zeros(10))
+
+
+class TestFlatIsolationForest:
+    @pytest.mark.parametrize("kwargs", [{}, {"max_features": 0.5}, {"bootstrap": True, "max_samples": 100}])
+    def test_scores_identical_to_sklearn(self, kwargs):
+        """Exported forest reproduces score_samples, decision_function and predict exactly."""
+        rng = np.random.default_rng(3)
+        forest = IsolationForest(contamination=0.05, random_state=0, **kwargs).fit(rng.normal(size=(600, 4)))
+        X = np.vstack([rng.normal(size=(300, 4)), rng.normal(0, 6, size=(20, 4))])
+        flat = FlatIsolationForest.from_sklearn(forest)
+        np.testing.assert_array_equal(flat.score_samples(X), forest.score_samples(X))
+        np.testing.assert_array_equal(flat.decision_function(X), forest.decision_function(X))
+        np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+
+    def test_compiled_engine(self, trained_adsb):
+        """The engine's compiled mode scores exactly like the sklearn path."""
+        detector, df = trained_adsb
+        X = df[detector.features].to_numpy(dtype=np.float32)
+        compiled = ADSBInferenceEngine.from_detector(detector, compiled=True)
+        np.testing.assert_array_equal(compiled.score_batch(X), ADSBInferenceEngine.from_detector(detector).score_batch(X))
+        assert compiled.predict_batch(X[0]).shape == (1,)
+
+
+class TestOnlineRetrainer:
+    def test_sliding_window_keeps_latest_rows(self):
+        """The sliding window retains exactly the most recent `capacity` rows."""
+        window = SampleWindow(capacity=5, n_features=1)
+        window.add(np.arange(3.0))
+        window.add(np.arange(3.0, 9.0))
+        assert sorted(window.snapshot().ravel().tolist()) == [4.0, 5.0, 6.0, 7.0, 8.0]
+        assert window.seen == 9
+
+    def test_reservoir_is_uniform(self):
+        """The reservoir keeps a uniform sample over the whole stream."""
+        window = SampleWindow(capacity=1000, n_features=1, policy='reservoir', seed=0)
+        for start in range(0, 100000, 5000):
+            window.add(np.arange(start, start + 5000, dtype=np.float32))
+        kept = window.snapshot().ravel()
+        assert len(kept) == 1000 and len(np.unique(kept)) == 1000
+        assert 40000 < kept.mean() < 60000
+
+    def test_observe_never_blocks(self):
+        """A held window lock makes observe() drop samples instead of waiting."""
+        retrainer = OnlineRetrainer(None, IsolationForest(), StandardScaler(), ['a', 'b'])
+        with retrainer.window._lock:
+            retrainer.observe(np.zeros((4, 2)))
+        assert retrainer.stats["dropped"] == 4 and len(retrainer.window) == 0
+
+    def test_refit_swaps_engine(self, trained_adsb):
+        """A refit on drifted nominal traffic is published to the engine and accepts the new regime."""
+        detector, _ = trained_adsb
+        engine = ADSBInferenceEngine.from_detector(detector)
+        rng = np.random.default_rng(1)
+        drifted = np.column_stack([rng.normal(0, 50, 2000), rng.normal(0, 10, 2000),
+                                   rng.normal(-65, 5, 2000), rng.normal(50, 5, 2000)])
+        before = engine.predict_batch(drifted).mean()
+        retrainer = OnlineRetrainer(engine, detector.model, detector.scaler, detector.features,
+                                    min_samples=1000, retrain_every=1000, min_interval_s=0.0).start()
+        retrainer.observe(drifted)
+        deadline = time.time() + 30
+        while retrainer.stats["retrains"] == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        retrainer.stop()
+        assert retrainer.stats["retrains"] >= 1 and retrainer.stats["errors"] == 0
+        assert before > 0.5 and engine.predict_batch(drifted).mean() < 0.1
+        assert engine._state[0] is not detector.model
+
+    def test_flagged_rows_excluded(self):
+        """Rows labelled anomalous never enter the training window."""
+        retrainer = OnlineRetrainer(None, IsolationForest(), StandardScaler(), ['a'])
+        retrainer.observe(np.arange(6.0), labels=np.array([0, 1, 0, 1, 1, 0]))
+        assert sorted(retrainer.window.snapshot().ravel().tolist()) == [0.0, 2.0, 5.0]
+
+    def test_avionics_detector_target(self):
+        """AvionicsAnomalyDetector exposes swap() so it can be retrained online too."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        detector = AvionicsAnomalyDetector()
+        retrainer = OnlineRetrainer(detector, detector.model, detector.scaler, detector.features, min_samples=200)
+        rng = np.random.default_rng(2)
+        retrainer.observe(np.column_stack([rng.normal(480, 10, 500), rng.normal(32000, 500, 500), np.zeros(500)]))
+        assert retrainer.retrain_now()
+        assert detector.predict_batch([[480.0, 32000.0, 1.0], [481.0, 32100.0, 0.0]]).tolist() == [1, 0]
+
+
+class TestAvionicsEngines:
+    @pytest.mark.parametrize("engine", ["nystroem", "sgd"])
+    def test_engine_flags_gear_injection(self, engine):
+        """Approximate engines keep the train_detector interface with detection close to the exact SVM."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        detector = AvionicsAnomalyDetector(contamination=0.03, engine=engine, chunk_size=1000)
+        data = detector.simulate_arinc_bus(4000)
+        detector.train_detector(data)
+        flags = detector.predict_batch(data[detector.features].to_numpy())
+        # The exact SVM flags ~2% of nominal words and ~44% of injections on this data.
+        assert flags[data['label'] == 0].mean() < 0.05
+        assert flags[data['label'] == 1].mean() > 0.3
+
+    def test_partial_fit_only_for_sgd(self):
+        """Online updates are limited to the SGD engine; unknown engines are rejected."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        with pytest.raises(ValueError):
+            AvionicsAnomalyDetector(engine="nystroem").partial_fit(AvionicsAnomalyDetector().simulate_arinc_bus(100))
+        with pytest.raises(ValueError):
+            AvionicsAnomalyDetector(engine="gpu")
+
+    def test_sgd_streams_in_chunks(self):
+        """Successive partial_fit calls refine the same linear model over a fixed feature map."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        detector = AvionicsAnomalyDetector(engine="sgd", chunk_size=500)
+        data = detector.simulate_arinc_bus(3000)
+        detector.partial_fit(data.iloc[:1500])
+        components = detector.model.named_steps["kernel"].components_.copy()
+        detector.partial_fit(data.iloc[1500:])
+        np.testing.assert_array_equal(detector.model.named_steps["kernel"].components_, components)
+        assert detector.model.named_steps["ocsvm"].t_ > 3000
+
+
+class TestRuleCascade:
+    def test_stages_short_circuit(self):
+        """Violations and clear nominals never reach the model; only the ambiguous middle does."""
+        seen = []
+        def scorer(X):
+            seen.append(X.copy())
+            return np.ones(len(X))
+        cascade = RuleCascade([EnvelopeRule("too_high", (("a", ">", 10.0),))],
+                              [EnvelopeRule("core", (("a", "abs<=", 1.0), ("b", "<", 5.0)))], scorer, ["a", "b"])
+        result = cascade.run(np.array([[20.0, 0.0], [0.5, 1.0], [3.0, 1.0], [0.5, 9.0]]))
+        assert result.labels.tolist() == [1, 0, 1, 1]
+        assert result.stage.tolist() == [STAGE_VIOLATION, STAGE_NOMINAL, STAGE_MODEL, STAGE_MODEL]
+        np.testing.assert_array_equal(seen[0], [[3.0, 1.0], [0.5, 9.0]])
+        assert cascade.stats.report()["counts"] == {"violation": 1, "nominal": 1, "model": 2, "unscored": 0}
+
+    def test_no_scorer_counts_unscored(self):
+        """Without a scorer the ambiguous middle is labelled nominal but not reported as model-decided."""
+        cascade = RuleCascade([], [EnvelopeRule("core", (("a", "abs<=", 1.0),))], None, ["a"])
+        result = cascade.run(np.array([0.5, 3.0]))
+        assert result.labels.tolist() == [0, 0]
+        assert result.stage.tolist() == [STAGE_NOMINAL, STAGE_UNSCORED]
+        assert cascade.stats.counts["model"] == 0 and cascade.stats.counts["unscored"] == 1
+        assert cascade.explain(result, 1) == "UNSCORED:no_model"
+
+    def test_non_finite_features_are_violations(self):
+        """NaN/inf features are flagged by the rules and never handed to the scorer."""
+        seen = []
+        def scorer(X):
+            seen.append(X.copy())
+            return np.zeros(len(X))
+        cascade = RuleCascade([EnvelopeRule("too_high", (("a", ">", 10.0),))],
+                              [EnvelopeRule("core", (("a", "abs<=", 1.0),))], scorer, ["a", "b"])
+        result = cascade.run(np.array([[np.nan, 0.0], [0.0, np.inf], [20.0, np.nan], [3.0, 1.0]]))
+        assert result.labels.tolist() == [1, 1, 1, 0]
+        assert result.rule.tolist() == [NON_FINITE_RULE, NON_FINITE_RULE, 0, -1]
+        np.testing.assert_array_equal(seen[0], [[3.0, 1.0]])
+        assert cascade.stats.non_finite == 3
+        assert "non_finite" in cascade.explain(result, 0)
+
+    def test_first_rule_attribution(self):
+        """When several violation rules fire, the first declared one is reported."""
+        rules = [EnvelopeRule("r0", (("a", ">", 5.0),), "big"), EnvelopeRule("r1", (("a", ">", 1.0),))]
+        cascade = RuleCascade(rules, [], None, ["a"])
+        result = cascade.run(np.array([6.0, 2.0, 0.0]))
+        assert result.rule.tolist() == [0, 1, -1]
+        assert cascade.explain(result, 0) == "RULE:r0 | big"
+        assert cascade.stats.rule_hits == {"r0": 1, "r1": 2}
+
+    def test_adsb_cascade_matches_model_recall(self, trained_adsb):
+        """The ADS-B cascade catches every spoof the model does while scoring far fewer samples."""
+        detector, df = trained_adsb
+        engine = ADSBInferenceEngine.from_detector(detector)
+        cascade = adsb_cascade(engine)
+        labels = cascade.predict_batch(df[detector.features])
+        spoofed = df['label'].to_numpy() == 1
+        assert labels[spoofed].mean() >= engine.predict_batch(df[detector.features].to_numpy())[spoofed].mean()
+        assert cascade.stats.counts["model"] < 0.1 * len(df)
+
+    def test_engines_run_the_cascade(self, trained_adsb):
+        """ADSBInferenceEngine and AvionicsAnomalyDetector score through the envelope rules by default."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        engine = ADSBInferenceEngine.from_detector(trained_adsb[0])
+        assert engine.predict_batch(np.array([[0.0, 0.0, -50.0, np.nan], [0.0, 0.0, -50.0, 400.0]])).tolist() == [1, 1]
+        assert engine.cascade.stats.counts["violation"] == 2 and engine.cascade.stats.counts["model"] == 0
+        assert ADSBInferenceEngine.from_detector(trained_adsb[0], envelope=False).cascade is None
+        avionics = AvionicsAnomalyDetector()
+        assert avionics.predict_batch([[480.0, 32000.0, 1.0]]).tolist() == [1]
+        assert avionics.cascade.stats.rule_hits["gear_down_above_vlo"] == 1
+
+    def test_avionics_gear_above_vlo(self):
+        """Gear DOWN above 270 KTAS is a rule-level violation on structured frames."""
+        from avionics_anomaly import AvionicsAnomalyDetector
+        frames = np.zeros(3, dtype=[('airspeed', 'f4'), ('altitude', 'f4'), ('gear_status', 'f4')])
+        frames['airspeed'] = [480.0, 250.0, 480.0]
+        frames['altitude'] = [32000.0, 3000.0, 32000.0]
+        frames['gear_status'] = [1.0, 1.0, 0.0]
+        cascade = avionics_cascade(AvionicsAnomalyDetector())
+        cascade.scorer = lambda X: np.zeros(len(X))
+        result = cascade.run(frames)
+        assert result.stage.tolist() == [STAGE_VIOLATION, STAGE_MODEL, STAGE_NOMINAL]
+        assert "VLO" in cascade.explain(result, 0)
+
+
+class _IdentityModel:
+    """Stands in for the Keras autoencoder: perfect reconstruction, records batch sizes."""
+    def __init__(self):
+        self.batches = []
+
+    def predict_on_batch(self, batch):
+        self.batches.append(len(batch))
+        return np.array(batch)
+
+
+class _MeanModel:
+    """Test double reconstructing each window by its per-feature mean."""
+    def predict_on_batch(self, batch):
+        return np.broadcast_to(batch.mean(axis=1, keepdims=True), batch.shape)
+
+
+class TestDeepStreamScoring:
+    def test_windows_are_views(self):
+        """Sliding windows share memory with the telemetry array."""
+        detector = DeepAnomalyDetector(sequence_length=4, features=2)
+        telemetry = np.arange(20, dtype=np.float32).reshape(10, 2)
+        windows = detector.windows(telemetry)
+        assert windows.shape == (7, 4, 2) and np.shares_memory(windows, telemetry)
+        np.testing.assert_array_equal(windows[3], telemetry[3:7])
+        assert detector.windows(telemetry, stride=3).shape == (3, 4, 2)
+
+    def test_batched_model_calls(self):
+        """Windows are scored in large batches rather than one predict per sequence."""
+        detector = DeepAnomalyDetector(sequence_length=10, features=3)
+        detector.model = _IdentityModel()
+        errors = detector.detect_stream(np.random.rand(5009, 3), batch_size=1000)
+        assert detector.model.batches == [1000] * 5
+        assert errors.shape == (5009,) and np.allclose(errors, 0.0)
+
+    def test_per_timestep_errors_locate_anomaly(self):
+        """Per-timestep errors average every covering window and peak at the injected spike."""
+        detector = DeepAnomalyDetector(sequence_length=10, features=3)
+        detector.model = _MeanModel()
+        flight = np.random.default_rng(0).random((3000, 3)).astype(np.float32)
+        flight[1500] += 10.0
+        errors = detector.detect_stream(flight, batch_size=256)
+        assert int(np.argmax(errors)) == 1500
+        tracks = detector.detect_tracks({"A": flight, "B": flight[:5]})
+        np.testing.assert_allclose(tracks["A"], errors)
+        assert np.isnan(tracks["B"]).all()
+
+    def test_no_model_refuses_to_score(self):
+        """Without TensorFlow or exported weights there are no stream scores at all."""
+        detector = DeepAnomalyDetector(sequence_length=10, features=3)
+        detector.model = None
+        assert not detector.has_model
+        with pytest.raises(NoModelError):
+            detector.detect_stream(np.random.rand(50, 3))
+        with pytest.raises(NoModelError):
+            detector.detect(np.full((1, 10, 3), 0.9))
+
+    def test_detect_propagates_model_errors(self):
+        """A failing model is an error, not a neutral 0.5 score."""
+        class Broken:
+            def predict_on_batch(self, batch):
+                raise RuntimeError("corrupt weights")
+        detector = DeepAnomalyDetector(sequence_length=10, features=3)
+        detector.model = Broken()
+        with pytest.raises(RuntimeError, match="corrupt weights"):
+            detector.detect(np.random.rand(1, 10, 3))
+
+
+class _FakeLayer:
+    def __init__(self, *weights, activation="relu"):
+        self._weights, self._activation = list(weights), activation
+
+    def get_weights(self):
+        return self._weights
+
+    def get_config(self):
+        return {"activation": self._activation}
+
+
+def _reference_lstm(x, kernel, recurrent, bias, h0_inputs=None):
+    """Unvectorized Keras LSTM (gates i, f, c, o; sigmoid recurrent, relu activation)."""
+    u = recurrent.shape[0]
+    sig = lambda v: 1.0 / (1.0 + np.exp(-v))
+    h, c, out = np.zeros(u), np.zeros(u), []
+    for x_t in x:
+        z = x_t @ kernel + h @ recurrent + bias
+        i, f, g, o = sig(z[:u]), sig(z[u:2 * u]), np.maximum(z[2 * u:3 * u], 0), sig(z[3 * u:])
+        c = f * c + i * g
+        h = o * np.maximum(c, 0)
+        out.append(h)
+    return np.array(out)
+
+
+class TestNumpyLSTM:
+    @pytest.fixture
+    def autoencoder_layers(self):
+        rng = np.random.default_rng(5)
+        u, f = 8, 3
+        return [
+            _FakeLayer(rng.normal(0, .5, (f, 4 * u)), rng.normal(0, .5, (u, 4 * u)), rng.normal(0, .1, 4 * u)),
+            _FakeLayer(),
+            _FakeLayer(rng.normal(0, .5, (u, 4 * u)), rng.normal(0, .5, (u, 4 * u)), rng.normal(0, .1, 4 * u)),
+            _FakeLayer(rng.normal(0, .5, (u, f)), rng.normal(0, .1, f)),
+        ]
+
+    def test_forward_matches_reference(self, autoencoder_layers, tmp_path):
+        """Exported weights reproduce a step-by-step Keras-convention LSTM autoencoder."""
+        model = type("Model", (), {"layers": autoencoder_layers, "input_shape": (None, 10, 3)})()
+        path = export_autoencoder_weights(model, str(tmp_path / "ae.npz"))
+        engine = NumpyLSTMAutoencoder.load(path)
+        assert engine.sequence_length == 10
+
+        x = np.random.default_rng(6).random((4, 10, 3))
+        enc, _, dec, dense = [layer.get_weights() for layer in autoencoder_layers]
+        for k in range(len(x)):
+            code = _reference_lstm(x[k], *enc)[-1]
+            expected = _reference_lstm(np.repeat(code[None], 10, axis=0), *dec) @ dense[0] + dense[1]
+            np.testing.assert_allclose(engine.predict_on_batch(x)[k], expected, rtol=1e-4, atol=1e-5)
+
+    def test_detector_runs_without_tensorflow(self, autoencoder_layers, tmp_path):
+        """DeepAnomalyDetector(weights_path=...) scores with the NumPy engine."""
+        model = type("Model", (), {"layers": autoencoder_layers, "input_shape": (None, 10, 3)})()
+        path = export_autoencoder_weights(model, str(tmp_path / "ae.npz"))
+        detector = DeepAnomalyDetector(sequence_length=10, features=3, weights_path=path)
+        sequence = np.random.default_rng(7).random((1, 10, 3))
+        assert detector.detect(sequence) == pytest.approx(float(detector.model.reconstruction_loss(sequence)[0]))
+        assert detector.detect_stream(np.random.default_rng(8).random((500, 3))).shape == (500,)
+
+
+class TestLazyImports:
+    def _fresh_import(self, module, cwd):
+        import subprocess
+        src = os.path.join(os.path.dirname(__file__), '..', 'src')
+        code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             cwd=cwd, env=dict(os.environ, PYTHONPATH=os.path.abspath(src)))
+        import json
+        return set(json.loads(out.stdout))
+
+    def test_heavy_dependencies_load_on_first_use(self, tmp_path):
+        """Detector modules import without plotting or TensorFlow; the logger opens no file."""
+        loaded = self._fresh_import("adsb_spoofing, ita_aero_sec.ai.deep_detection, ita_aero_sec.utils.logger", tmp_path)
+        assert not {"matplotlib", "seaborn", "tensorflow"} & loaded
+        assert not (tmp_path / "flight_blackbox.jsonl").exists()
+
+
+class TestDensityPlot:
+    def test_layers_partition_points_by_label(self):
+        """Every point lands in exactly one (pred, label) grid, even across chunks."""
+        rng = np.random.default_rng(0)
+        x, y = rng.normal(size=5000), rng.normal(size=5000)
+        pred, label = rng.integers(0, 2, 5000), rng.integers(0, 2, 5000)
+        layers, extent = density_layers(x, y, pred, label, bins=32, chunk=1000)
+        assert set(layers) == {(0, 0), (0, 1), (1, 0), (1, 1)}
+        assert all(grid.shape == (32, 32) for grid in layers.values())
+        assert layers[(1, 0)].sum() == np.sum((pred == 1) & (label == 0))
+        assert sum(grid.sum() for grid in layers.values()) == 5000
+        assert extent == (x.min(), x.max(), y.min(), y.max())
+
+    def test_anomaly_overlay_is_capped(self):
+        """Only a bounded sample of flagged or true-anomaly points is drawn as markers."""
+        pred = np.zeros(100000, dtype=int)
+        pred[::10] = 1
+        label = np.zeros_like(pred)
+        label[5::50] = 1
+        idx = anomaly_sample(pred, label, cap=500)
+        assert len(idx) == 500 and np.all(np.diff(idx) > 0)
+        assert np.all((pred[idx] == 1) | (label[idx] == 1))
+        assert len(anomaly_sample(pred[:100], cap=500)) == 10
+
+    def test_plot_results_writes_density_figure(self, trained_adsb, tmp_path):
+        """plot_results writes the density figure through the binned path."""
+        import matplotlib
+        matplotlib.use("Agg")
+        detector, df = trained_adsb
+        out = tmp_path / "adsb.png"
+        detector.plot_results(df.copy(), np.asarray(df['label']), filename=str(out), bins=64)
+        assert out.stat().st_size > 0
+
+
+class TestGroupCommitAuditor:
+    def _records(self, path):
+        import json
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_chain_order_preserved_across_threads(self, tmp_path):
+        """Concurrent decisions land in the file in hash-chain order."""
+        import threading
+        path = tmp_path / "audit.log"
+        auditor = SovereignIA_Auditor(log_path=str(path), fsync="count", batch_records=16)
+        workers = [threading.Thread(target=lambda w=w: [auditor.audit_decision("NODE", "OK", {"W": w, "I": i})
+                                                         for i in range(250)]) for w in range(4)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        auditor.close()
+        records = self._records(path)
+        assert len(records) == 1000
+        assert records[0]["prev_hash"] == "0" * 64
+        assert all(b["prev_hash"] == a["forensic_signature"] for a, b in zip(records, records[1:]))
+        assert records[-1]["forensic_signature"] == auditor.last_hash
+
+    def test_count_policy_batches_commits(self, tmp_path):
+        """Records reach the file in groups of batch_records; flush drains the tail."""
+        writer = GroupCommitWriter(str(tmp_path / "w.log"), fsync="count", batch_records=10)
+        for i in range(25):
+            writer.append(f'{{"i": {i}}}')
+        assert writer.counters()["commits"] == 2 and writer.pending == 5
+        writer.flush()
+        c = writer.counters()
+        assert c["records"] == 25 and c["commits"] == 3 and c["commit_ms_max"] >= c["commit_ms_mean"] > 0
+        writer.close()
+
+    def test_always_and_interval_policies(self, tmp_path):
+        """'always' commits each record; 'interval' commits an idle tail in the background."""
+        with GroupCommitWriter(str(tmp_path / "a.log"), fsync="always", batch_records=100) as writer:
+            for i in range(3):
+                writer.append("{}")
+            assert writer.counters()["fsyncs"] == 3
+        writer = GroupCommitWriter(str(tmp_path / "i.log"), fsync="interval", batch_records=1000, interval_ms=5)
+        writer.append("{}")
+        deadline = time.time() + 2
+        while writer.pending and time.time() < deadline:
+            time.sleep(0.005)
+        assert writer.pending == 0 and (tmp_path / "i.log").read_text() == "{}\n"
+        writer.close()
+        with pytest.raises(ValueError):
+            GroupCommitWriter(str(tmp_path / "x.log"), fsync="sometimes")
+
+    def test_count_policy_has_time_bound(self, tmp_path):
+        """A lone record under 'count' is committed after max_delay_ms, not held until the batch fills."""
+        writer = GroupCommitWriter(str(tmp_path / "c.log"), fsync="count", batch_records=1000, max_delay_ms=5)
+        writer.append("{}")
+        deadline = time.time() + 2
+        while writer.pending and time.time() < deadline:
+            time.sleep(0.005)
+        assert writer.pending == 0 and (tmp_path / "c.log").read_text() == "{}\n"
+        writer.close()
+
+    def test_failed_commit_keeps_records_for_retry(self, tmp_path):
+        """A group whose write fails stays queued (chain intact on disk) and is committed on retry."""
+        path = tmp_path / "audit.log"
+        auditor = SovereignIA_Auditor(log_path=str(path), batch_records=4)
+        real = auditor.writer._file
+
+        class FailingOnce:
+            failed = False
+            def write(self, data):
+                if not FailingOnce.failed:
+                    FailingOnce.failed = True
+                    real.write(bytes(data[:10]))   # Partial write before the error
+                    raise OSError(28, "No space left on device")
+                return real.write(data)
+            def __getattr__(self, name):
+                return getattr(real, name)
+
+        auditor.writer._file = FailingOnce()
+        for i in range(3):
+            auditor.audit_decision("NODE", "OK", {"I": i})
+        with pytest.raises(OSError):
+            auditor.audit_decision("NODE", "OK", {"I": 3})
+        assert auditor.writer.pending == 4 and path.read_bytes() == b""
+        auditor.audit_decision("NODE", "OK", {"I": 4})
+        auditor.close()
+        records = self._records(path)
+        assert [r["seq"] for r in records] == list(range(5))
+        assert verify_chain(str(path), workers=1)["ok"]
+
+
+class TestChainTailRecovery:
+    def _write(self, path, n):
+        auditor = SovereignIA_Auditor(log_path=str(path))
+        for i in range(n):
+            auditor.audit_decision("NODE", "OK", {"I": i, "PAD": "x" * (6000 if i == n - 1 else 0)})
+        auditor.close()
+        return auditor
+
+    def test_restart_resumes_chain(self, tmp_path):
+        """A restarted auditor continues the hash chain and sequence instead of forking at genesis."""
+        path = tmp_path / "audit.log"
+        first = self._write(path, 5)
+        second = SovereignIA_Auditor(log_path=str(path))
+        assert second.recovery["status"] == "ok"
+        assert second.last_hash == first.last_hash and second.seq == 4
+        second.audit_decision("NODE", "OK", {})
+        second.close()
+        import json
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["seq"] for r in records] == list(range(6))
+        assert records[5]["prev_hash"] == records[4]["forensic_signature"]
+
+    def test_tail_read_is_constant_in_log_size(self, tmp_path, monkeypatch):
+        """Only the last record's blocks are read, not the whole log."""
+        path = tmp_path / "audit.log"
+        self._write(path, 2000)
+        import builtins
+        reads = []
+        real_open = builtins.open
+
+        class Counting:
+            def __init__(self, f):
+                self.f = f
+            def read(self, n=-1):
+                data = self.f.read(n)
+                reads.append(len(data))
+                return data
+            def __getattr__(self, name):
+                return getattr(self.f, name)
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                self.f.close()
+
+        monkeypatch.setattr(builtins, "open", lambda *a, **k: Counting(real_open(*a, **k)))
+        tail = recover_chain_tail(str(path), repair=False)
+        monkeypatch.undo()
+        assert tail["seq"] == 1999
+        assert sum(reads) < 16384 < path.stat().st_size
+
+    def test_torn_final_line_is_reported_and_repaired(self, tmp_path):
+        """A crash fragment is moved aside and the chain resumes from the last complete record."""
+        path = tmp_path / "audit.log"
+        first = self._write(path, 3)
+        intact = path.read_bytes()
+        with open(path, "ab") as f:
+            f.write(b'{"seq": 3, "timestamp": "20')
+        assert recover_chain_tail(str(path), repair=False)["status"] == "torn"
+        auditor = SovereignIA_Auditor(log_path=str(path))
+        auditor.close()
+        assert auditor.recovery["status"] == "repaired" and auditor.recovery["torn_bytes"] == 27
+        assert auditor.last_hash == first.last_hash and auditor.seq == 2
+        assert path.read_bytes() == intact
+        assert (tmp_path / "audit.log.torn").read_bytes().startswith(b'{"seq": 3')
+
+    def test_corrupt_complete_record_raises(self, tmp_path):
+        """A chain log ending in a newline-terminated line that is not a signed record is not silently skipped."""
+        path = tmp_path / "audit.log"
+        self._write(path, 2)
+        with open(path, "a") as f:
+            f.write("not json\n")
+        with pytest.raises(ValueError):
+            recover_chain_tail(str(path))
+
+    def test_plain_text_log_is_refused_and_left_alone(self, tmp_path):
+        """A text log is reported and never renamed or written; the auditor refuses to start on it."""
+        path = tmp_path / "audit.log"
+        legacy = "2026-03-21 16:45:14,540 | TRL-9 PRODUCTION AUDITOR | INFO | Edge: HEALTHY\n" * 3
+        path.write_text(legacy)
+        assert recover_chain_tail(str(path))["status"] == "legacy"
+        with pytest.raises(ValueError, match="not a forensic chain log"):
+            SovereignIA_Auditor(log_path=str(path))
+        assert path.read_text() == legacy and sorted(p.name for p in tmp_path.iterdir()) == ["audit.log"]
+
+    def test_default_log_is_not_the_text_logger_file(self):
+        """The chain log does not share its default path with trl9_production_auditor's logging output."""
+        import inspect
+        default = inspect.signature(SovereignIA_Auditor).parameters["log_path"].default
+        assert default.endswith(".jsonl") and default != "trl9_civil_aviation_audit.log"
+
+
+class TestChainVerifier:
+    @pytest.fixture
+    def audit_log(self, tmp_path):
+        path = tmp_path / "audit.log"
+        auditor = SovereignIA_Auditor(log_path=str(path))
+        for i in range(400):
+            auditor.audit_decision("NODE", "OK", {"I": i})
+        auditor.close()
+        return path
+
+    def _offsets(self, path):
+        offsets, pos = [], 0
+        for line in path.read_bytes().splitlines(keepends=True):
+            offsets.append(pos)
+            pos += len(line)
+        return offsets
+
+    def test_parallel_segments_stitch(self, audit_log):
+        """Segments verified on a process pool stitch into one intact chain."""
+        segments = plan_segments(str(audit_log), segment_bytes=8192)
+        assert len(segments) > 4 and set(a for a, _ in segments) <= set(self._offsets(audit_log))
+        report = verify_chain(str(audit_log), workers=2, segment_bytes=8192)
+        assert report["ok"] and report["records"] == 400 and report["format"] == "auditor"
+
+    def test_first_broken_link_reported_with_offset(self, audit_log):
+        """Tampered content and a deleted record are located at their exact byte offsets."""
+        lines = audit_log.read_bytes().splitlines(keepends=True)
+        offsets = self._offsets(audit_log)
+        tampered = list(lines)
+        tampered[250] = tampered[250].replace(b'"OK"', b'"NO"')
+        audit_log.write_bytes(b"".join(tampered))
+        error = verify_chain(str(audit_log), workers=1, segment_bytes=4096)["error"]
+        assert error["kind"] == "bad_signature" and error["offset"] == offsets[250] and error["record"] == 250
+
+        # Removing a record breaks the link of its successor (possibly across a segment boundary).
+        audit_log.write_bytes(b"".join(lines[:100] + lines[101:]))
+        report = verify_chain(str(audit_log), workers=1, segment_bytes=4096)
+        assert not report["ok"]
+        assert report["error"]["kind"] == "broken_link" and report["error"]["offset"] == offsets[100]
+
+    def test_empty_chain_is_intact(self, tmp_path):
+        """A chain with no records yet verifies as 0 records instead of an unreadable file."""
+        path = tmp_path / "empty.log"
+        path.write_bytes(b"")
+        report = verify_chain(str(path), workers=1)
+        assert report["ok"] and report["records"] == 0 and report["format"] is None
+        assert run_chain_verifier.main([str(path), "--workers", "1"]) == 0
+
+    def test_resume_from_checkpoint(self, audit_log, tmp_path):
+        """A later run only re-hashes records appended after the last checkpoint."""
+        ckpt = str(tmp_path / "audit.ckpt")
+        first = verify_chain(str(audit_log), workers=1, segment_bytes=8192, checkpoint_path=ckpt)
+        auditor = SovereignIA_Auditor(log_path=str(audit_log))
+        for i in range(10):
+            auditor.audit_decision("NODE", "OK", {"I": 400 + i})
+        auditor.close()
+        second = verify_chain(str(audit_log), workers=1, checkpoint_path=ckpt, resume=True)
+        assert first["ok"] and second["ok"]
+        assert second["resumed_from"] == first["checkpoints"][-1]["offset"] and second["records"] == 10
+
+        audit_log.write_bytes(audit_log.read_bytes()[:100])
+        with pytest.raises(ValueError):
+            verify_chain(str(audit_log), workers=1, checkpoint_path=ckpt, resume=True)
+
+
+class TestMerkle:
+    def test_proofs_verify_for_every_tree_size(self):
+        """Inclusion proofs hold for odd and even sizes; path length is ceil(log2 n) at most."""
+        for n in range(1, 34):
+            tree = MerkleTree.from_records([{"i": i} for i in range(n)])
+            for i in range(n):
+                proof = tree.proof(i)
+                assert verify_proof(tree.leaf(i), proof, tree.root)
+                assert len(proof["path"]) <= max(0, (n - 1).bit_length())
+        assert not verify_proof(tree.leaf(3), tree.proof(4), tree.root)
+        assert not verify_proof(leaf_hash({"i": 99}), tree.proof(3), tree.root)
+
+    def test_batch_verifier_matches_single_verification(self):
+        """Shared path nodes are reused without accepting anything verify_proof rejects."""
+        tree = MerkleTree.from_records(range(1000))
+        picks = list(range(0, 1000, 7))
+        leaves = [tree.leaf(i) for i in picks]
+        proofs = [tree.proof(i) for i in picks]
+        assert all(verify_batch(leaves, proofs, tree.root))
+        forged = [dict(p, path=list(p["path"])) for p in proofs]
+        forged[5]["path"][-1] = "00" * 32          # Wrong sibling above the joined path
+        forged[9]["leaf_index"] += 1
+        leaves[12] = leaf_hash("forged")
+        results = verify_batch(leaves, forged, tree.root)
+        expected = [verify_proof(l, p, tree.root) for l, p in zip(leaves, forged)]
+        assert results == expected and results.count(False) == 3
+
+    def test_batch_reuses_cached_nodes(self, monkeypatch):
+        """Later proofs join the cached paths: no verify_proof fallback, far fewer hashes than one-by-one."""
+        from ita_aero_sec.ai import merkle
+        tree = MerkleTree.from_records(range(1024))
+        picks = list(range(0, 1024, 3))
+        leaves = [tree.leaf(i) for i in picks]
+        proofs = [tree.proof(i) for i in picks]
+        calls = {"node": 0, "fallback": 0}
+        real_node, real_verify = merkle._node, merkle.verify_proof
+
+        def counting_node(*args):
+            calls["node"] += 1
+            return real_node(*args)
+
+        def counting_verify(*args):
+            calls["fallback"] += 1
+            return real_verify(*args)
+        monkeypatch.setattr(merkle, "_node", counting_node)
+        monkeypatch.setattr(merkle, "verify_proof", counting_verify)
+        assert all(verify_batch(leaves, proofs, tree.root))
+        assert calls["fallback"] == 0
+        assert calls["node"] < 1024 < len(picks) * 10
+
+    def test_bad_first_proof_does_not_poison_batch(self):
+        """A malformed or wrong-size proof at the head of the batch fails alone."""
+        tree = MerkleTree.from_records(range(50))
+        leaves = [tree.leaf(i) for i in range(50)]
+        proofs = tree.proofs()
+        bad = [{"leaf_index": 0, "tree_size": 3, "path": []}, {"leaf_index": 99, "tree_size": 50, "path": []}]
+        results = verify_batch(["00" * 32, leaves[0]] + leaves, bad + proofs, tree.root)
+        assert results == [False, False] + [True] * 50
+
+    def test_accumulator_seals_once_per_batch(self):
+        """Records are sealed by count; tickets resolve to proofs against the sealed root."""
+        sealed = []
+        acc = MerkleAccumulator(on_seal=sealed.append, max_records=100)
+        tickets = [acc.add({"i": i}) for i in range(250)]
+        assert [b.size for b in sealed] == [100, 100] and acc.pending == 50
+        acc.close()
+        assert [b.size for b in sealed] == [100, 100, 50]
+        proof = acc.proof(*tickets[180])
+        assert proof["root"] == sealed[1].root and verify_proof(proof["leaf"], proof, proof["root"])
+
+    def test_auditor_writes_seal_records_into_chain(self, tmp_path):
+        """Merkle roots are sealed as chained records; each audited record has an inclusion proof."""
+        import json
+        path = tmp_path / "audit.log"
+        auditor = SovereignIA_Auditor(log_path=str(path), merkle_batch=8)
+        for i in range(20):
+            auditor.audit_decision("NODE", "OK", {"I": i})
+        auditor.close()
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        seals = [r for r in records if r["decision"] == "MERKLE_SEAL"]
+        assert [s["data_fingerprint"]["leaf_count"] for s in seals] == [8, 8, 4]
+        assert verify_chain(str(path), workers=1)["ok"]
+
+        second = seals[1]["data_fingerprint"]
+        target = next(r for r in records if r["seq"] == second["first_seq"] + 3)
+        proof = auditor.inclusion_proof(target["seq"])
+        assert proof["root"] == second["merkle_root"]
+        assert verify_proof(leaf_hash(target["forensic_signature"]), proof, second["merkle_root"])
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import time
+import pytest
+import numpy as np
+
+from src.gear_arinc429_agent import GEARArinc429Agent
+from src.ita_aero_sec.sensors import arinc429_codec as codec
+from src.gear_blockchain_agent import GEARBlockchainAgent
+from src.gear_ledger_store import LedgerStore, BloomFilter
+from src.gear_replicated_ledger import LocalCluster, LedgerClient
+from src.gear_log_sink import LogRing, LogSink
+from src.gear_adk_base import GEARBaseAgent
+from src.gear_command_node import GEARCommandNode
+from src.gear_message_bus import MessageBus, Topic, ANOMALY
+from src.adsb_cyber_perito_agent import ADSBCyberPeritoAgent
+from src.gear_gemini_agent import GeminiReasoningAgent
+from src.ita_aero_sec.ai.merkle import verify_proof, verify_batch
+from src.ita_aero_sec.ai.chain_verifier import verify_chain
+
+class TestGEARArinc429Agent:
+    def test_decode_word_is_deterministic(self):
+        """Decoding goes through the codec instead of a random state."""
+        agent = GEARArinc429Agent()
+        results = agent.process({"203": 32050, "210": 450})
+        assert [r["state"] for r in results] == ["VALID", "VALID"]
+        assert results[0]["value"] == 32050
+        assert results[1]["unit"] == "knots"
+
+    def test_unknown_label_decodes_raw(self):
+        """Labels without a scaling spec are returned raw and flagged instead of failing the block."""
+        agent = GEARArinc429Agent()
+        results = agent.process({"203": 32050, "377": 12.5, "999": 3})
+        assert [r["state"] for r in results] == ["VALID", "UNKNOWN_LABEL", "UNKNOWN_LABEL"]
+        assert results[1]["value"] == 12.5 and results[1]["unit"] == "raw"
+
+    def test_bulk_capture_flags_parity_errors(self):
+        """Raw word arrays are decoded in bulk with per-word states."""
+        agent = GEARArinc429Agent()
+        words = codec.encode_words([203, 210, 270], [32000.0, 480.0, 0.0])
+        words[1] ^= 1 << 20
+        decoded = agent.process(words)
+        assert list(decoded["state"]) == [codec.STATE_VALID, codec.STATE_PARITY_ERROR, codec.STATE_VALID]
+        assert decoded["value"][0] == 32000
+
+
+class TestGEARBlockchainAgent:
+    def test_exported_ledger_verifies(self, tmp_path):
+        """Blocks are hash-chained, so an exported ledger passes the chain verifier."""
+        agent = GEARBlockchainAgent()
+        for i in range(20):
+            agent.process({"forensic_hash": f"{i:064x}", "metadata": {"icao": "0xABC123", "alt": 70000 + i}})
+        assert agent.ledger[5]["prev_hash"] == agent.ledger[4]["block_hash"]
+        assert agent.ledger[5]["leaf_count"] == 1
+        path = agent.export_ledger(str(tmp_path / "ledger.jsonl"))
+        report = verify_chain(path, workers=1)
+        assert report["ok"] and report["format"] == "ledger" and report["records"] == 20
+
+    def test_rewritten_block_is_detected(self, tmp_path):
+        """Rewriting an anchored forensic hash breaks that block's signature."""
+        agent = GEARBlockchainAgent()
+        for i in range(5):
+            agent.process({"forensic_hash": f"{i:064x}"})
+        path = tmp_path / "ledger.jsonl"
+        agent.export_ledger(str(path))
+        lines = path.read_text().splitlines(keepends=True)
+        lines[3] = lines[3].replace(agent.ledger[3]["merkle_root"], "f" * 64)
+        path.write_text("".join(lines))
+        report = verify_chain(str(path), workers=1)
+        assert not report["ok"] and report["error"]["kind"] == "bad_signature" and report["error"]["record"] == 3
+
+    def test_batched_blocks_seal_merkle_roots_with_proofs(self):
+        """A block seals one Merkle root per batch; each anchor proves inclusion in O(log n)."""
+        agent = GEARBlockchainAgent(batch_size=16)
+        payloads = [{"forensic_hash": f"{i:064x}", "alt": 30000 + i} for i in range(40)]
+        for p in payloads:
+            agent.process(p)
+        assert len(agent.ledger) == 2 and not agent.verify_evidence(payloads[35]["forensic_hash"])
+        agent.flush()
+        assert [b["leaf_count"] for b in agent.ledger] == [16, 16, 8]
+        assert agent.verify_evidence(payloads[35]["forensic_hash"])
+        proof = agent.inclusion_proof(payloads[20]["forensic_hash"])
+        assert proof["block_index"] == 1 and len(proof["path"]) == 4
+        assert agent.verify_inclusion(payloads[20], proof)
+        assert not agent.verify_inclusion(dict(payloads[20], alt=0), proof)
+
+    def test_timed_batches_seal_without_more_traffic(self):
+        """With batch_ms, a partial batch is sealed by the timer."""
+        import time
+        agent = GEARBlockchainAgent(batch_size=1000, batch_ms=5)
+        agent.process({"forensic_hash": "a" * 64})
+        deadline = time.time() + 2
+        while not agent.ledger and time.time() < deadline:
+            time.sleep(0.005)
+        assert agent.ledger and agent.verify_evidence("a" * 64)
+        agent.close()
+
+
+class TestGeminiAuditBatch:
+    def test_audit_batch_returns_root_and_proofs(self):
+        """The swarm block is sealed once; every record verifies against the root."""
+        agent = GeminiReasoningAgent()
+        block = [{"icao": f"0x{i:06X}", "alt": 35000 + i} for i in range(13)]
+        sealed = agent.audit_batch(block)
+        assert sealed["records"] == 13
+        assert all(verify_batch(sealed["leaves"], sealed["proofs"], sealed["merkle_root"]))
+        assert verify_proof(sealed["leaves"][7], sealed["proofs"][7], sealed["merkle_root"])
+        assert not verify_proof(sealed["leaves"][7], sealed["proofs"][8], sealed["merkle_root"])
+
+
+class TestLedgerStore:
+    def test_ledger_survives_restart(self, tmp_path):
+        """A reopened agent resumes the chain and still finds evidence anchored before the restart."""
+        agent = GEARBlockchainAgent(batch_size=4, store_dir=str(tmp_path))
+        for i in range(10):
+            agent.process({"forensic_hash": f"{i:064x}"})
+        agent.close()   # Seals the open batch of 2
+
+        reopened = GEARBlockchainAgent(batch_size=4, store_dir=str(tmp_path))
+        assert len(reopened.ledger) == 3 and reopened.last_hash == agent.last_hash
+        assert reopened.verify_evidence(f"{9:064x}") and not reopened.verify_evidence("f" * 64)
+        proof = reopened.inclusion_proof(f"{5:064x}")
+        assert reopened.verify_inclusion({"forensic_hash": f"{5:064x}"}, proof)
+        reopened.process({"forensic_hash": "e" * 64})
+        reopened.flush()
+        assert reopened.ledger[3]["prev_hash"] == agent.last_hash
+        assert verify_chain(reopened.export_ledger(str(tmp_path / "ledger.jsonl")), workers=1)["ok"]
+        reopened.close()
+
+    def test_unindexed_tail_is_truncated_on_open(self, tmp_path):
+        """Segment bytes written after the last indexed block (crash) are dropped on open."""
+        store = LedgerStore(str(tmp_path))
+        store.append({"block_index": 0, "block_hash": "a" * 64}, [("x" * 64, "b" * 64)])
+        store.close()
+        segment = tmp_path / "segment-000000.jsonl"
+        intact = segment.read_bytes()
+        with open(segment, "ab") as f:
+            f.write(b'{"block_index": 1, "block_ha')
+        store = LedgerStore(str(tmp_path))
+        assert store.stats["truncated_bytes"] == 28 and segment.read_bytes() == intact
+        assert store.count == 1 and store.locate("x" * 64) == (0, 0)
+        store.close()
+
+    def test_segments_rotate_and_lookups_use_bloom(self, tmp_path):
+        """Blocks spread over segments; misses are answered by the Bloom filter without a query."""
+        store = LedgerStore(str(tmp_path), segment_bytes=2048)
+        for i in range(200):
+            store.append({"block_index": i, "block_hash": f"{i:064x}"}, [(f"ev{i}", f"{i:064x}")])
+        assert store.segment > 2
+        assert store.get(150)["block_hash"] == f"{150:064x}" and store.get(-1)["block_index"] == 199
+        assert [b["block_index"] for b in store] == list(range(200))
+        assert all(store.locate(f"ev{i}") == (i, 0) for i in range(200))
+        for i in range(1000):
+            assert store.locate(f"missing{i}") is None
+        assert store.stats["bloom_negatives"] >= 990
+        store.close()
+
+    def test_stale_bloom_is_rebuilt_after_crash(self, tmp_path):
+        """A store that was not closed cleanly rebuilds its Bloom filter from the index."""
+        store = LedgerStore(str(tmp_path))
+        store.append({"block_index": 0, "block_hash": "a" * 64}, [("evidence", "b" * 64)])
+        store.bloom.clear()          # Lost filter pages, no clean close
+        store.bloom.flush()
+        reopened = LedgerStore(str(tmp_path))
+        assert reopened.locate("evidence") == (0, 0)
+        reopened.close()
+
+    def test_index_rows_past_segment_end_are_dropped(self, tmp_path):
+        """Blocks indexed but lost from the segment (no fsync, power loss) are dropped on open."""
+        store = LedgerStore(str(tmp_path))
+        for i in range(3):
+            store.append({"block_index": i, "block_hash": f"{i:064x}"}, [(f"ev{i}", f"{i:064x}")])
+        store.close()
+        segment = tmp_path / "segment-000000.jsonl"
+        first = segment.read_bytes().split(b"\n")[0] + b"\n"
+        segment.write_bytes(first + b"\0" * 10)
+        store = LedgerStore(str(tmp_path))
+        assert store.count == 1 and store.stats["dropped_blocks"] == 2
+        assert store.locate("ev0") == (0, 0) and store.locate("ev2") is None
+        assert store.append({"block_index": 1, "block_hash": "c" * 64}) == 1
+        assert [b["block_index"] for b in store] == [0, 1]
+        store.close()
+
+    def test_bloom_grows_with_key_count(self, tmp_path):
+        """The Bloom filter is resized from the evidence count instead of saturating."""
+        store = LedgerStore(str(tmp_path), bloom_capacity=64)
+        for i in range(300):
+            store.append({"block_index": i, "block_hash": f"{i:064x}"}, [(f"ev{i}", f"{i:064x}")])
+        assert store.bloom.capacity >= 300 and store.stats["bloom_grows"] >= 1
+        assert all(store.locate(f"ev{i}") == (i, 0) for i in range(300))
+        store.close()
+        reopened = LedgerStore(str(tmp_path), bloom_capacity=64)
+        assert reopened.bloom.capacity >= 300 and not reopened.bloom.fresh
+        assert sum(reopened.locate(f"missing{i}") is None for i in range(1000)) == 1000
+        assert reopened.stats["bloom_false_positives"] <= 5
+        reopened.close()
+
+
+async def _converged(client, nodes, blocks, timeout=15.0):
+    """Statuses of `nodes` once they all applied `blocks` blocks with the same head hash."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        statuses = [await client.status(n) for n in nodes]
+        if all(s and s["blocks"] == blocks for s in statuses) and len({s["last_block_hash"] for s in statuses}) == 1:
+            return statuses
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"nodes {nodes} did not converge on {blocks} blocks: {statuses}")
+
+
+class TestReplicatedLedger:
+    def test_pipelined_appends_replicate_to_every_node(self, tmp_path):
+        """Concurrent batches commit through the leader and every replica holds the same verifiable chain."""
+        async def scenario(cluster):
+            async with LedgerClient(cluster.addresses) as client:
+                await client.wait_for_leader()
+                batches = [[{"forensic_hash": f"{b:04x}{i:060x}"} for i in range(5)] for b in range(30)]
+                results = await asyncio.gather(*(client.append(batch) for batch in batches))
+                assert sorted(r["block_index"] for r in results) == list(range(30))
+                return await _converged(client, list(cluster.addresses), 30)
+
+        with LocalCluster(3, str(tmp_path)) as cluster:
+            asyncio.run(scenario(cluster))
+        store = LedgerStore(str(tmp_path / "node1" / "ledger"))
+        assert store.count == 30 and store.locate(f"{7:04x}{3:060x}") == (store.locate(f"{7:04x}{0:060x}")[0], 3)
+        store.close()
+        assert verify_chain(str(tmp_path / "node2" / "ledger" / "segment-000000.jsonl"), workers=1)["ok"]
+
+    def test_leader_kill_loses_no_committed_block(self, tmp_path):
+        """After a leader crash a new leader is elected, keeps committing, and the restarted node catches up."""
+        async def scenario(cluster):
+            async with LedgerClient(cluster.addresses) as client:
+                old_leader = await client.wait_for_leader()
+                for b in range(10):
+                    await client.append([{"forensic_hash": f"a{b:063x}"}])
+                cluster.kill(old_leader)
+                survivors = [n for n in cluster.addresses if n != old_leader]
+                for b in range(10):
+                    await client.append([{"forensic_hash": f"b{b:063x}"}])
+                assert client.leader in survivors
+                statuses = await _converged(client, survivors, 20)
+                cluster.restart(old_leader)
+                rejoined = await _converged(client, list(cluster.addresses), 20)
+                assert rejoined[0]["last_block_hash"] == statuses[0]["last_block_hash"]
+
+        with LocalCluster(3, str(tmp_path)) as cluster:
+            asyncio.run(scenario(cluster))
+
+
+class TestAgentLogging:
+    def test_ring_keeps_latest_entries_in_order(self):
+        """The ring overwrites its oldest entries and indexes oldest-first."""
+        ring = LogRing(4)
+        for i in range(10):
+            ring.append(i)
+        assert len(ring) == 4 and ring.dropped == 6
+        assert ring.snapshot() == [6, 7, 8, 9] and list(ring) == [6, 7, 8, 9]
+        assert ring[0] == 6 and ring[-1] == 9
+
+    def test_agent_history_is_bounded_and_goes_through_sink(self, tmp_path):
+        """Agents keep a fixed-size history and write through their sink instead of stdout."""
+        sink = LogSink(stdout=False, jsonl_path=str(tmp_path / "swarm.jsonl"), sample_every=1)
+        agent = GEARCommandNode()
+        agent.log_history = LogRing(8)
+        agent.sink = sink
+        for i in range(50):
+            agent.process({"reasoning": f"threat {i}"})
+        assert len(agent.log_history) == 8 and agent.log_history[-1]["message"].endswith("(Alert #50).")
+        sink.close()
+        lines = [json.loads(l) for l in (tmp_path / "swarm.jsonl").read_text().splitlines()]
+        assert len(lines) == 50 and lines[0]["agent"] == "MISSION_COMMAND_C2"
+
+    def test_repetitive_messages_are_sampled(self, tmp_path):
+        """Repeats beyond the burst are sampled and counted; forensic entries always pass."""
+        sink = LogSink(stdout=False, path=str(tmp_path / "swarm.log"), sample_after=5, sample_every=10,
+                       window_s=60)
+        for i in range(105):
+            sink.submit({"agent": "A", "level": "WARN", "message": f"Spoofed ICAO 0x{i:06d}"})
+            sink.submit({"agent": "A", "level": "FORENSIC", "message": f"Sealing {i}"})
+        assert sink.flush()
+        text = (tmp_path / "swarm.log").read_text().splitlines()
+        warns = [l for l in text if l.startswith("[WARN]")]
+        assert len(warns) == 15 and warns[5].endswith("(+9 similar suppressed)")
+        assert sum(l.startswith("[FORENSIC]") for l in text) == 105
+        assert sink.stats["sampled_out"] == 90
+        sink.close()
+
+    def test_expired_suppressed_counts_are_summarized(self, tmp_path):
+        """Suppressed repeats still pending when their window expires (or the sink closes) are written."""
+        sink = LogSink(stdout=False, path=str(tmp_path / "swarm.log"), sample_after=5, sample_every=100,
+                       window_s=0.05)
+        for i in range(30):
+            sink.submit({"agent": "A", "level": "WARN", "message": f"Spoofed ICAO 0x{i:06d}"})
+        time.sleep(0.1)
+        sink.submit({"agent": "A", "level": "INFO", "message": "Sweep done"})
+        for i in range(8):
+            sink.submit({"agent": "B", "level": "WARN", "message": f"Jammed {i}"})
+        sink.close()
+        text = (tmp_path / "swarm.log").read_text().splitlines()
+        assert "[WARN] Spoofed ICAO 0x000029 (+25 similar suppressed)" in text
+        assert text[-1] == "[WARN] Jammed 7 (+3 similar suppressed)"
+
+    def test_agent_startup_line_goes_through_sink(self, tmp_path, capsys):
+        """The initialization line is written by the agent's sink, not printed synchronously."""
+        class Probe(GEARBaseAgent):
+            def process(self, data):
+                return data
+        sink = LogSink(stdout=False, jsonl_path=str(tmp_path / "swarm.jsonl"))
+        agent = Probe("C2_TEST", sink=sink)
+        assert capsys.readouterr().out == "" and len(agent.log_history) == 0
+        sink.close()
+        first = json.loads((tmp_path / "swarm.jsonl").read_text().splitlines()[0])
+        assert first["agent"] == "C2_TEST" and first["message"].endswith("initialized.")
+
+
+class TestMessageBus:
+    def test_slow_reasoner_does_not_stall_detection(self, monkeypatch):
+        """Detection publishes and moves on; reasoning, mitigation, anchoring and C2 catch up through the bus."""
+        perito = ADSBCyberPeritoAgent()
+
+        def slow_reasoning(context):
+            time.sleep(0.02)
+            return "REPORT: SPOOFING_DETECTED, NEUTRALIZE_SDR_PORT"
+        monkeypatch.setattr(perito.reasoner, "process", slow_reasoning)
+
+        async def scenario():
+            async with MessageBus() as bus:
+                perito.attach(bus)
+                start = time.perf_counter()
+                published = [await perito.process_async({"icao": f"0x{i:06X}", "alt": 70000}) for i in range(40)]
+                detect_s = time.perf_counter() - start
+                assert await perito.process_async({"icao": "0xCLEAN0", "alt": 35000}) is None
+                await bus.drain()
+                return detect_s, published, bus.stats()
+
+        detect_s, published, stats = asyncio.run(scenario())
+        assert detect_s < 0.4 and all(m.message_type == ANOMALY.name for m in published)
+        assert len(perito.ledger.ledger) == 40 and perito.command_node.alerts_sent == 40
+        assert len(perito.mitigator.action_history) == 40
+        assert perito.ledger.verify_evidence(hash(str({"icao": "0x000007", "alt": 70000})))
+        assert stats[f"{ANOMALY.name}:{perito.reasoner.agent_id}"]["errors"] == 0
+
+    def test_failing_message_does_not_lose_rest_of_batch(self, monkeypatch):
+        """One anchor that fails is logged at ERROR and counted; the rest of its batch is still anchored."""
+        perito = ADSBCyberPeritoAgent()
+        real_process = perito.ledger.process
+
+        def flaky(payload):
+            if payload["telemetry"]["icao"] == "0x000003":
+                raise OSError("ledger disk full")
+            return real_process(payload)
+        monkeypatch.setattr(perito.ledger, "process", flaky)
+
+        async def scenario():
+            async with MessageBus() as bus:
+                perito.attach(bus)
+                for i in range(10):
+                    await bus.publish(ANOMALY, {"telemetry": {"icao": f"0x{i:06X}", "alt": 70000},
+                                                "arinc_labels": None, "status": "PHYSICAL_ANOMALY"}, "test")
+                await bus.drain()
+                return bus.stats()[f"gear.evidence:{perito.ledger.agent_id}"]
+
+        stats = asyncio.run(scenario())
+        assert len(perito.ledger.ledger) == 9 and perito.command_node.alerts_sent == 10
+        assert stats["failed"] == 1 and stats["delivered"] == 9
+        errors = [e for e in perito.ledger.log_history if e["level"] == "ERROR"]
+        assert len(errors) == 1 and "ledger disk full" in errors[0]["message"]
+
+    def test_bounded_queues_apply_backpressure_or_shed(self):
+        """A full 'block' queue makes the publisher wait; 'drop_oldest' sheds and counts instead."""
+        topic = Topic("test.numbers", int)
+
+        async def scenario():
+            release, seen = asyncio.Event(), {"slow": [], "lossy": []}
+
+            async def slow(messages):
+                await release.wait()
+                seen["slow"].append([m.content for m in messages])
+
+            async def lossy(messages):
+                await release.wait()
+                seen["lossy"].extend(m.content for m in messages)
+
+            async with MessageBus(queue_size=4) as bus:
+                bus.subscribe(topic, slow, name="slow", batch_max=8)
+                bus.subscribe(topic, lossy, name="lossy", overflow="drop_oldest")
+                await bus.publish(topic, 0, "test")
+                await asyncio.sleep(0)          # Consumers take message 0 and wait
+                for i in range(1, 5):
+                    await bus.publish(topic, i, "test")
+                blocked = asyncio.ensure_future(bus.publish(topic, 5, "test"))
+                await asyncio.sleep(0.05)
+                assert not blocked.done()       # "slow" queue full: the publisher waits
+                with pytest.raises(TypeError):
+                    await bus.publish(topic, "not an int", "test")
+                release.set()
+                await blocked
+                await bus.drain()
+                return seen, bus.stats()
+
+        seen, stats = asyncio.run(scenario())
+        assert seen["slow"][0] == [0] and sum(seen["slow"], []) == list(range(6))
+        assert max(len(b) for b in seen["slow"]) > 1
+        assert stats["test.numbers:lossy"]["dropped"] == 1 and seen["lossy"] == [0, 2, 3, 4, 5]
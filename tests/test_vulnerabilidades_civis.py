@@ -19,13 +19,23 @@ Author: Eng. Ramon de Souza Mendes (CREA-SP: 5071785098)
 import unittest
 import numpy as np
 import time
+import sys
+import os
 
-# In a full run, we would import the actual modules:
-# from src.adsb_spoofing import ADSBSpoofingDetector
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from adsb_spoofing import ADSBSpoofingDetector, ADSBInferenceEngine
 # from integration_edge_vertex import trigger_vertex_ai_analysis
 
 class TestCivilInfrastructureResilience(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        """Trains the edge Isolation Forest once; batches are scored through the inference engine."""
+        detector = ADSBSpoofingDetector(contamination=0.05)
+        detector.train_detector(detector.generate_flight_data(n_samples=2000))
+        cls.engine = ADSBInferenceEngine.from_detector(detector)
+
     def setUp(self):
         """Initializes the baseline parameters for the civil airspace simulator."""
         self.batch_size = 5000  # High density scenario
@@ -37,23 +47,29 @@ class TestCivilInfrastructureResilience(unittest.TestCase):
         and correctly isolate mathematically impossible flight envelopes
         without dropping legitimate commercial flights.
         """
-        start_time = time.time()
-        
-        # Simulating civil airspace data matrix
-        altitudes = np.random.normal(32000, 50, self.batch_size)
-        
+        rng = np.random.default_rng(8)
+
+        # Simulating civil airspace data matrix (altitude_delta, velocity_delta, rssi, latency_ms)
+        features = np.column_stack([
+            rng.normal(0, 50, self.batch_size), rng.normal(0, 10, self.batch_size),
+            rng.normal(-50, 5, self.batch_size), rng.normal(20, 5, self.batch_size),
+        ]).astype(np.float32)
+
         # Injecting structural vulnerabilities (Ghost vectors)
-        spoof_mask = np.random.random(self.batch_size) < self.anomaly_prob
-        altitudes[spoof_mask] += np.random.normal(0, 2000, np.sum(spoof_mask))
-        
-        # The AI Processing Delay Constraint (< 200ms per batch)
-        time.sleep(0.05) # Simulated inference time for the ML model
-        
-        processing_time = time.time() - start_time
-        
+        spoof_mask = rng.random(self.batch_size) < self.anomaly_prob
+        features[spoof_mask, 0] += rng.normal(0, 2000, np.sum(spoof_mask))
+        features[spoof_mask, 3] += 230.0
+
+        # The AI Processing Delay Constraint (< 200ms per batch): real model inference
+        start_time = time.perf_counter()
+        flagged = self.engine.predict_batch(features).astype(bool)
+        processing_time = time.perf_counter() - start_time
+
         # Assertions to Qualify System (TRL-8 requirements)
         self.assertLess(processing_time, 0.200, "Inference time exceeded civil aviation limits (200ms).")
         self.assertGreater(np.sum(spoof_mask), 0, "Failed to generate structural vulnerabilities in test batch.")
+        self.assertGreater(flagged[spoof_mask].mean(), 0.95, "Ghost aircraft escaped detection.")
+        self.assertLess(flagged[~spoof_mask].mean(), 0.10, "Legitimate commercial flights dropped.")
         
         print("\n[✔] TRL-8 QUALIFIED: High-density Ghost Aircraft tracking completed in {:.2f}s".format(processing_time))
 